@@ -2,9 +2,10 @@
 
 import os
 import psutil
-import subprocess
 from typing import List, Dict, Any
-from pathlib import Path
+
+from utils.command_stream import stream_ndjson, powershell_ndjson
+from utils.dir_walker import DirectoryWalker
 
 
 class DiskAnalyzer:
@@ -12,6 +13,9 @@ class DiskAnalyzer:
 
     def __init__(self):
         self.items: List[Dict[str, Any]] = []
+        self.temp_depth = 64
+        self.max_entries = 1000000
+        self.time_budget = 60.0
 
     def _format_bytes(self, bytes_val: int) -> str:
         """Format bytes to human-readable string."""
@@ -32,19 +36,14 @@ class DiskAnalyzer:
     def _get_smart_status(self, drive_letter: str) -> str:
         """Get SMART status for a drive using WMI."""
         try:
-            # Use PowerShell to query SMART status
-            result = subprocess.run(
-                ['powershell', '-Command',
-                 f'Get-WmiObject -Namespace root\\wmi -Class MSStorageDriver_FailurePredictStatus 2>$null | '
-                 f'Select-Object InstanceName, PredictFailure | ConvertTo-Json'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-
-            if result.returncode == 0 and result.stdout.strip():
-                # Parse result - simplified check
-                if 'true' in result.stdout.lower():
+            # One JSON object per disk, so each flag is read as a boolean
+            disks = list(stream_ndjson(powershell_ndjson(
+                'Get-WmiObject -Namespace root\\wmi -Class MSStorageDriver_FailurePredictStatus 2>$null | '
+                'Select-Object InstanceName, PredictFailure'
+            ), timeout=10))
+
+            if disks:
+                if any(isinstance(d, dict) and d.get('PredictFailure') is True for d in disks):
                     return 'Warning - Failure Predicted'
                 return 'OK'
         except Exception:
@@ -53,32 +52,29 @@ class DiskAnalyzer:
 
     def _get_temp_folder_size(self) -> Dict[str, Any]:
         """Calculate size of temp folders."""
-        temp_paths = [
-            Path(os.environ.get('TEMP', '')),
-            Path(os.environ.get('TMP', '')),
-            Path('C:/Windows/Temp'),
-        ]
-
-        total_size = 0
-        file_count = 0
-
-        for temp_path in temp_paths:
-            try:
-                if temp_path.exists():
-                    for item in temp_path.rglob('*'):
-                        try:
-                            if item.is_file():
-                                total_size += item.stat().st_size
-                                file_count += 1
-                        except (PermissionError, OSError):
-                            pass
-            except (PermissionError, OSError):
-                pass
+        temp_paths = []
+        for path in [os.environ.get('TEMP', ''), os.environ.get('TMP', ''), 'C:\\Windows\\Temp']:
+            # TEMP and TMP usually point at the same folder
+            if path and os.path.isdir(path) and os.path.normcase(path) not in map(os.path.normcase, temp_paths):
+                temp_paths.append(path)
+
+        # No listing cache: files grow without touching their folder's mtime
+        walker = DirectoryWalker(
+            max_depth=self.temp_depth,
+            max_entries=self.max_entries,
+            time_budget=self.time_budget
+        )
+        store = walker.walk(temp_paths)
+
+        # Unmeasured directories hold PathStore.UNKNOWN (-1)
+        total_size = sum(size for size in store.size if size > 0)
+        file_count = sum(count for count in store.file_count if count > 0)
 
         return {
             'size': self._format_bytes(total_size),
             'size_bytes': total_size,
-            'file_count': file_count
+            'file_count': file_count,
+            'truncated': walker.truncated
         }
 
     def scan(self) -> List[Dict[str, Any]]:
@@ -131,9 +127,9 @@ class DiskAnalyzer:
             'mount_point': 'Various',
             'file_system': 'N/A',
             'total': 'N/A',
-            'used': temp_info['size'],
+            'used': temp_info['size'] + (' (partial)' if temp_info['truncated'] else ''),
             'free': 'N/A',
-            'percent_used': f"{temp_info['file_count']} files",
+            'percent_used': f"{temp_info['file_count']}{'+' if temp_info['truncated'] else ''} files",
             'smart_status': 'N/A',
             'severity': temp_severity
         })
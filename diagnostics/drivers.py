@@ -1,7 +1,10 @@
 """Driver status analysis module."""
 
-import subprocess
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
+
+from utils.driver_catalog import DriverCatalog
+from utils.driver_inventory import DriverInventory
+from utils.log_miner import DriverHistory
 
 
 class DriverAnalyzer:
@@ -44,8 +47,11 @@ class DriverAnalyzer:
         52: 'Driver not digitally signed',
     }
 
-    def __init__(self):
+    def __init__(self, history: Optional[DriverHistory] = None, catalog: Optional[DriverCatalog] = None):
         self.items: List[Dict[str, Any]] = []
+        self.history = history or DriverHistory()
+        self.inventory = DriverInventory()
+        self.catalog = catalog or DriverCatalog()
 
     def _get_severity(self, config_manager_error_code: int, is_signed: bool) -> str:
         """Determine severity based on error code and signature."""
@@ -58,59 +64,30 @@ class DriverAnalyzer:
     def scan(self) -> List[Dict[str, Any]]:
         """Scan for driver issues using WMI."""
         self.items = []
-
-        try:
-            # Query PnP devices with potential issues
-            result = subprocess.run(
-                ['powershell', '-Command',
-                 'Get-WmiObject Win32_PnPEntity | '
-                 'Select-Object Name, DeviceID, Status, ConfigManagerErrorCode | '
-                 'ConvertTo-Csv -NoTypeInformation'],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    for line in lines[1:]:
-                        parts = self._parse_csv_line(line)
-                        if len(parts) >= 4:
-                            name = parts[0].strip('"')
-                            device_id = parts[1].strip('"')
-                            status = parts[2].strip('"')
-                            error_code_str = parts[3].strip('"')
-
-                            try:
-                                error_code = int(error_code_str) if error_code_str else 0
-                            except ValueError:
-                                error_code = 0
-
-                            # Only include devices with issues
-                            if error_code != 0 or status not in ['OK', '']:
-                                error_description = self.PROBLEM_STATUS_CODES.get(
-                                    error_code, f'Unknown error ({error_code})'
-                                ) if error_code != 0 else 'Status issue'
-
-                                severity = 'Critical' if error_code != 0 else 'Warning'
-
-                                self.items.append({
-                                    'name': name or 'Unknown Device',
-                                    'device_id': device_id[:60] + '...' if len(device_id) > 60 else device_id,
-                                    'status': status or 'Unknown',
-                                    'error_code': error_code,
-                                    'error_description': error_description,
-                                    'severity': severity
-                                })
-
-        except subprocess.TimeoutExpired:
-            pass
-        except Exception as e:
-            print(f"Error scanning drivers: {e}")
+        self.history.scan()
+        self.inventory.load()
+
+        listed = set()
+        for device in self.inventory.get_problem_devices():
+            error_code = device['error_code']
+            error_description = self.PROBLEM_STATUS_CODES.get(
+                error_code, f'Unknown error ({error_code})'
+            ) if error_code != 0 else 'Status issue'
+            if device['is_signed'] is False:
+                error_description += ', unsigned driver'
+            severity = 'Critical' if error_code != 0 else 'Warning'
+            self.items.append(self._make_item(device, device['status'] or 'Unknown', error_description, severity))
+            listed.add(device['device_id'].upper())
 
         # Also check for unsigned drivers
-        self._scan_unsigned_drivers()
+        for device in self.inventory.get_unsigned_drivers():
+            if device['device_id'].upper() not in listed:
+                self.items.append(self._make_item(device, 'Unsigned', f"Unsigned driver (v{device['driver_version']})",
+                                                  self._get_severity(0, False)))
+                listed.add(device['device_id'].upper())
+
+        self._scan_failed_installs(listed)
+        self._scan_outdated_drivers(listed)
 
         # Sort by severity
         severity_order = {'Critical': 0, 'Warning': 1, 'OK': 2}
@@ -118,65 +95,72 @@ class DriverAnalyzer:
 
         return self.items
 
-    def _scan_unsigned_drivers(self):
-        """Scan for unsigned drivers."""
+    def _make_item(self, device: Dict[str, Any], status: str, error_description: str,
+                   severity: str) -> Dict[str, Any]:
+        """Build a result row for an inventory device."""
+        device_id = device['device_id']
+        return {
+            'name': device['name'] or 'Unknown Device',
+            'device_id': device_id[:60] + '...' if len(device_id) > 60 else device_id,
+            'status': status,
+            'error_code': device['error_code'],
+            'error_description': error_description,
+            'severity': severity,
+            'driver_version': device['driver_version'],
+            'driver_date': device['driver_date'],
+            'provider': device['provider'],
+            'inf_name': device['inf_name'],
+            'signer': device['signer'],
+            **self._get_install_history(device_id)
+        }
+
+    def _get_install_history(self, device_id: str) -> Dict[str, Any]:
+        """Get a device's failed install count and last install from setupapi.dev.log."""
+        events = self.history.get_device_history(device_id) if device_id else []
+        last = events[-1] if events else None
+        return {
+            'install_failures': sum(1 for e in events if e['failed'] and e['status']),
+            'last_install': f"{last['time']} {last['status']}".strip() if last else ''
+        }
+
+    def _scan_failed_installs(self, listed: Set[str]):
+        """Add devices whose latest driver install failed but show no current problem."""
+        for key, events in self.history.get_failed_installs().items():
+            # Driver package imports are keyed by INF path rather than device
+            if key.endswith('.INF') or key in listed:
+                continue
+            last = events[-1]
+            detail = f": {last['error']}" if last['error'] else ''
+            device = self.inventory.get(key) or {
+                'device_id': key, 'name': key, 'error_code': 0, 'driver_version': '',
+                'driver_date': '', 'provider': '', 'inf_name': '', 'signer': ''
+            }
+            self.items.append(self._make_item(
+                device, 'Install failed', f"{last['action']} failed ({last['status']}){detail}"[:200], 'Warning'))
+
+    def _scan_outdated_drivers(self, listed: Set[str]):
+        """Add devices whose driver is older than the local catalog's minimum."""
+        if not self.catalog.open():
+            return
         try:
-            result = subprocess.run(
-                ['powershell', '-Command',
-                 'Get-WmiObject Win32_PnPSignedDriver | '
-                 'Where-Object { $_.IsSigned -eq $false } | '
-                 'Select-Object DeviceName, DriverVersion | '
-                 'ConvertTo-Csv -NoTypeInformation'],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    for line in lines[1:]:
-                        parts = self._parse_csv_line(line)
-                        if len(parts) >= 2:
-                            name = parts[0].strip('"')
-                            version = parts[1].strip('"')
-
-                            if name:
-                                # Check if already in list
-                                existing = [i for i in self.items if name in i.get('name', '')]
-                                if not existing:
-                                    self.items.append({
-                                        'name': name,
-                                        'device_id': 'N/A',
-                                        'status': 'Unsigned',
-                                        'error_code': 0,
-                                        'error_description': f'Unsigned driver (v{version})',
-                                        'severity': 'Warning'
-                                    })
-
-        except Exception:
-            pass
-
-    def _parse_csv_line(self, line: str) -> List[str]:
-        """Parse a CSV line handling quoted fields."""
-        parts = []
-        current = ""
-        in_quotes = False
-
-        for char in line:
-            if char == '"':
-                in_quotes = not in_quotes
-                current += char
-            elif char == ',' and not in_quotes:
-                parts.append(current)
-                current = ""
-            else:
-                current += char
-
-        if current:
-            parts.append(current)
-
-        return parts
+            for key, device in self.inventory.devices.items():
+                if key in listed or not (device['driver_version'] or device['driver_date']):
+                    continue
+                # Without reported hardware IDs, fall back to the instance ID minus its instance part
+                hardware_ids = device['hardware_ids'] or [device['device_id'].rsplit('\\', 1)[0]]
+                entry = self.catalog.lookup(hardware_ids)
+                if entry is None or not self.catalog.is_outdated(entry, device['driver_version'],
+                                                                 device['driver_date']):
+                    continue
+                required = entry['min_version'] or entry['min_date']
+                if entry['min_version'] and entry['min_date']:
+                    required += f" ({entry['min_date']})"
+                detail = f": {entry['note']}" if entry['note'] else ''
+                self.items.append(self._make_item(
+                    device, 'Outdated', f"Driver older than {required}{detail}"[:200], 'Warning'))
+                listed.add(key)
+        finally:
+            self.catalog.close()
 
     def get_summary(self) -> Dict[str, int]:
         """Get summary of driver issues."""
@@ -184,7 +168,10 @@ class DriverAnalyzer:
             'total_issues': len(self.items),
             'critical': 0,
             'warnings': 0,
-            'unsigned': 0
+            'unsigned': 0,
+            'failed_installs': 0,
+            'outdated': 0,
+            'update_errors': len(self.history.get_update_errors())
         }
         for item in self.items:
             if item['severity'] == 'Critical':
@@ -193,4 +180,8 @@ class DriverAnalyzer:
                 summary['warnings'] += 1
             if 'Unsigned' in item.get('status', ''):
                 summary['unsigned'] += 1
+            if item.get('status') == 'Install failed':
+                summary['failed_installs'] += 1
+            elif item.get('status') == 'Outdated':
+                summary['outdated'] += 1
         return summary
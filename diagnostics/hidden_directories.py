@@ -2,10 +2,18 @@
 
 import os
 import ctypes
-import subprocess
-from typing import List, Dict, Any
+import ntpath
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from utils.dir_walker import DirectoryWalker
+from utils.entropy import PayloadInspector
+from utils.fs_index import FileSystemIndex
+from utils.mft import MftParser, MftIndex
+from utils.signatures import SignatureScanner
+from utils.streams import StreamEnumerator
+from utils.whitelist import WhitelistMatcher
+
 
 class HiddenDirectoryAnalyzer:
     """Detects hidden directories and Alternate Data Streams."""
@@ -42,9 +50,33 @@ class HiddenDirectoryAnalyzer:
         'C:\\ProgramData',
     ]
 
+    # Limit on files content-scanned per flagged directory
+    MAX_CONTENT_FILES = 500
+
     def __init__(self):
         self.items: List[Dict[str, Any]] = []
         self.kernel32 = ctypes.windll.kernel32
+        self.scan_depth = 1
+        self.max_entries = 200000
+        self.time_budget = 60.0
+        self.max_workers = 4
+        self.walk_stats: Dict[str, Any] = {}
+        self.ads_roots: Optional[List[str]] = None  # None uses the default user locations
+        self.ads_depth = 3
+        self.ads_min_size = 0
+        self.scan_content = True
+        self.signature_scanner = SignatureScanner()
+        self.signature_stats: Dict[str, Any] = {}
+        self.deep_inspection = True
+        self.payload_inspector = PayloadInspector()
+        self.inspection_stats: Dict[str, Any] = {}
+        self.mft_source: Optional[str] = None  # $MFT image file or raw volume such as \\.\C:
+        self.mft_drive = 'C:'
+        self.incremental = True
+        self.fs_index = FileSystemIndex('hidden')
+        self.changes: Optional[Dict[str, Any]] = None
+        self.whitelist = WhitelistMatcher(names=self.WHITELIST)
+        self._item_states: Dict[str, Any] = {}
 
     def _get_file_attributes(self, path: str) -> int:
         """Get file attributes using Windows API."""
@@ -54,25 +86,14 @@ class HiddenDirectoryAnalyzer:
         except Exception:
             return 0
 
-    def _is_hidden(self, path: str) -> bool:
-        """Check if path has Hidden attribute."""
-        attrs = self._get_file_attributes(path)
-        return bool(attrs & self.FILE_ATTRIBUTE_HIDDEN)
-
-    def _is_system(self, path: str) -> bool:
-        """Check if path has System attribute."""
-        attrs = self._get_file_attributes(path)
-        return bool(attrs & self.FILE_ATTRIBUTE_SYSTEM)
-
     def _is_hidden_system(self, path: str) -> bool:
         """Check if path has both Hidden and System attributes."""
         attrs = self._get_file_attributes(path)
         return (bool(attrs & self.FILE_ATTRIBUTE_HIDDEN) and
                 bool(attrs & self.FILE_ATTRIBUTE_SYSTEM))
 
-    def _get_attributes_string(self, path: str) -> str:
+    def _get_attributes_string(self, attrs: int) -> str:
         """Get human-readable attributes string."""
-        attrs = self._get_file_attributes(path)
         parts = []
 
         if attrs & self.FILE_ATTRIBUTE_HIDDEN:
@@ -86,133 +107,272 @@ class HiddenDirectoryAnalyzer:
 
         return ', '.join(parts) if parts else 'Normal'
 
-    def _is_whitelisted(self, name: str) -> bool:
-        """Check if directory name is in the whitelist."""
-        return name.lower() in self.WHITELIST
-
-    def _get_dir_size(self, path: str) -> str:
-        """Get approximate directory size (non-recursive for speed)."""
-        try:
-            total = 0
-            with os.scandir(path) as it:
-                for entry in it:
-                    try:
-                        if entry.is_file(follow_symlinks=False):
-                            total += entry.stat().st_size
-                    except (OSError, PermissionError):
-                        pass
-
-            # Format size
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if total < 1024:
-                    return f"{total:.1f} {unit}"
-                total /= 1024
-            return f"{total:.1f} TB"
-        except Exception:
+    def _is_whitelisted(self, path: str, name: str, attrs: Optional[int] = None) -> bool:
+        """Check a directory against the built-in names and the whitelist rules."""
+        return self.whitelist.match(path, name, attrs)
+
+    def _in_whitelisted_tree(self, path: str, memo: Dict[str, bool]) -> bool:
+        """Check whether any ancestor of an $MFT path is whitelisted, as a walk would prune it."""
+        parent = ntpath.dirname(path)
+        if ntpath.dirname(parent) == parent:
+            return False
+        if parent not in memo:
+            memo[parent] = (self._is_whitelisted(parent, ntpath.basename(parent))
+                            or self._in_whitelisted_tree(parent, memo))
+        return memo[parent]
+
+    def _format_size(self, total: Optional[int]) -> str:
+        """Format a directory size in bytes."""
+        if total is None:
             return 'Unknown'
-
-    def _scan_alternate_data_streams(self, path: str) -> List[Dict[str, Any]]:
-        """Scan for Alternate Data Streams in a directory."""
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if total < 1024:
+                return f"{total:.1f} {unit}"
+            total /= 1024
+        return f"{total:.1f} TB"
+
+    def _scan_alternate_data_streams(self, roots: List[str]) -> List[Dict[str, Any]]:
+        """Scan for Alternate Data Streams under the given roots."""
         ads_items = []
 
-        try:
-            # Use PowerShell to find ADS
-            cmd = f'Get-ChildItem -Path "{path}" -Force -ErrorAction SilentlyContinue | ForEach-Object {{ Get-Item -Path $_.FullName -Stream * -ErrorAction SilentlyContinue }} | Where-Object {{ $_.Stream -ne ":$DATA" }} | Select-Object FileName,Stream,Length | ConvertTo-Csv -NoTypeInformation'
-
-            result = subprocess.run(
-                ['powershell', '-Command', cmd],
-                capture_output=True, text=True, timeout=30,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    for line in lines[1:]:  # Skip header
-                        try:
-                            parts = line.strip().strip('"').split('","')
-                            if len(parts) >= 2:
-                                filename = parts[0].strip('"')
-                                stream = parts[1].strip('"')
-                                length = parts[2].strip('"') if len(parts) > 2 else '0'
-
-                                # Skip Zone.Identifier (common, benign ADS from downloads)
-                                if stream.lower() == 'zone.identifier':
-                                    continue
-
-                                ads_items.append({
-                                    'path': filename,
-                                    'name': f"{os.path.basename(filename)}:{stream}",
-                                    'type': 'Alternate Data Stream',
-                                    'attributes': f'Stream: {stream}',
-                                    'size': f'{length} bytes',
-                                    'whitelisted': False,
-                                    'severity': 'Warning',
-                                    'details': f'Hidden data stream "{stream}" attached to file'
-                                })
-                        except (ValueError, IndexError):
-                            continue
-        except Exception:
-            pass
+        enumerator = StreamEnumerator(
+            max_depth=self.ads_depth,
+            min_size=self.ads_min_size,
+            max_entries=self.max_entries,
+            time_budget=self.time_budget,
+            max_workers=self.max_workers
+        )
+
+        for stream in enumerator.scan(roots):
+            ads_items.append(self._make_stream_item(stream['path'], stream['stream'], stream['size']))
 
         return ads_items
 
-    def _scan_directory(self, base_path: str, depth: int = 1) -> List[Dict[str, Any]]:
-        """Scan a directory for hidden items."""
+    def _make_stream_item(self, path: str, name: str, size: int) -> Dict[str, Any]:
+        """Build the result item for an Alternate Data Stream."""
+        _, total, count = self._item_states.get(path, (0, 0, 0))
+        self._item_states[path] = (0, total + size, count + 1)
+        return {
+            'path': path,
+            'name': f"{os.path.basename(path)}:{name}",
+            'type': 'Alternate Data Stream',
+            'attributes': f'Stream: {name}',
+            'size': f"{size} bytes",
+            'whitelisted': False,
+            'severity': 'Warning',
+            'details': f'Hidden data stream "{name}" attached to file'
+        }
+
+    def _is_hidden_or_system(self, record: Dict[str, Any]) -> bool:
+        """Check a walker record for the Hidden or System attribute."""
+        return bool(record['attributes'] & (self.FILE_ATTRIBUTE_HIDDEN | self.FILE_ATTRIBUTE_SYSTEM))
+
+    def _scan_directories(self, base_paths: List[str]) -> List[Dict[str, Any]]:
+        """Scan directory trees for hidden items in a single walk."""
         items = []
 
+        self.fs_index.reset_stats()
+        walker = DirectoryWalker(
+            max_depth=self.scan_depth,
+            max_entries=self.max_entries,
+            time_budget=self.time_budget,
+            max_workers=self.max_workers,
+            size_filter=self._is_hidden_or_system,
+            prune=self.whitelist.match_record,
+            cache=self.fs_index if self.incremental else None
+        )
+        store = walker.walk(base_paths)
+        if self.incremental:
+            self.fs_index.save(prune=not walker.truncated)
+        self.walk_stats = {
+            'entries': walker.entries_seen,
+            'truncated': walker.truncated,
+            'reused_listings': self.fs_index.hits if self.incremental else 0
+        }
+
+        # Only report if hidden; paths are built for reported entries only
+        hidden_mask = self.FILE_ATTRIBUTE_HIDDEN | self.FILE_ATTRIBUTE_SYSTEM
+        nodes = [node for node in store.iter_nodes(min_depth=1) if store.attributes[node] & hidden_mask]
+        found = sorted((store.get_path(node), node) for node in nodes)
+
+        for path, node in found:
+            items.append(self._make_directory_item(
+                path, store.get_name(node), store.attributes[node], store.get_size(node),
+                node in walker.pruned
+            ))
+
+        return items
+
+    def _make_directory_item(self, path: str, name: str, attrs: int, size: Optional[int],
+                             is_whitelisted: bool) -> Dict[str, Any]:
+        """Build the result item for a hidden or system directory."""
+        is_hidden = bool(attrs & self.FILE_ATTRIBUTE_HIDDEN)
+        is_system = bool(attrs & self.FILE_ATTRIBUTE_SYSTEM)
+        self._item_states[path] = (attrs, size or 0, 0)
+
+        if is_hidden and is_system:
+            item_type = 'Hidden+System Directory'
+            severity = 'Warning' if not is_whitelisted else 'OK'
+        elif is_hidden:
+            item_type = 'Hidden Directory'
+            severity = 'OK'
+        else:
+            item_type = 'System Directory'
+            severity = 'OK'
+
+        return {
+            'path': path,
+            'name': name,
+            'type': item_type,
+            'attributes': self._get_attributes_string(attrs),
+            'size': self._format_size(size),
+            'whitelisted': is_whitelisted,
+            'severity': severity,
+            'details': 'Known Windows directory' if is_whitelisted else 'Unknown hidden directory'
+        }
+
+    def _is_mft_candidate(self, entry: Dict[str, Any]) -> bool:
+        """Check whether an $MFT entry is a hidden directory or carries streams."""
+        if entry['is_dir'] and entry['attributes'] & (self.FILE_ATTRIBUTE_HIDDEN | self.FILE_ATTRIBUTE_SYSTEM):
+            return True
+        return any(self._is_reportable_stream(name, size) for name, size in entry['streams'])
+
+    def _is_reportable_stream(self, name: str, size: int) -> bool:
+        """Check a stream against the benign list and minimum size."""
+        return name.lower() not in StreamEnumerator.BENIGN_STREAMS and size >= self.ads_min_size
+
+    def _scan_mft(self, source: str) -> List[Dict[str, Any]]:
+        """Find hidden directories and streams across a whole volume from its $MFT."""
+        items = []
+        index = MftIndex(MftParser())
+        drive = source[4:6] if source.startswith('\\\\.\\') else self.mft_drive
+
         try:
-            with os.scandir(base_path) as it:
-                for entry in it:
-                    try:
-                        if not entry.is_dir(follow_symlinks=False):
-                            continue
-
-                        full_path = entry.path
-                        name = entry.name
-
-                        is_hidden = self._is_hidden(full_path)
-                        is_system = self._is_system(full_path)
-                        is_whitelisted = self._is_whitelisted(name)
-
-                        # Only report if hidden
-                        if is_hidden or is_system:
-                            if is_hidden and is_system:
-                                item_type = 'Hidden+System Directory'
-                                severity = 'Warning' if not is_whitelisted else 'OK'
-                            elif is_hidden:
-                                item_type = 'Hidden Directory'
-                                severity = 'OK'
-                            else:
-                                item_type = 'System Directory'
-                                severity = 'OK'
-
-                            items.append({
-                                'path': full_path,
-                                'name': name,
-                                'type': item_type,
-                                'attributes': self._get_attributes_string(full_path),
-                                'size': self._get_dir_size(full_path),
-                                'whitelisted': is_whitelisted,
-                                'severity': severity,
-                                'details': 'Known Windows directory' if is_whitelisted else 'Unknown hidden directory'
-                            })
-
-                        # Recursively scan if not too deep
-                        if depth > 0:
-                            items.extend(self._scan_directory(full_path, depth - 1))
-
-                    except (OSError, PermissionError):
-                        continue
-
-        except (OSError, PermissionError):
-            pass
+            entries = index.load(source, keep=self._is_mft_candidate)
+        except (OSError, ValueError):
+            return items
+
+        self.walk_stats = {
+            'entries': index.parser.records_read,
+            'truncated': False
+        }
+
+        whitelisted_trees: Dict[str, bool] = {}
+        for entry in entries:
+            if index.is_metafile(entry):
+                continue
+            path = index.get_entry_path(entry, drive)
+            attrs = entry['attributes']
+
+            if entry['is_dir'] and attrs & (self.FILE_ATTRIBUTE_HIDDEN | self.FILE_ATTRIBUTE_SYSTEM):
+                # Skip what a walk would never have descended into
+                if not self._in_whitelisted_tree(path, whitelisted_trees):
+                    items.append(self._make_directory_item(
+                        path, entry['name'] or '', attrs, index.get_size(entry['record']),
+                        self._is_whitelisted(path, entry['name'] or '', attrs)
+                    ))
+
+            for name, size in entry['streams']:
+                if self._is_reportable_stream(name, size):
+                    items.append(self._make_stream_item(path, name, size))
 
         return items
 
+    def _mark_changes(self, items: List[Dict[str, Any]]):
+        """Mark items that are new or changed since the last scan and add removed ones."""
+        # A walk stopped by its budget has not seen everything that still exists
+        self.changes = self.fs_index.compare_items(self._item_states,
+                                                   complete=not self.walk_stats.get('truncated', False))
+        if self.changes is None:
+            return
+
+        new = set(self.changes['new'])
+        changed = self.changes['changed']
+        for item in items:
+            if item['path'] in new:
+                item['change'] = 'New'
+                item['details'] = f"{item['details']}; New since last scan"
+            elif item['path'] in changed:
+                attrs, size, streams = changed[item['path']]
+                item['change'] = 'Changed'
+                if streams:
+                    was = f"{streams} streams, {size} bytes"
+                else:
+                    was = f"{self._get_attributes_string(attrs)}, {self._format_size(size)}"
+                item['details'] = f"{item['details']}; Changed since last scan (was {was})"
+
+        for path in self.changes['removed']:
+            items.append({
+                'path': path,
+                'name': os.path.basename(path),
+                'type': 'Removed Hidden Item',
+                'attributes': 'N/A',
+                'size': 'N/A',
+                'whitelisted': False,
+                'severity': 'OK',
+                'change': 'Removed',
+                'details': 'No longer present since last scan'
+            })
+
+    def _list_content_files(self, path: str) -> List[str]:
+        """List files under a flagged directory, up to MAX_CONTENT_FILES."""
+        files = []
+        for root, _, names in os.walk(path):
+            for name in names:
+                files.append(os.path.join(root, name))
+                if len(files) >= self.MAX_CONTENT_FILES:
+                    return files
+        return files
+
+    def _scan_flagged_contents(self, items: List[Dict[str, Any]]):
+        """Content-scan and inspect files inside unknown Hidden+System directories."""
+        flagged = [i for i in items if i['severity'] == 'Warning' and not i.get('whitelisted')
+                   and i.get('type') == 'Hidden+System Directory']
+        if not flagged:
+            return
+
+        files_by_dir = {item['path']: self._list_content_files(item['path']) for item in flagged}
+
+        signature_hits = {}
+        if self.scan_content:
+            self.signature_scanner.reset_stats()
+            all_files = [f for files in files_by_dir.values() for f in files]
+            signature_hits = self.signature_scanner.scan_files(all_files)
+            self.signature_stats = self.signature_scanner.get_stats()
+
+        if self.deep_inspection:
+            self.payload_inspector.reset_stats()
+
+        for item in flagged:
+            flags = []
+            for file_path in files_by_dir[item['path']]:
+                for match in signature_hits.get(file_path, []):
+                    flag = SignatureScanner.format_flag(match)
+                    if flag not in flags:
+                        flags.append(flag)
+
+            if self.deep_inspection:
+                results, truncated = self.payload_inspector.inspect_directory(files_by_dir[item['path']])
+                for result in results:
+                    flags.extend(result['flags'])
+                if truncated:
+                    item['details'] = f"{item['details']} (inspection byte budget reached)"
+
+            if flags:
+                item['details'] = f"{item['details']}; {'; '.join(flags)}"
+                # A PE header alone is common in installer and cache files
+                if any(f.lower().startswith(('signature match', 'packed executable', 'encrypted payload'))
+                       for f in flags):
+                    item['severity'] = 'Critical'
+
+        if self.deep_inspection:
+            self.inspection_stats = self.payload_inspector.get_stats()
+
     def scan(self) -> List[Dict[str, Any]]:
         """Scan for hidden directories and Alternate Data Streams."""
         self.items = []
+        self._item_states = {}
+        self.changes = None
 
         # Add user-specific paths
         user_home = os.path.expanduser('~')
@@ -220,10 +380,16 @@ class HiddenDirectoryAnalyzer:
         scan_paths.append(os.path.join(user_home, 'AppData', 'Local'))
         scan_paths.append(os.path.join(user_home, 'AppData', 'Roaming'))
 
-        # Scan for hidden directories
-        for base_path in scan_paths:
-            if os.path.exists(base_path):
-                self.items.extend(self._scan_directory(base_path, depth=1))
+        # Scan for hidden directories, from the whole-volume $MFT when configured
+        mft_items = self._scan_mft(self.mft_source) if self.mft_source else []
+        if mft_items:
+            self.items.extend(i for i in mft_items if i['type'] != 'Alternate Data Stream')
+        else:
+            self.items.extend(self._scan_directories([p for p in scan_paths if os.path.exists(p)]))
+
+        # Check contents of unknown Hidden+System directories
+        if self.scan_content or self.deep_inspection:
+            self._scan_flagged_contents(self.items)
 
         # Scan for ADS in key locations
         ads_scan_paths = [
@@ -234,9 +400,16 @@ class HiddenDirectoryAnalyzer:
             'C:\\ProgramData'
         ]
 
-        for ads_path in ads_scan_paths:
-            if os.path.exists(ads_path):
-                self.items.extend(self._scan_alternate_data_streams(ads_path))
+        if mft_items:
+            self.items.extend(i for i in mft_items if i['type'] == 'Alternate Data Stream')
+        else:
+            if self.ads_roots is not None:
+                ads_scan_paths = list(self.ads_roots)
+            self.items.extend(self._scan_alternate_data_streams([p for p in ads_scan_paths if os.path.exists(p)]))
+
+        # Compare with the previous scan
+        if self.incremental:
+            self._mark_changes(self.items)
 
         # Sort by severity and whitelisted status
         severity_order = {'Critical': 0, 'Warning': 1, 'OK': 2}
@@ -256,6 +429,13 @@ class HiddenDirectoryAnalyzer:
             'ads': 0,
             'whitelisted': 0,
             'suspicious': 0,
+            'signature_matches': 0,
+            'payload_flags': 0,
+            'scan_mb_per_sec': self.signature_stats.get('mb_per_sec', 0.0),
+            'walk_truncated': int(self.walk_stats.get('truncated', False)),
+            'new_items': 0,
+            'changed_items': 0,
+            'removed_items': 0,
             'Critical': 0,
             'Warning': 0,
             'OK': 0
@@ -265,6 +445,12 @@ class HiddenDirectoryAnalyzer:
             severity = item.get('severity', 'OK')
             summary[severity] = summary.get(severity, 0) + 1
 
+            change = item.get('change')
+            if change:
+                summary[f"{change.lower()}_items"] += 1
+            if change == 'Removed':
+                continue
+
             item_type = item.get('type', '')
             if 'Alternate Data Stream' in item_type:
                 summary['ads'] += 1
@@ -273,6 +459,12 @@ class HiddenDirectoryAnalyzer:
             else:
                 summary['hidden_dirs'] += 1
 
+            details = item.get('details', '').lower()
+            if 'signature match' in details or 'suspicious content' in details:
+                summary['signature_matches'] += 1
+            if any(f in details for f in ('packed executable', 'disguised executable', 'encrypted payload')):
+                summary['payload_flags'] += 1
+
             if item.get('whitelisted'):
                 summary['whitelisted'] += 1
             elif severity in ('Warning', 'Critical'):
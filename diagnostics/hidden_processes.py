@@ -1,9 +1,13 @@
 """Hidden process detection module."""
 
-import psutil
-import subprocess
 import os
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Optional
+
+from utils.command_stream import stream_csv, powershell
+from utils.mimicry import MimicryDetector
+from utils.process_index import ProcessIndex, ProcessKey
+from utils.process_rules import ProcessTreeRules
+from utils.signatures import SignatureScanner
 
 
 class HiddenProcessAnalyzer:
@@ -15,75 +19,62 @@ class HiddenProcessAnalyzer:
         'services.exe', 'lsass.exe', 'svchost.exe', 'memory compression'
     }
 
-    # Common process name typosquatting targets
-    MIMICRY_TARGETS = {
-        'svchost.exe': ['svch0st.exe', 'scvhost.exe', 'svchosts.exe', 'svchosl.exe'],
-        'csrss.exe': ['csrs.exe', 'cssrs.exe', 'csrss.com', 'csrs.com'],
-        'lsass.exe': ['lsas.exe', 'lsassa.exe', 'isass.exe', 'lsass.com'],
-        'services.exe': ['service.exe', 'servlces.exe'],
-        'explorer.exe': ['explor3r.exe', 'exp1orer.exe', 'explorer.com'],
-        'rundll32.exe': ['runddl32.exe', 'rundl132.exe', 'rundll.exe'],
-        'cmd.exe': ['crnd.exe', 'cmd.com'],
-        'powershell.exe': ['powershel.exe', 'powershell.com', 'p0wershell.exe']
-    }
-
     # Suspicious executable locations
     SUSPICIOUS_PATHS = [
         'temp', 'tmp', 'downloads', 'appdata\\local\\temp',
         'appdata\\roaming', '$recycle.bin', 'programdata'
     ]
 
-    def __init__(self):
+    def __init__(self, process_index: Optional[ProcessIndex] = None):
         self.items: List[Dict[str, Any]] = []
+        self.process_index = process_index or ProcessIndex()
+        self._static_flags: Dict[ProcessKey, List[str]] = {}
+        self.mimicry_detector = MimicryDetector()
+        self.tree_rules = ProcessTreeRules()
+        self.scan_content = True
+        self.signature_scanner = SignatureScanner()
+        self.signature_stats: Dict[str, Any] = {}
 
     def _get_psutil_processes(self) -> Dict[int, Dict]:
-        """Get processes using psutil."""
+        """Get processes using psutil, via the shared process index."""
+        self.process_index.refresh()
+        snapshot = self.process_index.snapshot()
+        # Other analyzers may have refreshed the index since the last scan,
+        # so prune against what is running rather than the latest removals
+        for key in set(self._static_flags) - set(snapshot):
+            self._static_flags.pop(key, None)
+
         processes = {}
-        for proc in psutil.process_iter(['pid', 'name', 'ppid', 'exe']):
-            try:
-                info = proc.info
-                processes[info['pid']] = {
-                    'pid': info['pid'],
-                    'name': info['name'] or 'Unknown',
-                    'ppid': info['ppid'] or 0,
-                    'path': info['exe'] or ''
-                }
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        for key, record in snapshot.items():
+            processes[record['pid']] = {
+                'pid': record['pid'],
+                'name': record['name'],
+                'ppid': record['ppid'],
+                'path': record['path'],
+                'key': key
+            }
         return processes
 
     def _get_wmi_processes(self) -> Dict[int, Dict]:
         """Get processes using WMI via PowerShell."""
         processes = {}
         try:
-            cmd = 'Get-CimInstance Win32_Process | Select-Object ProcessId,Name,ParentProcessId,ExecutablePath | ConvertTo-Csv -NoTypeInformation'
-            result = subprocess.run(
-                ['powershell', '-Command', cmd],
-                capture_output=True, text=True, timeout=30,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    for line in lines[1:]:  # Skip header
-                        try:
-                            # Parse CSV line
-                            parts = line.strip().strip('"').split('","')
-                            if len(parts) >= 3:
-                                pid = int(parts[0].strip('"'))
-                                name = parts[1].strip('"') if len(parts) > 1 else 'Unknown'
-                                ppid = int(parts[2].strip('"')) if len(parts) > 2 and parts[2].strip('"').isdigit() else 0
-                                path = parts[3].strip('"') if len(parts) > 3 else ''
-
-                                processes[pid] = {
-                                    'pid': pid,
-                                    'name': name,
-                                    'ppid': ppid,
-                                    'path': path
-                                }
-                        except (ValueError, IndexError):
-                            continue
+            rows = stream_csv(powershell(
+                'Get-CimInstance Win32_Process | '
+                'Select-Object ProcessId,Name,ParentProcessId,ExecutablePath | '
+                'ConvertTo-Csv -NoTypeInformation'
+            ), timeout=30, types={'ProcessId': int, 'ParentProcessId': int})
+
+            for row in rows:
+                pid = row.get('ProcessId')
+                if pid is None:
+                    continue
+                processes[pid] = {
+                    'pid': pid,
+                    'name': row.get('Name') or 'Unknown',
+                    'ppid': row.get('ParentProcessId') or 0,
+                    'path': row.get('ExecutablePath', '')
+                }
         except Exception:
             pass
         return processes
@@ -92,28 +83,21 @@ class HiddenProcessAnalyzer:
         """Get processes using tasklist command."""
         processes = {}
         try:
-            result = subprocess.run(
-                ['tasklist', '/FO', 'CSV', '/NH'],
-                capture_output=True, text=True, timeout=30,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    try:
-                        parts = line.strip().strip('"').split('","')
-                        if len(parts) >= 2:
-                            name = parts[0].strip('"')
-                            pid = int(parts[1].strip('"'))
-
-                            processes[pid] = {
-                                'pid': pid,
-                                'name': name,
-                                'ppid': 0,  # tasklist doesn't provide parent
-                                'path': ''  # tasklist doesn't provide path
-                            }
-                    except (ValueError, IndexError):
-                        continue
+            # No header row; column titles are localized anyway
+            rows = stream_csv(['tasklist', '/FO', 'CSV', '/NH'], timeout=30,
+                              fieldnames=['name', 'pid', 'session', 'session_id', 'memory'],
+                              types={'pid': int})
+
+            for row in rows:
+                pid = row['pid']
+                if pid is None:
+                    continue
+                processes[pid] = {
+                    'pid': pid,
+                    'name': row['name'],
+                    'ppid': 0,  # tasklist doesn't provide parent
+                    'path': ''  # tasklist doesn't provide path
+                }
         except Exception:
             pass
         return processes
@@ -121,13 +105,10 @@ class HiddenProcessAnalyzer:
     def _check_name_mimicry(self, name: str) -> List[str]:
         """Check if process name mimics a system process."""
         flags = []
-        name_lower = name.lower()
 
-        for target, mimics in self.MIMICRY_TARGETS.items():
-            for mimic in mimics:
-                if name_lower == mimic.lower():
-                    flags.append(f'Possible mimicry of {target}')
-                    break
+        target = self.mimicry_detector.check(name)
+        if target:
+            flags.append(f'Possible mimicry of {target}')
 
         return flags
 
@@ -157,11 +138,24 @@ class HiddenProcessAnalyzer:
         ppid = proc.get('ppid', 0)
 
         # PID 0 and 4 are system processes
-        if ppid not in (0, 4) and ppid not in all_pids:
+        if ppid in (0, 4):
+            return flags
+
+        # Indexed processes know their original parent, so a reused PID
+        # neither hides a real orphan nor creates a false one
+        key = proc.get('key')
+        if key is not None:
+            if not self.process_index.has_live_parent(key):
+                flags.append('Orphan process (parent not found)')
+        elif ppid not in all_pids:
             flags.append('Orphan process (parent not found)')
 
         return flags
 
+    def _check_signatures(self, path: str, signature_hits: Dict[str, List[Dict[str, str]]]) -> List[str]:
+        """Convert signature matches for an executable into flags."""
+        return [SignatureScanner.format_flag(match) for match in signature_hits.get(path, [])]
+
     def _get_severity(self, detection_method: str, flags: List[str]) -> str:
         """Determine severity based on detection method and flags."""
         if detection_method == 'Enumeration Discrepancy':
@@ -170,6 +164,18 @@ class HiddenProcessAnalyzer:
         if any('mimicry' in f.lower() for f in flags):
             return 'Critical'
 
+        if any('signature match' in f.lower() for f in flags):
+            return 'Critical'
+
+        if any('unexpected parent' in f.lower() for f in flags):
+            return 'Critical'
+
+        if any('suspicious ancestry' in f.lower() or 'unusual parent' in f.lower() for f in flags):
+            return 'Warning'
+
+        if any('suspicious content' in f.lower() for f in flags):
+            return 'Warning'
+
         if any('suspicious location' in f.lower() for f in flags):
             return 'Warning'
 
@@ -192,6 +198,19 @@ class HiddenProcessAnalyzer:
 
         all_pids = set(psutil_procs.keys()) | set(wmi_procs.keys()) | set(tasklist_procs.keys())
 
+        # Content-scan each distinct executable once; processes already
+        # checked in an earlier scan reuse their cached flags
+        signature_hits = {}
+        if self.scan_content:
+            self.signature_scanner.reset_stats()
+            exe_paths = [p['path'] for p in psutil_procs.values() if p['key'] not in self._static_flags]
+            exe_paths += [p['path'] for pid, p in wmi_procs.items() if pid not in psutil_procs]
+            signature_hits = self.signature_scanner.scan_files(exe_paths)
+            self.signature_stats = self.signature_scanner.get_stats()
+
+        # Check parent/ancestor rules in one pass over the process tree
+        tree_flags = self.tree_rules.evaluate(self.process_index)
+
         # Track which PIDs we've already reported
         reported_pids = set()
 
@@ -232,15 +251,25 @@ class HiddenProcessAnalyzer:
                     detection_method = 'Enumeration Discrepancy'
                     flags.append(f'Not visible to: {", ".join(sources_missing)}')
 
-            # Check for name mimicry
-            flags.extend(self._check_name_mimicry(proc['name']))
-
-            # Check for suspicious path
-            flags.extend(self._check_suspicious_path(proc['path']))
+            # Name, path and content checks only depend on the process identity
+            key = proc.get('key')
+            static_flags = self._static_flags.get(key) if key is not None else None
+            if static_flags is None:
+                static_flags = (
+                    self._check_name_mimicry(proc['name']) +
+                    self._check_suspicious_path(proc['path']) +
+                    self._check_signatures(proc['path'], signature_hits)
+                )
+                if key is not None:
+                    self._static_flags[key] = static_flags
+            flags.extend(static_flags)
 
             # Check for orphan process
             flags.extend(self._check_orphan_process(proc, all_pids))
 
+            # Check for parent-chain anomalies
+            flags.extend(tree_flags.get(key, []))
+
             # Check for missing executable path
             if not proc['path'] and proc['name'].lower() not in self.SYSTEM_ORPHAN_WHITELIST:
                 flags.append('Missing executable path')
@@ -277,6 +306,10 @@ class HiddenProcessAnalyzer:
             'mimicry': 0,
             'orphans': 0,
             'suspicious_path': 0,
+            'signature_matches': 0,
+            'tree_anomalies': 0,
+            'unexpected_parents': 0,
+            'scan_mb_per_sec': self.signature_stats.get('mb_per_sec', 0.0),
             'Critical': 0,
             'Warning': 0,
             'OK': 0
@@ -298,5 +331,11 @@ class HiddenProcessAnalyzer:
                     summary['orphans'] += 1
                 if 'suspicious location' in flag_lower:
                     summary['suspicious_path'] += 1
+                if 'signature match' in flag_lower or 'suspicious content' in flag_lower:
+                    summary['signature_matches'] += 1
+                if 'unexpected parent' in flag_lower:
+                    summary['unexpected_parents'] += 1
+                elif 'unusual parent' in flag_lower or 'suspicious ancestry' in flag_lower:
+                    summary['tree_anomalies'] += 1
 
         return summary
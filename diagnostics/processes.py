@@ -2,15 +2,18 @@
 
 import psutil
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from collections import defaultdict
 
+from utils.process_index import ProcessIndex
+
 
 class ProcessAnalyzer:
     """Analyzes running processes for resource usage."""
 
-    def __init__(self):
+    def __init__(self, process_index: Optional[ProcessIndex] = None):
         self.items: List[Dict[str, Any]] = []
+        self.process_index = process_index or ProcessIndex()
         self.sample_interval = 2.0  # seconds for CPU sampling
 
     def _get_severity(self, cpu_percent: float, memory_mb: float) -> str:
@@ -34,11 +37,13 @@ class ProcessAnalyzer:
         self.items = []
         process_data = {}
 
-        # First pass: collect initial CPU times
-        for proc in psutil.process_iter(['pid', 'name']):
+        # First pass: collect initial CPU times, keyed by (pid, create_time)
+        self.process_index.refresh()
+        for key, record in self.process_index.snapshot().items():
+            proc = record['process']
             try:
                 proc.cpu_percent()  # Initialize CPU measurement
-                process_data[proc.pid] = proc
+                process_data[key] = proc
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 pass
 
@@ -46,9 +51,12 @@ class ProcessAnalyzer:
         time.sleep(self.sample_interval)
 
         # Second pass: collect actual measurements
-        for pid, proc in process_data.items():
+        for (pid, create_time), proc in process_data.items():
             try:
                 with proc.oneshot():
+                    # Skip PIDs reused by a new process during the interval
+                    if create_time and proc.create_time() != create_time:
+                        continue
                     name = proc.name()
                     cpu_percent = proc.cpu_percent()
                     memory_info = proc.memory_info()
@@ -1,16 +1,61 @@
 """Scheduled tasks analysis module."""
 
+import re
+import struct
 import subprocess
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+import psutil
+
+from utils.command_resolver import CommandResolver
+from utils.command_stream import stream_csv_rows
+from utils.task_store import TaskStore
+from utils.trigger_timeline import TriggerTimeline
+
 
 class ScheduledTasksAnalyzer:
     """Analyzes scheduled tasks for potential issues."""
 
-    def __init__(self):
+    # Registry cache holding each task's run history
+    TASK_CACHE_KEY = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Schedule\TaskCache"
+
+    # FILETIME of 1970-01-01
+    EPOCH_AS_FILETIME = 116444736000000000
+
+    TRIGGER_DESCRIPTIONS = {
+        'LogonTrigger': 'At logon time',
+        'BootTrigger': 'At system startup',
+        'IdleTrigger': 'When idle',
+        'EventTrigger': 'On event',
+        'RegistrationTrigger': 'At task registration',
+        'SessionStateChangeTrigger': 'On session change',
+        'WnfStateChangeTrigger': 'On state change',
+        'TimeTrigger': 'One time',
+        'CalendarTrigger': 'On schedule'
+    }
+
+    SCHEDULE_DESCRIPTIONS = {
+        'ScheduleByDay': 'Daily',
+        'ScheduleByWeek': 'Weekly',
+        'ScheduleByMonth': 'Monthly',
+        'ScheduleByMonthDayOfWeek': 'Monthly'
+    }
+
+    # Forecast executions per hour from which a third-party task counts as frequent
+    FREQUENT_RUNS_PER_HOUR = 1.0
+
+    def __init__(self, resolver: Optional[CommandResolver] = None):
         self.items: List[Dict[str, Any]] = []
+        self.resolver = resolver or CommandResolver()
+        self.use_task_store = True
+        self.task_store = TaskStore()
+        self.max_schtasks_items = 100
+        self.forecast_hours = 24
+        self.contention_threshold = 3
+        self.timeline: Optional[TriggerTimeline] = None
+        self.contention: List[Dict[str, Any]] = []
 
     def _parse_datetime(self, dt_str: str) -> str:
         """Parse datetime string to readable format."""
@@ -28,8 +73,13 @@ class ScheduledTasksAnalyzer:
         except Exception:
             return dt_str
 
-    def _get_severity(self, trigger: str, state: str, is_microsoft: bool) -> str:
-        """Determine severity based on task characteristics."""
+    def _get_severity(self, trigger: str, state: str, is_microsoft: bool,
+                      runs_per_hour: Optional[float] = None) -> str:
+        """Determine severity based on task characteristics.
+
+        runs_per_hour comes from the trigger forecast; without it (the
+        schtasks fallback) frequency is guessed from the trigger text.
+        """
         trigger_lower = trigger.lower()
 
         # Disabled tasks are OK
@@ -40,99 +90,188 @@ class ScheduledTasksAnalyzer:
         if not is_microsoft:
             if any(t in trigger_lower for t in ['logon', 'startup', 'boot', 'system start']):
                 return 'Warning'
-            if any(t in trigger_lower for t in ['minute', 'hour']) and 'daily' not in trigger_lower:
+            if runs_per_hour is not None:
+                if runs_per_hour >= self.FREQUENT_RUNS_PER_HOUR:
+                    return 'Warning'  # Frequently running tasks
+            elif any(t in trigger_lower for t in ['minute', 'hour']) and 'daily' not in trigger_lower:
                 return 'Warning'  # Frequently running tasks
 
         return 'OK'
 
-    def scan(self) -> List[Dict[str, Any]]:
-        """Scan scheduled tasks."""
-        self.items = []
+    def _format_duration(self, duration: str) -> str:
+        """Turn an ISO 8601 duration such as PT1H30M into words."""
+        match = re.fullmatch(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?', duration or '')
+        if not match:
+            return duration
+        parts = []
+        for value, unit in zip(match.groups(), ['day', 'hour', 'minute', 'second']):
+            if value and int(value):
+                parts.append(f"{int(value)} {unit}{'s' if int(value) != 1 else ''}")
+        return ' '.join(parts) or duration
+
+    def _describe_trigger(self, trigger: Dict[str, Any]) -> str:
+        """Describe a task store trigger the way schtasks does, roughly."""
+        trigger_type = trigger.get('type', '')
+        text = self.TRIGGER_DESCRIPTIONS.get(trigger_type, trigger_type)
+
+        if trigger_type == 'CalendarTrigger':
+            text = self.SCHEDULE_DESCRIPTIONS.get(trigger.get('schedule', ''), text)
+            if trigger.get('DaysOfWeek'):
+                text += ' on ' + ', '.join(d[:3] for d in trigger['DaysOfWeek'])
+        if trigger_type in ('CalendarTrigger', 'TimeTrigger') and trigger.get('StartBoundary'):
+            start = trigger['StartBoundary']
+            text += f" at {start[11:16]}" if len(start) >= 16 else f" at {start}"
+        if trigger_type == 'LogonTrigger' and trigger.get('UserId'):
+            text += f" of {trigger['UserId']}"
+        if trigger.get('repetition_interval'):
+            text += f", repeat every {self._format_duration(trigger['repetition_interval'])}"
+        if not trigger.get('enabled', True):
+            text += ' (disabled)'
+        return text
+
+    def _get_last_run_times(self) -> Dict[str, str]:
+        """Read last run times from the Task Scheduler's registry cache."""
+        try:
+            import winreg
+        except ImportError:
+            return {}
+
+        times = {}
+
+        def visit(path: str):
+            try:
+                key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, f"{self.TASK_CACHE_KEY}\\Tree{path}")
+            except OSError:
+                return
+            with key:
+                try:
+                    task_id = winreg.QueryValueEx(key, 'Id')[0]
+                    with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE,
+                                        f"{self.TASK_CACHE_KEY}\\Tasks\\{task_id}") as task_key:
+                        info = winreg.QueryValueEx(task_key, 'DynamicInfo')[0]
+                    # DynamicInfo: version, creation time, last run time, ...
+                    last_run = struct.unpack_from('<Q', info, 12)[0]
+                    if last_run:
+                        seconds = (last_run - self.EPOCH_AS_FILETIME) / 10 ** 7
+                        times[path] = datetime.fromtimestamp(seconds).strftime('%Y-%m-%d %H:%M')
+                except (OSError, struct.error, ValueError, OverflowError):
+                    pass
+
+                index = 0
+                while True:
+                    try:
+                        child = winreg.EnumKey(key, index)
+                    except OSError:
+                        break
+                    visit(f"{path}\\{child}")
+                    index += 1
+
+        visit('')
+        return times
+
+    def _is_microsoft_author(self, author: str) -> bool:
+        """Check whether a task author is Microsoft.
 
+        Tasks that ship with Windows often name their author with an
+        indirect resource string from a system32 module instead.
+        """
+        author_lower = author.lower()
+        return 'microsoft' in author_lower or author_lower.startswith('$(@%systemroot%\\system32')
+
+    def _make_item(self, name: str, status: str, trigger: str, last_run: str,
+                   author: str, is_microsoft: bool, severity: str) -> Dict[str, Any]:
+        """Build the result item for a task."""
+        return {
+            'name': name.split('\\')[-1] if '\\' in name else name,
+            'full_path': name,
+            'status': status,
+            'trigger': trigger[:50] + '...' if len(trigger) > 50 else trigger,
+            'last_run': last_run,
+            'author': author[:30] if author else 'Unknown',
+            'type': 'Microsoft' if is_microsoft else 'Third-Party',
+            'severity': severity
+        }
+
+    def _scan_task_store(self) -> Optional[List[Dict[str, Any]]]:
+        """Build items from the task XML store, or None if it is unreadable."""
+        tasks = self.task_store.load()
+        if tasks is None:
+            return None
+
+        last_runs = self._get_last_run_times()
         try:
-            # Get scheduled tasks using schtasks
-            result = subprocess.run(
-                ['schtasks', '/query', '/fo', 'CSV', '/v'],
-                capture_output=True,
-                text=True,
-                timeout=60
+            boot_time = datetime.fromtimestamp(psutil.boot_time())
+        except (OSError, ValueError):
+            boot_time = None
+
+        # Every enabled task counts towards contention, shown or not
+        self.timeline = TriggerTimeline(
+            horizon_hours=self.forecast_hours,
+            contention_threshold=self.contention_threshold,
+            boot_time=boot_time
+        )
+        for task in tasks:
+            if task['enabled']:
+                self.timeline.add_task(task['name'], task['triggers'])
+        self.contention = self.timeline.get_contention_windows()
+
+        items = []
+        for task in tasks:
+            trigger = '; '.join(self._describe_trigger(t) for t in task['triggers'])
+            author = task['author']
+            is_microsoft = self._is_microsoft_author(author)
+
+            # Filter to show only startup/login tasks and non-MS tasks
+            trigger_lower = trigger.lower()
+            show_task = (
+                not is_microsoft or
+                any(t in trigger_lower for t in ['logon', 'startup', 'boot'])
             )
+            if not (show_task and trigger):
+                continue
 
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    # Parse header to find column indices
-                    header = self._parse_csv_line(lines[0])
-                    header = [h.strip('"') for h in header]
-
-                    # Find relevant column indices
-                    cols = {}
-                    for i, h in enumerate(header):
-                        h_lower = h.lower()
-                        if 'taskname' in h_lower:
-                            cols['name'] = i
-                        elif 'status' in h_lower and 'last' not in h_lower:
-                            cols['status'] = i
-                        elif 'triggers' in h_lower or 'trigger' in h_lower:
-                            cols['trigger'] = i
-                        elif 'last run' in h_lower:
-                            cols['last_run'] = i
-                        elif 'next run' in h_lower:
-                            cols['next_run'] = i
-                        elif 'author' in h_lower:
-                            cols['author'] = i
-                        elif 'task to run' in h_lower:
-                            cols['action'] = i
-
-                    # Parse data rows
-                    for line in lines[1:]:
-                        if not line.strip():
-                            continue
+            status = 'Ready' if task['enabled'] else 'Disabled'
+            runs_per_hour = self.timeline.get_runs_per_hour(task['name'])
+            next_run = self.timeline.get_next_run(task['name'])
+            item = self._make_item(
+                task['name'], status, trigger, last_runs.get(task['name'], 'Never'),
+                author, is_microsoft, self._get_severity(trigger, status, is_microsoft, runs_per_hour)
+            )
+            item['runs_per_day'] = round(runs_per_hour * 24, 1)
+            item['next_run'] = next_run.strftime('%Y-%m-%d %H:%M') if next_run else 'Not scheduled'
+            item['commands'] = [(self._action_command_line(a), a['working_directory'])
+                                 for a in task['actions'] if a['type'] == 'Exec']
+            items.append(item)
 
-                        parts = self._parse_csv_line(line)
-
-                        try:
-                            name = parts[cols.get('name', 0)].strip('"') if 'name' in cols else ''
-                            status = parts[cols.get('status', 1)].strip('"') if 'status' in cols else ''
-                            trigger = parts[cols.get('trigger', 2)].strip('"') if 'trigger' in cols else ''
-                            last_run = parts[cols.get('last_run', 3)].strip('"') if 'last_run' in cols else ''
-                            author = parts[cols.get('author', 4)].strip('"') if 'author' in cols else ''
-
-                            # Skip empty or system tasks
-                            if not name or name.startswith('\\'):
-                                continue
-
-                            # Check if Microsoft task
-                            is_microsoft = 'microsoft' in author.lower() if author else False
-
-                            # Filter to show only startup/login tasks and non-MS tasks
-                            trigger_lower = trigger.lower()
-                            show_task = (
-                                not is_microsoft or
-                                any(t in trigger_lower for t in ['logon', 'startup', 'boot'])
-                            )
-
-                            if show_task and trigger:
-                                severity = self._get_severity(trigger, status, is_microsoft)
-
-                                self.items.append({
-                                    'name': name.split('\\')[-1] if '\\' in name else name,
-                                    'full_path': name,
-                                    'status': status,
-                                    'trigger': trigger[:50] + '...' if len(trigger) > 50 else trigger,
-                                    'last_run': self._parse_datetime(last_run),
-                                    'author': author[:30] if author else 'Unknown',
-                                    'type': 'Microsoft' if is_microsoft else 'Third-Party',
-                                    'severity': severity
-                                })
-
-                        except (IndexError, KeyError):
-                            continue
+        self._check_action_targets(items)
+        return items
 
-        except subprocess.TimeoutExpired:
-            pass
-        except Exception as e:
-            print(f"Error scanning scheduled tasks: {e}")
+    @staticmethod
+    def _action_command_line(action: Dict[str, Any]) -> str:
+        """Rebuild the command line an Exec action runs."""
+        command = action['command'].strip().strip('"')
+        return f'"{command}" {action["arguments"]}'.strip() if command else ''
+
+    def _check_action_targets(self, items: List[Dict[str, Any]]):
+        """Flag enabled tasks whose program is missing; each run is a failed launch."""
+        resolved = self.resolver.resolve_all(c for item in items for c in item['commands'])
+        for item in items:
+            missing = [resolved[c]['missing'] or c[0] for c in item.pop('commands')
+                       if c in resolved and not resolved[c]['exists']]
+            item['target_missing'] = bool(missing)
+            item['missing_target'] = missing[0] if missing else ''
+            if missing and item['status'] != 'Disabled':
+                item['severity'] = 'Warning'
+
+    def scan(self) -> List[Dict[str, Any]]:
+        """Scan scheduled tasks, from the task store or through schtasks."""
+        self.items = []
+        self.timeline = None
+        self.contention = []
+
+        items = self._scan_task_store() if self.use_task_store else None
+        from_schtasks = items is None
+        self.items = self._scan_schtasks() if from_schtasks else items
 
         # Sort: third-party first, then by severity
         severity_order = {'Critical': 0, 'Warning': 1, 'OK': 2}
@@ -141,39 +280,92 @@ class ScheduledTasksAnalyzer:
             severity_order.get(x['severity'], 3)
         ))
 
-        # Limit to reasonable number
-        self.items = self.items[:100]
+        # Limit the slow schtasks fallback to a reasonable number
+        if from_schtasks:
+            self.items = self.items[:self.max_schtasks_items]
 
         return self.items
 
-    def _parse_csv_line(self, line: str) -> List[str]:
-        """Parse a CSV line handling quoted fields."""
-        parts = []
-        current = ""
-        in_quotes = False
+    def _scan_schtasks(self) -> List[Dict[str, Any]]:
+        """Scan scheduled tasks with schtasks."""
+        items = []
 
-        for char in line:
-            if char == '"':
-                in_quotes = not in_quotes
-                current += char
-            elif char == ',' and not in_quotes:
-                parts.append(current)
-                current = ""
-            else:
-                current += char
+        try:
+            # Get scheduled tasks using schtasks; rows are parsed as they arrive
+            rows = stream_csv_rows(['schtasks', '/query', '/fo', 'CSV', '/v'], timeout=60)
+            header = next(rows, None)
+            if header is not None:
+                # Find relevant column indices
+                cols = {}
+                for i, h in enumerate(header):
+                    h_lower = h.lower()
+                    if 'taskname' in h_lower:
+                        cols['name'] = i
+                    elif 'status' in h_lower and 'last' not in h_lower:
+                        cols['status'] = i
+                    elif 'triggers' in h_lower or 'trigger' in h_lower:
+                        cols['trigger'] = i
+                    elif 'last run' in h_lower:
+                        cols['last_run'] = i
+                    elif 'next run' in h_lower:
+                        cols['next_run'] = i
+                    elif 'author' in h_lower:
+                        cols['author'] = i
+                    elif 'task to run' in h_lower:
+                        cols['action'] = i
 
-        if current:
-            parts.append(current)
+                # Parse data rows; schtasks repeats the header for each folder
+                for parts in rows:
+                    if parts == header:
+                        continue
+
+                    try:
+                        name = parts[cols['name']] if 'name' in cols else ''
+                        status = parts[cols['status']] if 'status' in cols else ''
+                        trigger = parts[cols['trigger']] if 'trigger' in cols else ''
+                        last_run = parts[cols['last_run']] if 'last_run' in cols else ''
+                        author = parts[cols['author']] if 'author' in cols else ''
+
+                        # Skip empty or system tasks
+                        if not name or name.startswith('\\'):
+                            continue
+
+                        # Check if Microsoft task
+                        is_microsoft = 'microsoft' in author.lower() if author else False
+
+                        # Filter to show only startup/login tasks and non-MS tasks
+                        trigger_lower = trigger.lower()
+                        show_task = (
+                            not is_microsoft or
+                            any(t in trigger_lower for t in ['logon', 'startup', 'boot'])
+                        )
+
+                        if show_task and trigger:
+                            severity = self._get_severity(trigger, status, is_microsoft)
+
+                            items.append(self._make_item(
+                                name, status, trigger, self._parse_datetime(last_run),
+                                author, is_microsoft, severity
+                            ))
+
+                    except IndexError:
+                        continue
+
+        except subprocess.TimeoutExpired:
+            pass
+        except Exception as e:
+            print(f"Error scanning scheduled tasks: {e}")
 
-        return parts
+        return items
 
-    def get_summary(self) -> Dict[str, int]:
+    def get_summary(self) -> Dict[str, Any]:
         """Get summary of scheduled tasks."""
         summary = {
             'total': len(self.items),
             'third_party': 0,
             'startup_tasks': 0,
-            'warnings': 0
+            'warnings': 0,
+            'missing_targets': 0
         }
         for item in self.items:
             if item['type'] == 'Third-Party':
@@ -182,4 +374,8 @@ class ScheduledTasksAnalyzer:
                 summary['startup_tasks'] += 1
             if item['severity'] == 'Warning':
                 summary['warnings'] += 1
+            if item.get('target_missing'):
+                summary['missing_targets'] += 1
+        if self.timeline is not None:
+            summary.update(self.timeline.get_summary())
         return summary
@@ -1,7 +1,13 @@
 """Windows services analysis module."""
 
+import ntpath
 import subprocess
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+from utils.command_resolver import CommandResolver
+from utils.command_stream import stream_csv, powershell
+from utils.evtx import BootPerformanceCollector
 
 
 class ServicesAnalyzer:
@@ -22,8 +28,13 @@ class ServicesAnalyzer:
         'bits', 'base', 'audio', 'appx', 'appv', 'app', 'action', '.net'
     ]
 
-    def __init__(self):
+    SERVICES_KEY = r"SYSTEM\CurrentControlSet\Services"
+
+    def __init__(self, resolver: Optional[CommandResolver] = None,
+                 boot_performance: Optional[BootPerformanceCollector] = None):
         self.items: List[Dict[str, Any]] = []
+        self.resolver = resolver or CommandResolver()
+        self.boot_performance = boot_performance or BootPerformanceCollector()
 
     def _is_microsoft_service(self, name: str, display_name: str) -> bool:
         """Check if service appears to be a Microsoft service."""
@@ -46,47 +57,41 @@ class ServicesAnalyzer:
         self.items = []
 
         try:
-            # Use sc query to get service information
-            result = subprocess.run(
-                ['powershell', '-Command',
-                 'Get-Service | Where-Object {$_.StartType -eq "Automatic"} | '
-                 'Select-Object Name, DisplayName, Status, StartType | '
-                 'ConvertTo-Csv -NoTypeInformation'],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    # Skip header
-                    for line in lines[1:]:
-                        # Parse CSV line
-                        parts = self._parse_csv_line(line)
-                        if len(parts) >= 4:
-                            name = parts[0].strip('"')
-                            display_name = parts[1].strip('"')
-                            status = parts[2].strip('"')
-                            start_type = parts[3].strip('"')
-
-                            is_ms = self._is_microsoft_service(name, display_name)
-                            severity = self._get_severity(status, is_ms)
-
-                            self.items.append({
-                                'name': name,
-                                'display_name': display_name,
-                                'status': status,
-                                'start_type': start_type,
-                                'type': 'Microsoft' if is_ms else 'Third-Party',
-                                'severity': severity
-                            })
+            # Rows are handled as PowerShell writes them
+            rows = stream_csv(powershell(
+                'Get-Service | Where-Object {$_.StartType -eq "Automatic"} | '
+                'Select-Object Name, DisplayName, Status, StartType | '
+                'ConvertTo-Csv -NoTypeInformation'
+            ), timeout=30)
+
+            for row in rows:
+                name = row.get('Name', '')
+                display_name = row.get('DisplayName', '')
+                status = row.get('Status', '')
+                start_type = row.get('StartType', '')
+                if not name:
+                    continue
+
+                is_ms = self._is_microsoft_service(name, display_name)
+                severity = self._get_severity(status, is_ms)
+
+                self.items.append({
+                    'name': name,
+                    'display_name': display_name,
+                    'status': status,
+                    'start_type': start_type,
+                    'type': 'Microsoft' if is_ms else 'Third-Party',
+                    'severity': severity
+                })
 
         except subprocess.TimeoutExpired:
             pass
         except Exception as e:
             print(f"Error scanning services: {e}")
 
+        self._check_image_paths()
+        self._attach_boot_delays()
+
         # Sort: Third-party first, then by status
         self.items.sort(key=lambda x: (
             0 if x['type'] == 'Third-Party' else 1,
@@ -95,26 +100,83 @@ class ServicesAnalyzer:
 
         return self.items
 
-    def _parse_csv_line(self, line: str) -> List[str]:
-        """Parse a CSV line handling quoted fields."""
-        parts = []
-        current = ""
-        in_quotes = False
-
-        for char in line:
-            if char == '"':
-                in_quotes = not in_quotes
-                current += char
-            elif char == ',' and not in_quotes:
-                parts.append(current)
-                current = ""
-            else:
-                current += char
+    def _get_image_paths(self, names: List[str]) -> Dict[str, str]:
+        """Read each service's ImagePath from the registry."""
+        try:
+            import winreg
+        except ImportError:
+            return {}
+
+        paths = {}
+        for name in names:
+            try:
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, f"{self.SERVICES_KEY}\\{name}") as key:
+                    paths[name] = str(winreg.QueryValueEx(key, 'ImagePath')[0])
+            except OSError:
+                continue
+        return paths
+
+    def _get_service_dlls(self, names: List[str]) -> Dict[str, str]:
+        """Read the ServiceDll of services running inside a shared host."""
+        try:
+            import winreg
+        except ImportError:
+            return {}
+
+        dlls = {}
+        for name in names:
+            try:
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, f"{self.SERVICES_KEY}\\{name}\\Parameters") as key:
+                    dlls[name] = str(winreg.QueryValueEx(key, 'ServiceDll')[0])
+            except OSError:
+                continue
+        return dlls
+
+    def _check_image_paths(self):
+        """Flag auto-start services whose binary is missing; they fail at every boot."""
+        image_paths = self._get_image_paths([item['name'] for item in self.items])
+        resolved = self.resolver.resolve_all(image_paths.values())
+        for item in self.items:
+            image_path = image_paths.get(item['name'], '')
+            result = resolved.get(image_path)
+            item['image_path'] = image_path
+            item['target_missing'] = result is not None and not result['exists']
+            if item['target_missing']:
+                item['severity'] = 'Warning'
+
+    def _attach_boot_delays(self):
+        """Add the boot and shutdown delays Windows measured for each service."""
+        try:
+            self.boot_performance.get_results()
+        except Exception as e:
+            print(f"Error reading boot performance log: {e}")
+            for item in self.items:
+                item['boot_delay_ms'] = item['shutdown_delay_ms'] = None
+            return
 
-        if current:
-            parts.append(current)
+        executables = {}
+        for item in self.items:
+            if item['image_path']:
+                executable = self.resolver.resolve(item['image_path'])['executable'] or ''
+                executables[item['name']] = ntpath.basename(executable).lower()
+
+        # A delay logged under a shared host's image (svchost.exe) says nothing
+        # about which hosted service caused it, so those match by ServiceDll
+        counts = Counter(executables.values())
+        shared = [name for name, executable in executables.items()
+                  if executable == 'svchost.exe' or counts[executable] > 1]
+        for name in shared:
+            executables[name] = ''
+        for name, dll in self._get_service_dlls(shared).items():
+            executables[name] = ntpath.basename(self.resolver.expand(dll))
 
-        return parts
+        for item in self.items:
+            delay = self.boot_performance.get_delay('service', item['name'], item['display_name'],
+                                                    executables.get(item['name'], ''))
+            item['boot_delay_ms'] = delay['boot_delay_ms'] if delay else None
+            item['shutdown_delay_ms'] = delay['shutdown_delay_ms'] if delay else None
+            if delay and (delay['boot_delay_ms'] or delay['shutdown_delay_ms']):
+                item['severity'] = 'Warning'
 
     def get_third_party_count(self) -> int:
         """Get count of third-party services."""
@@ -127,7 +189,9 @@ class ServicesAnalyzer:
             'third_party': 0,
             'microsoft': 0,
             'running': 0,
-            'stopped': 0
+            'stopped': 0,
+            'missing_targets': 0,
+            'slow_boot': 0
         }
         for item in self.items:
             if item['type'] == 'Third-Party':
@@ -138,4 +202,8 @@ class ServicesAnalyzer:
                 summary['running'] += 1
             else:
                 summary['stopped'] += 1
+            if item.get('target_missing'):
+                summary['missing_targets'] += 1
+            if item.get('boot_delay_ms'):
+                summary['slow_boot'] += 1
         return summary
@@ -1,10 +1,19 @@
 """Startup program analysis module."""
 
 import os
+import ntpath
 import winreg
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from utils.command_resolver import CommandResolver
+from utils.regf import AutostartCollector
+from utils.registry_cache import RegistryCache, LiveRegistryKey
+from utils.shell_link import ShellLinkReader
+from utils.prefetch import PrefetchReader
+from utils.evtx import BootPerformanceCollector
+
 
 class StartupAnalyzer:
     """Analyzes startup programs from registry and startup folders."""
@@ -26,14 +35,46 @@ class StartupAnalyzer:
         'assistant', 'companion', 'manager'
     }
 
-    REGISTRY_LOCATIONS = [
-        (winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run"),
-        (winreg.HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\Run"),
-        (winreg.HKEY_LOCAL_MACHINE, r"Software\WOW6432Node\Microsoft\Windows\CurrentVersion\Run"),
+    # Live roots read through the registry cache: (hive, Software key, label)
+    REGISTRY_ROOTS = [
+        (winreg.HKEY_LOCAL_MACHINE, "SOFTWARE", "HKLM"),
+        (winreg.HKEY_CURRENT_USER, "Software", "HKCU"),
     ]
 
-    def __init__(self):
+    PROFILE_LIST_KEY = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\ProfileList"
+
+    # Loaded HKEY_USERS hives that are not interactive users
+    SERVICE_SIDS = {'.default', 's-1-5-18', 's-1-5-19', 's-1-5-20'}
+
+    # Measured launch cost, in MB read per launch, above which an item
+    # is rated High or Medium regardless of the name lists above
+    LAUNCH_COST_HIGH = 50.0
+    LAUNCH_COST_MEDIUM = 15.0
+
+    # Weight of each file opened at launch, in MB, so that programs
+    # loading many small DLLs rank above ones reading a few large files
+    FILE_OPEN_COST = 0.25
+
+    # Measured boot delay from which an item is rated High
+    BOOT_DELAY_HIGH_MS = 2000
+
+    STARTUP_FOLDER = os.path.join('Microsoft', 'Windows', 'Start Menu', 'Programs', 'Startup')
+
+    # Profile folders that are junctions to other profiles
+    PROFILE_LINKS = {'all users', 'default user'}
+
+    def __init__(self, resolver: Optional[CommandResolver] = None, offline_root: Optional[str] = None,
+                 boot_performance: Optional[BootPerformanceCollector] = None):
         self.items: List[Dict[str, Any]] = []
+        self.resolver = resolver or CommandResolver()
+        self.boot_performance = boot_performance or BootPerformanceCollector()
+        # Root of a mounted Windows image to scan through its hive files only
+        self.offline_root = offline_root
+        self.scan_user_hives = True
+        self.hive_collector = AutostartCollector()
+        self.registry_cache = RegistryCache()
+        self.link_reader = ShellLinkReader()
+        self.prefetch_reader = PrefetchReader()
 
     def _get_impact_rating(self, name: str, path: str) -> str:
         """Determine impact rating based on application name/path."""
@@ -52,62 +93,149 @@ class StartupAnalyzer:
 
         return "Low"
 
-    def _scan_registry_location(self, hkey, subkey: str, source: str) -> List[Dict[str, Any]]:
-        """Scan a single registry location for startup items."""
+    def _collect_entries(self, entries: List[Dict[str, Any]], source: str) -> List[Dict[str, Any]]:
+        """Turn autostart entries into startup items; services are left to the services analyzer."""
         items = []
+        for entry in entries:
+            if entry['location'] == 'Services':
+                continue
+            items.append({
+                'name': entry['name'],
+                'path': entry['command'],
+                'source': f"{source}\\{entry['location']}",
+                'impact': self._get_impact_rating(entry['name'], entry['command'])
+            })
+        return items
+
+    def _get_loaded_users(self, skip: str = '') -> List[tuple]:
+        """List (SID, profile name) of other users whose hives are loaded under HKEY_USERS."""
+        users = []
         try:
-            with winreg.OpenKey(hkey, subkey, 0, winreg.KEY_READ) as key:
+            with winreg.OpenKey(winreg.HKEY_USERS, "") as key:
+                sids = []
                 i = 0
                 while True:
                     try:
-                        name, value, _ = winreg.EnumValue(key, i)
-                        impact = self._get_impact_rating(name, value)
-                        items.append({
-                            'name': name,
-                            'path': value,
-                            'source': source,
-                            'impact': impact
-                        })
+                        sids.append(winreg.EnumKey(key, i))
                         i += 1
                     except OSError:
                         break
-        except FileNotFoundError:
-            pass
-        except PermissionError:
-            pass
+        except OSError:
+            return users
+
+        for sid in sids:
+            if sid.lower() in self.SERVICE_SIDS or sid.lower().endswith('_classes'):
+                continue
+            try:
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, f"{self.PROFILE_LIST_KEY}\\{sid}") as key:
+                    profile = os.path.expandvars(winreg.QueryValueEx(key, "ProfileImagePath")[0])
+            except OSError:
+                continue
+            if skip and os.path.normcase(profile) == os.path.normcase(skip):
+                continue
+            users.append((sid, os.path.basename(profile)))
+        return users
+
+    def _scan_live_registry(self, skip: str = '') -> List[Dict[str, Any]]:
+        """Read the autostart keys of the live registry through the last-write cache.
+
+        Covers HKLM, HKCU and the hives of other signed-in users, which
+        are locked on disk but loaded under HKEY_USERS.
+        """
+        roots = list(self.REGISTRY_ROOTS)
+        roots.extend((winreg.HKEY_USERS, f"{sid}\\Software", f"HKU\\{user}")
+                     for sid, user in self._get_loaded_users(skip))
+
+        self.registry_cache.reset_stats()
+        items = []
+        for hkey, path, label in roots:
+            root = LiveRegistryKey.open_root(hkey, path, label, self.registry_cache)
+            if root is not None:
+                items.extend(self._collect_entries(self.hive_collector.collect_software(root), label))
+        self.registry_cache.save()
         return items
 
     def _scan_startup_folder(self, folder_path: Path, source: str) -> List[Dict[str, Any]]:
-        """Scan a startup folder for shortcut files."""
+        """Scan a startup folder for shortcut files.
+
+        Shortcuts are rated by the program they launch rather than by
+        their own name.
+        """
         items = []
         try:
             if folder_path.exists():
                 for item in folder_path.iterdir():
                     if item.suffix.lower() in ['.lnk', '.exe', '.bat', '.cmd']:
-                        impact = self._get_impact_rating(item.stem, str(item))
-                        items.append({
+                        entry = {
                             'name': item.stem,
                             'path': str(item),
-                            'source': source,
-                            'impact': impact
-                        })
+                            'source': source
+                        }
+                        link = self.link_reader.read(str(item)) if item.suffix.lower() == '.lnk' else None
+                        if link and link['target']:
+                            entry['link_target'] = link['target']
+                            entry['arguments'] = link['arguments']
+                        entry['impact'] = self._get_impact_rating(
+                            item.stem, entry.get('link_target', str(item)) + ' ' + entry.get('arguments', ''))
+                        items.append(entry)
         except PermissionError:
             pass
         return items
 
+    def _scan_hive(self, path: str, source: str) -> List[Dict[str, Any]]:
+        """Read autostart entries from a hive file."""
+        return self._collect_entries(self.hive_collector.collect_file(path) or [], source)
+
+    def _get_profiles(self, users_dir: str) -> List[str]:
+        """List profile folders that have a user hive."""
+        try:
+            names = os.listdir(users_dir)
+        except OSError:
+            return []
+        return [os.path.join(users_dir, name) for name in sorted(names)
+                if name.lower() not in self.PROFILE_LINKS
+                and os.path.isfile(os.path.join(users_dir, name, 'NTUSER.DAT'))]
+
+    def _scan_user_hives(self, users_dir: str, skip: str = '') -> List[Dict[str, Any]]:
+        """Read the Run keys of other profiles from their NTUSER.DAT files.
+
+        Hives of users who are signed in are locked and skipped.
+        """
+        items = []
+        for profile in self._get_profiles(users_dir):
+            if skip and os.path.normcase(profile) == os.path.normcase(skip):
+                continue
+            user = os.path.basename(profile)
+            items.extend(self._scan_hive(os.path.join(profile, 'NTUSER.DAT'), f"HKU\\{user}"))
+        return items
+
+    def _scan_offline_image(self, root: str) -> List[Dict[str, Any]]:
+        """Scan a mounted Windows image through its hive files and startup folders."""
+        items = self._scan_hive(os.path.join(root, 'Windows', 'System32', 'config', 'SOFTWARE'), "HKLM")
+        users_dir = os.path.join(root, 'Users')
+        items.extend(self._scan_user_hives(users_dir))
+        for profile in self._get_profiles(users_dir):
+            folder = Path(profile) / 'AppData' / 'Roaming' / self.STARTUP_FOLDER
+            items.extend(self._scan_startup_folder(folder, f"Startup Folder ({os.path.basename(profile)})"))
+        items.extend(self._scan_startup_folder(Path(root) / 'ProgramData' / self.STARTUP_FOLDER,
+                                               "Common Startup Folder"))
+        return items
+
     def scan(self) -> List[Dict[str, Any]]:
         """Perform full startup scan."""
         self.items = []
 
-        # Scan registry locations
-        registry_sources = [
-            (winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run", "HKCU\\Run"),
-            (winreg.HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\Run", "HKLM\\Run"),
-            (winreg.HKEY_LOCAL_MACHINE, r"Software\WOW6432Node\Microsoft\Windows\CurrentVersion\Run", "HKLM\\Run (x86)"),
-        ]
+        if self.offline_root:
+            # Paths in the image do not refer to this system, so targets are not checked
+            self.items = self._scan_offline_image(self.offline_root)
+            impact_order = {'High': 0, 'Medium': 1, 'Low': 2}
+            self.items.sort(key=lambda x: impact_order.get(x['impact'], 3))
+            return self.items
+
+        user_profile = os.environ.get('USERPROFILE', '')
 
-        for hkey, subkey, source in registry_sources:
-            self.items.extend(self._scan_registry_location(hkey, subkey, source))
+        # Scan registry locations
+        self.items.extend(self._scan_live_registry(skip=user_profile))
 
         # Scan startup folders
         user_startup = Path(os.environ.get('APPDATA', '')) / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "Startup"
@@ -116,16 +244,136 @@ class StartupAnalyzer:
         self.items.extend(self._scan_startup_folder(user_startup, "User Startup Folder"))
         self.items.extend(self._scan_startup_folder(common_startup, "Common Startup Folder"))
 
+        # Other profiles on this machine, read offline from their hives
+        if self.scan_user_hives and user_profile:
+            self.items.extend(self._scan_user_hives(os.path.dirname(user_profile), skip=user_profile))
+
+        self._check_targets()
+        self._measure_launch_cost()
+        self._attach_boot_delays()
+
         # Sort by impact (High first)
         impact_order = {'High': 0, 'Medium': 1, 'Low': 2}
         self.items.sort(key=lambda x: impact_order.get(x['impact'], 3))
 
         return self.items
 
+    @staticmethod
+    def _get_command(item: Dict[str, Any]) -> Optional[str]:
+        """Get the command line an item launches, or None for plain startup folder files."""
+        if 'link_target' in item:
+            return f'"{item["link_target"]}" {item["arguments"]}'.strip()
+        if 'Folder' in item['source']:
+            return None
+        return item['path']
+
+    def _check_targets(self):
+        """Check that registry entries and shortcuts point at files that exist."""
+        commands = [self._get_command(item) for item in self.items]
+        resolved = self.resolver.resolve_all(command for command in commands if command)
+        for item, command in zip(self.items, commands):
+            result = resolved.get(command) if command else None
+            if result is None:
+                # Startup folder files are launched themselves
+                item['target'] = item['path']
+                item['target_missing'] = False
+                continue
+            item['target'] = result['target'] or result['executable'] or result['missing'] or ''
+            item['target_missing'] = not result['exists']
+
+    def _find_prefetch(self, records: Dict[str, List[Dict[str, Any]]], executable: str) -> Optional[Dict[str, Any]]:
+        """Pick the prefetch record of an executable, matching its full path when possible."""
+        candidates = records.get(PrefetchReader.get_key(ntpath.basename(executable)), [])
+        # Prefetch paths start with a volume device instead of a drive letter
+        suffix = ntpath.splitdrive(executable)[1].upper()
+        matching = [r for r in candidates if any(f.upper().endswith(suffix) for f in r['files'])]
+        if not matching and len(candidates) == 1:
+            matching = candidates
+        return max(matching, key=lambda r: r['last_runs'][0] if r['last_runs'] else datetime.min, default=None)
+
+    def _get_executable(self, item: Dict[str, Any]) -> str:
+        """Get the program an item starts, through the resolver's stat cache."""
+        command = self._get_command(item)
+        if not command:
+            return item['path']
+        return self.resolver.resolve(command)['executable'] or ''
+
+    def _measure_launch_cost(self):
+        """Rate items by what their launches cost, from the Prefetch folder.
+
+        The cost is the data read plus a weight per file opened during
+        launch, in MB; an item launched several times a day is rated on
+        its daily total. Items without a prefetch record (or when the
+        folder is not readable without admin rights) keep the rating
+        guessed from their name.
+        """
+        executables = {}
+        for item in self.items:
+            item['launch_cost'] = None
+            item['runs_per_day'] = None
+            executable = self._get_executable(item)
+            if executable.lower().endswith('.exe'):
+                executables[id(item)] = executable
+        if not executables:
+            return
+
+        # Only the startup programs' own prefetch files are read
+        windir = os.environ.get('SystemRoot') or os.environ.get('WINDIR') or 'C:\\Windows'
+        records = self.prefetch_reader.read_directory(
+            os.path.join(windir, 'Prefetch'), (ntpath.basename(e) for e in executables.values()))
+        for item in self.items:
+            executable = executables.get(id(item))
+            if not records or executable is None:
+                continue
+            record = self._find_prefetch(records, executable)
+            if record is None:
+                continue
+
+            cost = round(record['bytes_loaded'] / (1024 * 1024) + len(record['files']) * self.FILE_OPEN_COST, 1)
+            runs_per_day = self.prefetch_reader.get_runs_per_day(record)
+            item['launch_cost'] = cost
+            item['runs_per_day'] = runs_per_day
+            daily_cost = cost * max(1.0, runs_per_day)
+            if daily_cost >= self.LAUNCH_COST_HIGH:
+                item['impact'] = "High"
+            elif daily_cost >= self.LAUNCH_COST_MEDIUM:
+                item['impact'] = "Medium"
+            else:
+                item['impact'] = "Low"
+
+    def _attach_boot_delays(self):
+        """Add the boot and shutdown delays Windows measured for each item's program.
+
+        Programs the Diagnostics-Performance log names as slowing boot
+        are rated at least Medium, and High from BOOT_DELAY_HIGH_MS.
+        """
+        try:
+            self.boot_performance.get_results()
+        except Exception as e:
+            print(f"Error reading boot performance log: {e}")
+            for item in self.items:
+                item['boot_delay_ms'] = item['shutdown_delay_ms'] = None
+            return
+        for item in self.items:
+            executable = self._get_executable(item)
+            delay = self.boot_performance.get_delay('application', ntpath.basename(executable), item['name'])
+            item['boot_delay_ms'] = delay['boot_delay_ms'] if delay else None
+            item['shutdown_delay_ms'] = delay['shutdown_delay_ms'] if delay else None
+            if not delay or not delay['boot_delay_ms']:
+                continue
+            if delay['boot_delay_ms'] >= self.BOOT_DELAY_HIGH_MS:
+                item['impact'] = "High"
+            elif item['impact'] == "Low":
+                item['impact'] = "Medium"
+
     def get_summary(self) -> Dict[str, int]:
         """Get summary counts by impact level."""
-        summary = {'High': 0, 'Medium': 0, 'Low': 0}
+        summary = {'High': 0, 'Medium': 0, 'Low': 0, 'missing_targets': 0, 'slow_boot': 0}
         for item in self.items:
             impact = item.get('impact', 'Low')
             summary[impact] = summary.get(impact, 0) + 1
+            if item.get('target_missing'):
+                summary['missing_targets'] += 1
+            if item.get('boot_delay_ms'):
+                summary['slow_boot'] += 1
         return summary
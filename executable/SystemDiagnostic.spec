@@ -46,6 +46,30 @@ a = Analysis(
         'utils',
         'utils.admin',
         'utils.report',
+        'utils.paths',
+        'utils.mimicry',
+        'utils.process_index',
+        'utils.process_rules',
+        'utils.dir_walker',
+        'utils.streams',
+        'utils.signatures',
+        'utils.mft',
+        'utils.fs_index',
+        'utils.path_store',
+        'utils.whitelist',
+        'utils.entropy',
+        'utils.task_store',
+        'utils.command_stream',
+        'utils.trigger_timeline',
+        'utils.command_resolver',
+        'utils.regf',
+        'utils.registry_cache',
+        'utils.shell_link',
+        'utils.prefetch',
+        'utils.evtx',
+        'utils.log_miner',
+        'utils.driver_inventory',
+        'utils.driver_catalog',
     ],
     hookspath=[],
     hooksconfig={},
@@ -11,6 +11,9 @@ from ui.results_panel import ResultsPanel
 from ui.widgets import ActionButton, ProgressCard, Colors
 from utils.admin import is_admin, get_admin_status_text
 from utils.report import ReportGenerator
+from utils.process_index import ProcessIndex
+from utils.command_resolver import CommandResolver
+from utils.evtx import BootPerformanceCollector
 from diagnostics import (
     StartupAnalyzer,
     ServicesAnalyzer,
@@ -38,14 +41,25 @@ class MainWindow(ctk.CTk):
         ctk.set_appearance_mode("dark")
         self.configure(fg_color=Colors.BG_DARK)
 
+        # Process identity index shared by the process-based analyzers
+        self.process_index = ProcessIndex()
+
+        # Command line resolver whose stat cache the startup, service and
+        # task analyzers share
+        self.command_resolver = CommandResolver()
+
+        # Boot delays measured by Windows, exported once per scan for the
+        # startup and service analyzers
+        self.boot_performance = BootPerformanceCollector()
+
         # Initialize analyzers
-        self.startup_analyzer = StartupAnalyzer()
-        self.services_analyzer = ServicesAnalyzer()
-        self.process_analyzer = ProcessAnalyzer()
+        self.startup_analyzer = StartupAnalyzer(self.command_resolver, boot_performance=self.boot_performance)
+        self.services_analyzer = ServicesAnalyzer(self.command_resolver, self.boot_performance)
+        self.process_analyzer = ProcessAnalyzer(self.process_index)
         self.disk_analyzer = DiskAnalyzer()
         self.driver_analyzer = DriverAnalyzer()
-        self.scheduled_analyzer = ScheduledTasksAnalyzer()
-        self.hidden_process_analyzer = HiddenProcessAnalyzer()
+        self.scheduled_analyzer = ScheduledTasksAnalyzer(self.command_resolver)
+        self.hidden_process_analyzer = HiddenProcessAnalyzer(self.process_index)
         self.hidden_directory_analyzer = HiddenDirectoryAnalyzer()
 
         # Report generator
@@ -303,6 +317,8 @@ class MainWindow(ctk.CTk):
     def _perform_full_scan(self):
         """Perform full scan in background thread."""
         try:
+            self.command_resolver.clear()
+            self.boot_performance.clear()
             steps = [
                 ("Analyzing startup programs...", self._scan_startup, 0.08),
                 ("Scanning Windows services...", self._scan_services, 0.18),
@@ -327,6 +343,8 @@ class MainWindow(ctk.CTk):
     def _perform_quick_scan(self):
         """Perform quick scan in background thread."""
         try:
+            self.command_resolver.clear()
+            self.boot_performance.clear()
             steps = [
                 ("Analyzing startup programs...", self._scan_startup, 0.3),
                 ("Monitoring process resources...", self._scan_processes, 0.7),
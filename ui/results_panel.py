@@ -305,7 +305,7 @@ class ResultsPanel(ctk.CTkFrame):
         if 'startup' in summaries:
             s = summaries['startup']
             high_count = s.get('High', 0)
-            total = sum(s.values())
+            total = high_count + s.get('Medium', 0) + s.get('Low', 0)
             status = 'warning' if high_count > 3 else 'ok' if high_count == 0 else 'info'
             self.summary_cards['startup'].update_value(str(total), status)
 
@@ -379,6 +379,17 @@ class ResultsPanel(ctk.CTkFrame):
             elif high_impact > 2:
                 recommendations.append(('warning', f"You have {high_impact} high-impact startup programs that may slow boot time."))
 
+        # Check for entries whose program no longer exists
+        missing = sum(summaries[k].get('missing_targets', 0)
+                      for k in ('startup', 'services', 'scheduled') if k in summaries)
+        if missing > 0:
+            recommendations.append(('warning', f"{missing} startup entr(ies), service(s) or scheduled task(s) point to programs that no longer exist. Each fails to launch at boot or on schedule; remove them or reinstall the software."))
+
+        # Check programs Windows measured slowing boot
+        slow = sum(summaries[k].get('slow_boot', 0) for k in ('startup', 'services') if k in summaries)
+        if slow > 0:
+            recommendations.append(('warning', f"Windows recorded {slow} startup program(s) or service(s) delaying recent boots. The Boot Delay Ms column shows the measured delay; disable or delay those you don't need at boot."))
+
         # Check services
         if 'services' in summaries:
             third_party = summaries['services'].get('third_party', 0)
@@ -403,12 +414,27 @@ class ResultsPanel(ctk.CTkFrame):
             critical_drivers = summaries['drivers'].get('critical', 0)
             if critical_drivers > 0:
                 recommendations.append(('critical', f"{critical_drivers} driver(s) have errors. Update or reinstall affected drivers from Device Manager."))
+            failed_installs = summaries['drivers'].get('failed_installs', 0)
+            if failed_installs > 0:
+                recommendations.append(('warning', f"The latest driver install failed for {failed_installs} device(s). Download the driver from the hardware vendor and reinstall it from Device Manager."))
+            outdated = summaries['drivers'].get('outdated', 0)
+            if outdated > 0:
+                recommendations.append(('warning', f"{outdated} driver(s) are older than the minimum versions in the local driver catalog. Install the current driver from the hardware vendor."))
+            update_errors = summaries['drivers'].get('update_errors', 0)
+            if update_errors > 0:
+                recommendations.append(('info', f"Windows servicing logged errors for {update_errors} update(s) or component(s) in CBS.log. Run 'DISM /Online /Cleanup-Image /RestoreHealth' if updates keep failing."))
 
         # Check scheduled tasks
         if 'scheduled' in summaries:
             warnings = summaries['scheduled'].get('warnings', 0)
             if warnings > 0:
                 recommendations.append(('info', f"{warnings} scheduled task(s) run at startup which may affect boot performance."))
+            windows = summaries['scheduled'].get('contention_windows', 0)
+            if windows > 0:
+                peak = summaries['scheduled'].get('peak_concurrent_tasks', 0)
+                minute = summaries['scheduled'].get('busiest_minute', -1)
+                when = f" (most often at :{minute:02d} past the hour)" if minute >= 0 else ''
+                recommendations.append(('warning', f"Up to {peak} scheduled tasks start in the same minute at {windows} point(s) over the next day{when}. This can cause periodic stalls; stagger or disable unneeded tasks."))
 
         # Check hidden processes
         if 'hidden_processes' in summaries:
@@ -420,7 +446,16 @@ class ResultsPanel(ctk.CTkFrame):
                 recommendations.append(('critical', f"{mimicry} process(es) detected with names mimicking system processes. This may indicate malware."))
             if discrepancies > 0:
                 recommendations.append(('critical', f"{discrepancies} process(es) found hiding from standard enumeration APIs. Investigate immediately."))
-            if critical > 0 and mimicry == 0 and discrepancies == 0:
+            signatures = s.get('signature_matches', 0)
+            if signatures > 0:
+                recommendations.append(('critical', f"{signatures} running executable(s) matched malware signature rules. Check the Hidden Proc tab for details."))
+            unexpected_parents = s.get('unexpected_parents', 0)
+            if unexpected_parents > 0:
+                recommendations.append(('critical', f"{unexpected_parents} system process(es) were started by the wrong parent (e.g. lsass.exe not started by wininit.exe). This may indicate process injection or masquerading."))
+            tree_anomalies = s.get('tree_anomalies', 0)
+            if tree_anomalies > 0:
+                recommendations.append(('warning', f"{tree_anomalies} process(es) have an unusual parent or ancestry (e.g. an Office app launching PowerShell). Check the Hidden Proc tab for details."))
+            if critical > 0 and mimicry == 0 and discrepancies == 0 and signatures == 0 and unexpected_parents == 0:
                 recommendations.append(('warning', f"{critical} suspicious process(es) detected. Check the Hidden Proc tab for details."))
 
         # Check hidden files
@@ -432,6 +467,12 @@ class ResultsPanel(ctk.CTkFrame):
                 recommendations.append(('warning', f"{ads} Alternate Data Stream(s) found. These can be used to hide malicious content."))
             if suspicious > 0:
                 recommendations.append(('warning', f"{suspicious} suspicious hidden director(ies) found outside known system locations."))
+            if s.get('signature_matches', 0) > 0:
+                recommendations.append(('critical', f"{s['signature_matches']} hidden director(ies) contain files matching malware signature rules."))
+            if s.get('payload_flags', 0) > 0:
+                recommendations.append(('critical', f"{s['payload_flags']} hidden director(ies) contain packed, disguised or encrypted executables. Check the Hidden Files tab for details."))
+            if s.get('new_items', 0) > 0:
+                recommendations.append(('warning', f"{s['new_items']} hidden item(s) appeared since the last scan. Check the Hidden Files tab for details."))
 
         # Add recommendations or show "all good" message
         if not recommendations:
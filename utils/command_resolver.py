@@ -0,0 +1,282 @@
+"""Resolution of free-form command lines to the files they launch."""
+
+import os
+import re
+import stat
+import ntpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Union
+
+
+class CommandResolver:
+    """Finds the executable (and script or DLL) a command line launches.
+
+    Command lines from Run keys, service ImagePath values and task actions
+    are split the way Windows does, environment variables are expanded,
+    bare names are searched on the system path, and unquoted paths with
+    spaces are tried prefix by prefix as CreateProcess does. For host
+    programs such as rundll32, regsvr32, script hosts, PowerShell -File
+    and cmd /c, the hosted file is resolved too, relative to the working
+    directory the command runs in when one is known. Existence checks go
+    through a stat cache shared by every analyzer holding the resolver,
+    and resolve_all stats all candidate paths of a batch in parallel.
+    """
+
+    EXECUTABLE_EXTENSIONS = ['.exe', '.com', '.bat', '.cmd']
+
+    # Unquoted paths rarely have more spaces than this; longer word runs
+    # are still tried, just not statted ahead of time
+    PREFETCH_WORDS = 4
+
+    # Host executable -> how its first hosted file is found
+    HOSTS = {
+        'rundll32.exe': 'dll',
+        'regsvr32.exe': 'switches',
+        'wscript.exe': 'switches',
+        'cscript.exe': 'switches',
+        'mshta.exe': 'switches',
+        'powershell.exe': 'file',
+        'pwsh.exe': 'file',
+        'cmd.exe': 'command',
+        'java.exe': 'jar',
+        'javaw.exe': 'jar',
+    }
+
+    SCRIPT_EXTENSIONS = {
+        '.dll', '.ocx', '.cpl', '.vbs', '.vbe', '.js', '.jse', '.wsf', '.wsh',
+        '.hta', '.ps1', '.bat', '.cmd', '.exe', '.com', '.jar', '.py', '.pyw'
+    }
+
+    _ENV_VAR = re.compile(r'%([^%]+)%')
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._stats: Dict[str, Optional[os.stat_result]] = {}
+        windir = os.environ.get('SystemRoot') or os.environ.get('WINDIR') or 'C:\\Windows'
+        self.windir = windir
+        self.search_dirs = [ntpath.join(windir, 'System32'), windir,
+                            ntpath.join(windir, 'System32', 'Wbem')]
+        for entry in os.environ.get('PATH', '').split(os.pathsep):
+            if entry and entry not in self.search_dirs:
+                self.search_dirs.append(entry)
+
+    def clear(self):
+        """Forget cached stats, e.g. before a new scan."""
+        self._stats.clear()
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        """Stat a path through the shared cache, or None if it does not exist."""
+        key = ntpath.normcase(path)
+        if key not in self._stats:
+            try:
+                self._stats[key] = os.stat(path)
+            except (OSError, ValueError):
+                self._stats[key] = None
+        return self._stats[key]
+
+    def _is_file(self, path: str) -> bool:
+        """Check that a path exists and is not a directory."""
+        st = self.stat(path)
+        return st is not None and not stat.S_ISDIR(st.st_mode)
+
+    def prefetch(self, paths: Iterable[str]):
+        """Stat every uncached path in parallel."""
+        todo = {ntpath.normcase(p): p for p in paths if ntpath.normcase(p) not in self._stats}
+        if not todo:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(self.stat, todo.values()))
+
+    def expand(self, text: str) -> str:
+        """Expand %VARIABLE% references, case-insensitively; unknown ones are kept."""
+        environ = {k.upper(): v for k, v in os.environ.items()}
+        text = self._ENV_VAR.sub(lambda m: environ.get(m.group(1).upper(), m.group(0)), text)
+        # Kernel-style prefixes found in service image paths
+        if text.lower().startswith('\\systemroot\\'):
+            text = self.windir + text[len('\\SystemRoot'):]
+        elif text.startswith('\\??\\'):
+            text = text[4:]
+        elif text.lower().startswith('system32\\'):
+            text = ntpath.join(self.windir, text)
+        return text
+
+    @staticmethod
+    def split(command_line: str) -> List[str]:
+        """Split a command line into arguments using the Windows quoting rules."""
+        args = []
+        current = []
+        in_quotes = False
+        has_arg = False
+        i = 0
+        while i < len(command_line):
+            char = command_line[i]
+            if char == '\\':
+                # Backslashes are literal unless they precede a quote
+                count = 0
+                while i < len(command_line) and command_line[i] == '\\':
+                    count += 1
+                    i += 1
+                if i < len(command_line) and command_line[i] == '"':
+                    current.append('\\' * (count // 2))
+                    if count % 2:
+                        current.append('"')
+                        i += 1
+                else:
+                    current.append('\\' * count)
+                has_arg = True
+                continue
+            if char == '"':
+                in_quotes = not in_quotes
+                has_arg = True
+            elif char in ' \t' and not in_quotes:
+                if has_arg:
+                    args.append(''.join(current))
+                    current = []
+                    has_arg = False
+            else:
+                current.append(char)
+                has_arg = True
+            i += 1
+        if has_arg:
+            args.append(''.join(current))
+        return args
+
+    def _candidates(self, name: str, working_dir: Optional[str] = None) -> List[str]:
+        """Get the paths a program name may refer to, in search order.
+
+        Relative paths are taken from working_dir, and bare names are
+        looked for there before the system path.
+        """
+        extensions = [''] if ntpath.splitext(name)[1] else self.EXECUTABLE_EXTENSIONS
+        if ntpath.isabs(name) or (ntpath.dirname(name) and not working_dir):
+            return [name + ext for ext in extensions]
+        if ntpath.dirname(name):
+            return [ntpath.join(working_dir, name + ext) for ext in extensions]
+        dirs = [working_dir] + self.search_dirs if working_dir else self.search_dirs
+        return [ntpath.join(d, name + ext) for d in dirs for ext in extensions]
+
+    def _executable_candidates(self, command_line: str) -> List[Tuple[List[str], int]]:
+        """Get candidate executables and how many words each one consumes.
+
+        A quoted first argument is taken as is. An unquoted one may be a
+        path with spaces, so each longer run of words is a candidate too.
+        """
+        stripped = command_line.lstrip()
+        if stripped.startswith('"'):
+            args = self.split(stripped)
+            return [(self._candidates(args[0]), 1)] if args else []
+        words = stripped.split()
+        return [(self._candidates(' '.join(words[:n])), n) for n in range(1, len(words) + 1)]
+
+    def _hosted_target(self, host: str, args: List[str]) -> Optional[str]:
+        """Find the file a host program runs, if the arguments name one."""
+        kind = self.HOSTS.get(host)
+        target = None
+        if kind == 'dll' and args:
+            target = args[0].split(',')[0]
+        elif kind == 'switches':
+            target = next((a for a in args if not a.startswith(('/', '-'))), None)
+        elif kind == 'file':
+            for i, arg in enumerate(args[:-1]):
+                if arg.lower() in ('-file', '-f'):
+                    target = args[i + 1]
+                    break
+        elif kind == 'command':
+            for i, arg in enumerate(args[:-1]):
+                if arg.lower() in ('/c', '/k'):
+                    target = args[i + 1]
+                    break
+        elif kind == 'jar':
+            for i, arg in enumerate(args[:-1]):
+                if arg == '-jar':
+                    target = args[i + 1]
+                    break
+
+        if not target or '://' in target:
+            return None
+        target = self.expand(target.strip('"'))
+        # Only check arguments that look like files, not inline commands
+        if not (ntpath.dirname(target) or ntpath.splitext(target)[1].lower() in self.SCRIPT_EXTENSIONS):
+            return None
+        return target
+
+    def _plan(self, command_line: str, working_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Work out candidate paths for a command line without touching disk."""
+        expanded = self.expand(command_line.strip())
+        return {'command': command_line, 'expanded': expanded,
+                'working_dir': self.expand(working_dir) if working_dir else None,
+                'executables': self._executable_candidates(expanded)}
+
+    def _finish(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Pick the existing candidates of a plan and describe the result."""
+        result = {
+            'command': plan['command'],
+            'executable': None,
+            'target': None,
+            'exists': False,
+            'size': None,
+            'modified': None,
+            'missing': None
+        }
+        expanded = plan['expanded']
+        if not expanded:
+            return result
+
+        words = expanded.lstrip().split()
+        first_guess = None
+        consumed = 1
+        for candidates, count in plan['executables']:
+            if first_guess is None and candidates:
+                first_guess = candidates[0]
+            found = next((c for c in candidates if self._is_file(c)), None)
+            if found:
+                result['executable'] = found
+                consumed = count
+                break
+
+        if result['executable'] is None:
+            result['missing'] = first_guess
+            return result
+
+        if expanded.lstrip().startswith('"'):
+            args = self.split(expanded)[1:]
+        else:
+            args = self.split(' '.join(words[consumed:]))
+        target = self._hosted_target(ntpath.basename(result['executable']).lower(), args)
+        if target:
+            result['target'] = next((c for c in self._candidates(target, plan['working_dir'])
+                                     if self._is_file(c)), None)
+            if result['target'] is None:
+                result['missing'] = target
+                return result
+
+        st = self.stat(result['target'] or result['executable'])
+        result['exists'] = True
+        result['size'] = st.st_size
+        result['modified'] = st.st_mtime
+        return result
+
+    def resolve(self, command_line: str, working_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Resolve one command line, run from working_dir if given.
+
+        Returns the executable and hosted target found, whether everything
+        exists, the size and mtime of the launched file, and the first
+        missing path otherwise.
+        """
+        return self._finish(self._plan(command_line, working_dir))
+
+    def resolve_all(self, command_lines: Iterable[Union[str, Tuple[str, str]]]) -> Dict[Any, Dict[str, Any]]:
+        """Resolve many command lines, statting their candidate paths in bulk.
+
+        Each entry is a command line or a (command line, working directory)
+        pair, and results are keyed by the entry as given.
+        """
+        plans = {}
+        for entry in set(command_lines):
+            line, working_dir = (entry, None) if isinstance(entry, str) else entry
+            if line:
+                plans[entry] = self._plan(line, working_dir)
+        self.prefetch(c for plan in plans.values()
+                      for candidates, _ in plan['executables'][:self.PREFETCH_WORDS]
+                      for c in candidates)
+        return {entry: self._finish(plan) for entry, plan in plans.items()}
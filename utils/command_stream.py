@@ -0,0 +1,115 @@
+"""Streaming CSV and NDJSON ingestion of subprocess output."""
+
+import csv
+import json
+import subprocess
+import threading
+from typing import List, Dict, Any, Optional, Iterator, Callable
+
+
+# Hide console windows for child processes on Windows
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+
+def powershell(command: str) -> List[str]:
+    """Build the argument list to run a PowerShell command."""
+    return ['powershell', '-NoProfile', '-NonInteractive', '-Command', command]
+
+
+def stream_lines(args: List[str], timeout: float = 60.0) -> Iterator[str]:
+    """Yield a command's stdout line by line while it is still running.
+
+    The command is killed once timeout seconds have passed, and
+    subprocess.TimeoutExpired is raised after the lines read up to
+    then. Stopping iteration early also kills the command.
+    """
+    timed_out = threading.Event()
+    proc = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        errors='replace',
+        creationflags=CREATE_NO_WINDOW
+    )
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield from proc.stdout
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(args, timeout)
+
+
+def stream_csv_rows(args: List[str], timeout: float = 60.0) -> Iterator[List[str]]:
+    """Yield each CSV row of a command's output as a list of fields."""
+    for row in csv.reader(stream_lines(args, timeout)):
+        if row:
+            yield row
+
+
+def _convert(value: str, convert: Callable[[str], Any]) -> Any:
+    """Convert a field, returning None if it is empty or malformed."""
+    if value == '':
+        return None
+    try:
+        return convert(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def stream_csv(args: List[str], timeout: float = 60.0, fieldnames: Optional[List[str]] = None,
+               types: Optional[Dict[str, Callable[[str], Any]]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield each CSV row of a command's output as a dict.
+
+    Field names come from the first row unless given, and repeated header
+    rows are skipped. Fields listed in types are converted, with None for
+    values that do not convert; missing fields are empty strings.
+    """
+    rows = stream_csv_rows(args, timeout)
+    if fieldnames is None:
+        fieldnames = next(rows, None)
+        if fieldnames is None:
+            return
+    types = types or {}
+
+    for row in rows:
+        if row == fieldnames:
+            continue
+        record = dict(zip(fieldnames, row))
+        for name in fieldnames[len(row):]:
+            record[name] = ''
+        for name, convert in types.items():
+            if name in record:
+                record[name] = _convert(record[name], convert)
+        yield record
+
+
+def stream_ndjson(args: List[str], timeout: float = 60.0) -> Iterator[Any]:
+    """Yield each JSON value of newline-delimited JSON output."""
+    for line in stream_lines(args, timeout):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def powershell_ndjson(pipeline: str) -> List[str]:
+    """Build a PowerShell command that writes each pipeline object as one JSON line."""
+    return powershell(f"{pipeline} | ForEach-Object {{ $_ | ConvertTo-Json -Compress -Depth 2 }}")
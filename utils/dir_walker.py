@@ -0,0 +1,229 @@
+"""Budgeted, single-pass directory walker that reuses scandir attributes."""
+
+import os
+import stat
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from utils.path_store import PathStore
+
+
+class DirectoryWalker:
+    """Walks directory trees once, collecting attributes and sizes per entry.
+
+    Attributes come from ``DirEntry.stat()``, which on Windows is filled in
+    from the directory listing itself, so no per-entry ``GetFileAttributesW``
+    call is needed. A directory's size is summed while it is being listed.
+    Results go into a PathStore instead of one dict per directory.
+    Subtrees are spread across a thread pool and the walk stops once the
+    depth, entry or time budget is used up.
+    """
+
+    FILE_ATTRIBUTE_READONLY = 0x01
+    FILE_ATTRIBUTE_HIDDEN = 0x02
+    FILE_ATTRIBUTE_SYSTEM = 0x04
+    FILE_ATTRIBUTE_DIRECTORY = 0x10
+    FILE_ATTRIBUTE_ARCHIVE = 0x20
+    FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+    def __init__(self, max_depth: int = 1, max_entries: int = 200000,
+                 time_budget: float = 60.0, max_workers: int = 4,
+                 size_filter: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 prune: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 file_visitor: Optional[Callable[[os.DirEntry], List[Any]]] = None,
+                 cache=None):
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.time_budget = time_budget
+        self.max_workers = max_workers
+        self.size_filter = size_filter
+        self.prune = prune
+        self.file_visitor = file_visitor
+        # Listings cannot be reused when every file has to be visited
+        self.cache = cache if file_visitor is None else None
+        self.file_results: List[Any] = []
+        self.pruned = set()
+        self._lock = threading.Lock()
+        self._deadline = 0.0
+        self.entries_seen = 0
+        self.truncated = False
+
+    @classmethod
+    def get_attributes(cls, entry: os.DirEntry) -> int:
+        """Get file attributes from a directory entry without extra syscalls."""
+        return cls._attributes_from_stat(entry.name, entry.stat(follow_symlinks=False))
+
+    @classmethod
+    def _attributes_from_stat(cls, name: str, st: os.stat_result) -> int:
+        """Get file attributes from a stat result."""
+        attrs = getattr(st, 'st_file_attributes', None)
+        if attrs is None:
+            # Non-Windows platforms: treat dot-names as hidden
+            attrs = cls.FILE_ATTRIBUTE_HIDDEN if name.startswith('.') else 0
+            if stat.S_ISLNK(st.st_mode):
+                attrs |= cls.FILE_ATTRIBUTE_REPARSE_POINT
+        return attrs
+
+    def _subdir_record(self, path: str, name: str, attributes: int, depth: int) -> Dict[str, Any]:
+        """Build the record returned for a subdirectory."""
+        return {
+            'path': path,
+            'name': name,
+            'attributes': attributes,
+            'depth': depth,
+            'size': None,
+            'file_count': None
+        }
+
+    def _list_cached(self, path: str, depth: int):
+        """Reuse a stored listing if the directory is unchanged.
+
+        Returns (size, file count, subdirectories, mtime), with the first
+        three None when the directory has to be listed again.
+        """
+        try:
+            mtime = os.stat(path, follow_symlinks=False).st_mtime
+        except OSError:
+            return None, None, None, None
+
+        cached = self.cache.lookup(path, mtime)
+        if cached is None:
+            return None, None, None, mtime
+
+        size, file_count, children = cached
+        subdirs = []
+        # Attribute changes do not touch the parent's mtime, so refresh them
+        for name, _ in children:
+            child = os.path.join(path, name)
+            try:
+                attrs = self._attributes_from_stat(name, os.stat(child, follow_symlinks=False))
+            except OSError:
+                continue
+            subdirs.append(self._subdir_record(child, name, attrs, depth + 1))
+
+        with self._lock:
+            self.entries_seen += file_count + len(children)
+        return size, file_count, subdirs, mtime
+
+    def _over_budget(self) -> bool:
+        """Check whether the entry or time budget has been used up."""
+        return self.entries_seen >= self.max_entries or time.monotonic() >= self._deadline
+
+    def _list(self, path: str, depth: int, collect_dirs: bool) -> Tuple[Optional[int], Optional[int], List[Dict[str, Any]]]:
+        """List one directory, returning its file size, file count and subdirectories."""
+        size = 0
+        file_count = 0
+        subdirs = []
+        visited = []
+        seen = 0
+
+        if depth > 0 and self._over_budget():
+            self.truncated = True
+            return None, None, subdirs
+
+        mtime = None
+        # A listing made only for its size is never reused: appending to or
+        # truncating a file does not change the directory's mtime
+        if self.cache is not None and collect_dirs:
+            cached_size, cached_count, cached_dirs, mtime = self._list_cached(path, depth)
+            if cached_dirs is not None:
+                return cached_size, cached_count, cached_dirs
+
+        complete = True
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    seen += 1
+                    if seen % 256 == 0:
+                        with self._lock:
+                            self.entries_seen += 256
+                        if self._over_budget():
+                            self.truncated = True
+                            complete = False
+                            break
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if collect_dirs:
+                                subdirs.append(self._subdir_record(
+                                    entry.path, entry.name, self.get_attributes(entry), depth + 1
+                                ))
+                        else:
+                            size += entry.stat(follow_symlinks=False).st_size
+                            file_count += 1
+                            if self.file_visitor:
+                                visited.extend(self.file_visitor(entry))
+                    except (OSError, PermissionError):
+                        continue
+        except (OSError, PermissionError):
+            complete = False
+
+        with self._lock:
+            self.entries_seen += seen % 256
+            self.file_results.extend(visited)
+
+        if mtime is not None and complete:
+            self.cache.store(path, mtime, size, file_count, [(d['name'], d['attributes']) for d in subdirs])
+
+        return size, file_count, subdirs
+
+    def walk(self, roots: List[str]) -> PathStore:
+        """Walk all roots and return a path store holding every directory found.
+
+        Roots are depth-0 nodes and subdirectories are added beneath them,
+        with sizes and file counts left unknown for directories that were
+        not listed. Directories up to max_depth are listed for their
+        children. Entries just below that depth are only listed to measure
+        their size, and only when size_filter accepts them. Reparse points
+        are reported but never followed, and a directory that is itself a
+        root is not listed a second time from its parent. Directories that
+        prune accepts are recorded, with their node IDs in pruned, but
+        never descended. Whatever
+        file_visitor returns for the files listed is collected in
+        file_results. With a cache, a directory listed for its children
+        whose mtime is unchanged is taken from its stored listing.
+        """
+        self.entries_seen = 0
+        self.truncated = False
+        self.file_results = []
+        self.pruned = set()
+        self._deadline = time.monotonic() + self.time_budget
+        store = PathStore()
+        root_paths = {os.path.normcase(os.path.abspath(root)) for root in roots}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+            for root in roots:
+                node = store.add(PathStore.NO_PARENT, root)
+                pending[pool.submit(self._list, root, 0, True)] = node
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parent = pending.pop(future)
+                    size, file_count, subdirs = future.result()
+                    if size is not None:
+                        store.size[parent] = size
+                        store.file_count[parent] = file_count
+
+                    for sub in subdirs:
+                        node = store.add(parent, sub['name'], sub['attributes'], sub['depth'])
+                        if self.prune and self.prune(sub):
+                            self.pruned.add(node)
+                            continue
+
+                        if sub['attributes'] & self.FILE_ATTRIBUTE_REPARSE_POINT:
+                            continue
+                        if self._over_budget():
+                            self.truncated = True
+                            continue
+                        if os.path.normcase(sub['path']) in root_paths:
+                            continue
+
+                        if sub['depth'] <= self.max_depth:
+                            pending[pool.submit(self._list, sub['path'], sub['depth'], True)] = node
+                        elif self.size_filter and self.size_filter(sub):
+                            pending[pool.submit(self._list, sub['path'], sub['depth'], False)] = node
+
+        return store
@@ -0,0 +1,284 @@
+"""Offline catalog of minimum driver versions keyed by hardware ID."""
+
+import os
+import csv
+import mmap
+import struct
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+
+from utils.paths import get_data_file
+
+
+def parse_version(text: str) -> int:
+    """Pack a dotted driver version into one comparable integer.
+
+    Driver versions have four 16-bit parts (major.minor.build.revision);
+    missing parts count as zero and unreadable ones make the whole
+    version 0.
+    """
+    parts = str(text or '').strip().split('.')[:4]
+    value = 0
+    for i in range(4):
+        part = parts[i].strip() if i < len(parts) else '0'
+        if not part.isdigit():
+            return 0
+        value = value << 16 | min(int(part), 0xFFFF)
+    return value
+
+
+def format_version(value: int) -> str:
+    return '.'.join(str(value >> shift & 0xFFFF) for shift in (48, 32, 16, 0))
+
+
+def parse_date(text: str) -> int:
+    """Turn yyyy-mm-dd (or yyyymmdd, or m/d/yyyy) into the integer yyyymmdd, 0 if unknown."""
+    text = str(text or '').strip()
+    if '/' in text:
+        month, _, rest = text.partition('/')
+        day, _, year = rest.partition('/')
+        text = f"{year[:4]}-{month.zfill(2)}-{day.zfill(2)}"
+    digits = text.replace('-', '')[:8]
+    return int(digits) if len(digits) == 8 and digits.isdigit() else 0
+
+
+def format_date(value: int) -> str:
+    if not value:
+        return ''
+    text = f"{value:08d}"
+    return f"{text[:4]}-{text[4:6]}-{text[6:]}"
+
+
+class DriverCatalog:
+    """Known-good minimum driver versions looked up by hardware ID prefix.
+
+    The catalog is maintained as a CSV file in the data directory with
+    the columns hardware_id, min_version, min_date and note; a hardware
+    ID may be a prefix such as 'PCI\\VEN_8086&DEV_A170' covering every
+    subsystem and revision. It is compiled into a binary index sorted by
+    upper-case hardware ID: a header, fixed-size records and a string
+    table. The index is memory-mapped and searched by bisection, so a
+    catalog of hundreds of thousands of entries is never loaded into
+    memory and lookups need no network access. The index is rebuilt
+    when the CSV is newer than it.
+    """
+
+    SOURCE_FILE = 'driver_catalog.csv'
+    INDEX_FILE = 'driver_catalog.idx'
+
+    MAGIC = b'DRVCAT01'
+    # magic, record count, record size, string table offset
+    HEADER = struct.Struct('<8sIII')
+    # key offset, key length, note length, note offset, version, date
+    RECORD = struct.Struct('<IHHIQI')
+
+    def __init__(self, source_path: Optional[str] = None, index_path: Optional[str] = None):
+        self.source_path = source_path or get_data_file(self.SOURCE_FILE)
+        self.index_path = index_path or get_data_file(self.INDEX_FILE)
+        self._file = None
+        self._data: Optional[mmap.mmap] = None
+        self._count = 0
+        self._strings = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @classmethod
+    def read_source(cls, path: str) -> Iterator[Tuple[str, int, int, str]]:
+        """Yield (hardware_id, version, date, note) rows from a catalog CSV."""
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.reader(f):
+                if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                    continue
+                if row[0].strip().lower() == 'hardware_id':
+                    continue
+                row += [''] * (4 - len(row))
+                version = parse_version(row[1])
+                date = parse_date(row[2])
+                if version or date:
+                    yield row[0].strip().upper(), version, date, row[3].strip()
+
+    @classmethod
+    def compile(cls, rows: Iterable[Tuple[str, int, int, str]], index_path: str) -> int:
+        """Write rows into a sorted index file and return the number of entries.
+
+        When a hardware ID is listed more than once, the highest version
+        and latest date win.
+        """
+        entries: Dict[bytes, List[Any]] = {}
+        for hardware_id, version, date, note in rows:
+            key = hardware_id.upper().encode('utf-8')[:0xFFFF]
+            entry = entries.get(key)
+            if entry is None:
+                entries[key] = [version, date, note]
+            else:
+                entry[0] = max(entry[0], version)
+                entry[1] = max(entry[1], date)
+                entry[2] = entry[2] or note
+
+        keys = sorted(entries)
+        strings_offset = cls.HEADER.size + cls.RECORD.size * len(keys)
+        records = bytearray()
+        strings = bytearray()
+        for key in keys:
+            version, date, note = entries[key]
+            note_bytes = note.encode('utf-8')[:0xFFFF]
+            key_offset = len(strings)
+            strings += key
+            records += cls.RECORD.pack(key_offset, len(key), len(note_bytes), len(strings),
+                                       version, date)
+            strings += note_bytes
+
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, len(keys), cls.RECORD.size, strings_offset))
+            f.write(records)
+            f.write(strings)
+        os.replace(temp_path, index_path)
+        return len(keys)
+
+    def _is_stale(self) -> bool:
+        try:
+            source_mtime = os.stat(self.source_path).st_mtime_ns
+        except OSError:
+            return False
+        try:
+            return os.stat(self.index_path).st_mtime_ns < source_mtime
+        except OSError:
+            return True
+
+    def open(self) -> bool:
+        """Map the index, rebuilding it from the CSV first if needed.
+
+        Returns False when there is no catalog.
+        """
+        self.close()
+        if self._is_stale():
+            try:
+                self.compile(self.read_source(self.source_path), self.index_path)
+            except (OSError, csv.Error, UnicodeDecodeError) as e:
+                print(f"Error compiling driver catalog: {e}")
+
+        try:
+            f = open(self.index_path, 'rb')
+        except OSError:
+            return False
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            f.close()
+            return False
+
+        if len(data) >= self.HEADER.size:
+            magic, count, record_size, strings = self.HEADER.unpack_from(data, 0)
+            if magic == self.MAGIC and record_size == self.RECORD.size \
+                    and self.HEADER.size + count * record_size == strings <= len(data):
+                self._file, self._data = f, data
+                self._count, self._strings = count, strings
+                return True
+        data.close()
+        f.close()
+        return False
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._file.close()
+        self._file = self._data = None
+        self._count = 0
+
+    def _record(self, index: int) -> Tuple[int, int, int, int, int, int]:
+        return self.RECORD.unpack_from(self._data, self.HEADER.size + index * self.RECORD.size)
+
+    def _key(self, index: int) -> bytes:
+        key_offset, key_length = self._record(index)[:2]
+        start = self._strings + key_offset
+        return self._data[start:start + key_length]
+
+    def _entry(self, index: int) -> Dict[str, Any]:
+        key_offset, key_length, note_length, note_offset, version, date = self._record(index)
+        key_start = self._strings + key_offset
+        note_start = self._strings + note_offset
+        return {
+            'hardware_id': self._data[key_start:key_start + key_length].decode('utf-8', 'replace'),
+            'min_version': format_version(version) if version else '',
+            'min_date': format_date(date),
+            'note': self._data[note_start:note_start + note_length].decode('utf-8', 'replace'),
+            'version_value': version,
+            'date_value': date
+        }
+
+    def _bisect(self, key: bytes) -> int:
+        """Index of the first record whose key is not less than key."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get(self, hardware_id: str) -> Optional[Dict[str, Any]]:
+        """Get the entry for exactly this hardware ID, ignoring case."""
+        if self._data is None:
+            return None
+        key = hardware_id.upper().encode('utf-8')
+        index = self._bisect(key)
+        if index < self._count and self._key(index) == key:
+            return self._entry(index)
+        return None
+
+    def iter_prefix(self, prefix: str) -> Iterator[Dict[str, Any]]:
+        """Yield the entries whose hardware ID starts with prefix, in order."""
+        if self._data is None:
+            return
+        key = prefix.upper().encode('utf-8')
+        index = self._bisect(key)
+        while index < self._count and self._key(index).startswith(key):
+            yield self._entry(index)
+            index += 1
+
+    @staticmethod
+    def _prefixes(hardware_id: str) -> Iterator[str]:
+        """Yield a hardware ID and its shorter forms, most specific first.
+
+        'PCI\\VEN_8086&DEV_A170&SUBSYS_72708086&REV_31' is cut back at each
+        '&' down to 'PCI\\VEN_8086'.
+        """
+        text = hardware_id.strip()
+        bus_end = text.find('\\')
+        while text:
+            yield text
+            cut = text.rfind('&')
+            if cut <= bus_end:
+                break
+            text = text[:cut]
+
+    def lookup(self, hardware_ids: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Find the most specific entry matching any of a device's hardware IDs.
+
+        IDs are tried in the order given, which Windows lists from most
+        to least specific.
+        """
+        if self._data is None or not self._count:
+            return None
+        for hardware_id in hardware_ids:
+            for prefix in self._prefixes(hardware_id):
+                entry = self.get(prefix)
+                if entry is not None:
+                    return entry
+        return None
+
+    @staticmethod
+    def is_outdated(entry: Dict[str, Any], driver_version: str, driver_date: str) -> bool:
+        """Whether an installed driver is older than a catalog entry requires.
+
+        The version is compared when both sides have one, otherwise the date.
+        """
+        version = parse_version(driver_version)
+        if entry['version_value'] and version:
+            return version < entry['version_value']
+        date = parse_date(driver_date)
+        if entry['date_value'] and date:
+            return date < entry['date_value']
+        return False
@@ -0,0 +1,114 @@
+"""Inventory of Plug and Play devices and the drivers installed for them."""
+
+import subprocess
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+from utils.command_stream import stream_ndjson, powershell_ndjson
+
+
+class DriverInventory:
+    """PnP entities joined with their signed-driver records by device ID.
+
+    One PowerShell process writes the Win32_PnPEntity rows followed by
+    the Win32_PnPSignedDriver rows as JSON lines, each tagged with its
+    kind. Rows are indexed by upper-case device instance ID as they
+    arrive and merged in one pass, so each device's record holds its
+    status, error code and hardware IDs together with its driver
+    version, date, provider, INF and signer.
+    """
+
+    QUERY = (
+        '& { '
+        'Get-WmiObject Win32_PnPEntity | '
+        'Select-Object @{n="Kind";e={"entity"}}, Name, DeviceID, HardwareID, Status, ConfigManagerErrorCode; '
+        'Get-WmiObject Win32_PnPSignedDriver | '
+        'Select-Object @{n="Kind";e={"driver"}}, DeviceID, DeviceName, DriverVersion, DriverDate, '
+        'DriverProviderName, InfName, Signer, IsSigned '
+        '}'
+    )
+
+    def __init__(self):
+        self.devices: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _date(value: Any) -> str:
+        """Turn a WMI datetime (yyyymmddHHMMSS.ffffff+zzz) into yyyy-mm-dd."""
+        text = str(value or '')
+        if len(text) >= 8 and text[:8].isdigit():
+            return f"{text[:4]}-{text[4:6]}-{text[6:8]}"
+        return ''
+
+    @staticmethod
+    def _error_code(value: Any) -> int:
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def build(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Join entity and driver rows on device ID into device records."""
+        entities: Dict[str, Dict[str, Any]] = {}
+        drivers: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            device_id = str(row.get('DeviceID') or '')
+            if not device_id:
+                continue
+            index = drivers if row.get('Kind') == 'driver' else entities
+            index[device_id.upper()] = row
+
+        devices = {}
+        for key in list(entities) + [k for k in drivers if k not in entities]:
+            entity = entities.get(key, {})
+            driver = drivers.get(key, {})
+            is_signed = driver.get('IsSigned')
+            hardware_ids = entity.get('HardwareID') or []
+            if isinstance(hardware_ids, str):
+                hardware_ids = [hardware_ids]
+            devices[key] = {
+                'device_id': str(entity.get('DeviceID') or driver.get('DeviceID')),
+                'name': str(entity.get('Name') or driver.get('DeviceName') or ''),
+                'status': str(entity.get('Status') or ''),
+                'error_code': self._error_code(entity.get('ConfigManagerErrorCode')),
+                'hardware_ids': [str(h) for h in hardware_ids if h],
+                'driver_version': str(driver.get('DriverVersion') or ''),
+                'driver_date': self._date(driver.get('DriverDate')),
+                'provider': str(driver.get('DriverProviderName') or ''),
+                'inf_name': str(driver.get('InfName') or ''),
+                'signer': str(driver.get('Signer') or ''),
+                'is_signed': is_signed if isinstance(is_signed, bool) else None
+            }
+        return devices
+
+    def load(self, timeout: float = 90.0) -> int:
+        """Query the devices and drivers, returning how many devices were found.
+
+        Rows read before a timeout are still used.
+        """
+        rows: List[Dict[str, Any]] = []
+        try:
+            for row in stream_ndjson(powershell_ndjson(self.QUERY), timeout=timeout):
+                rows.append(row)
+        except subprocess.TimeoutExpired:
+            pass
+        except OSError as e:
+            print(f"Error reading driver inventory: {e}")
+        self.devices = self.build(rows)
+        return len(self.devices)
+
+    def get(self, device_id: str) -> Optional[Dict[str, Any]]:
+        """Get a device by instance ID, ignoring case."""
+        return self.devices.get(device_id.upper())
+
+    def get_problem_devices(self) -> Iterator[Dict[str, Any]]:
+        """Yield devices with an error code or a status other than OK."""
+        for device in self.devices.values():
+            if device['error_code'] or device['status'] not in ('OK', ''):
+                yield device
+
+    def get_unsigned_drivers(self) -> Iterator[Dict[str, Any]]:
+        """Yield devices whose driver is reported as unsigned."""
+        for device in self.devices.values():
+            if device['is_signed'] is False:
+                yield device
@@ -0,0 +1,610 @@
+"""Streaming reader for Windows event log (EVTX) files."""
+
+import os
+import mmap
+import struct
+import uuid
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple
+
+from utils.command_stream import CREATE_NO_WINDOW
+from utils.regf import filetime_to_datetime
+
+
+# BinXML tokens; the 0x40 bit marks "more data follows" variants
+TOKEN_EOF = 0x00
+TOKEN_OPEN_START_ELEMENT = 0x01
+TOKEN_CLOSE_START_ELEMENT = 0x02
+TOKEN_CLOSE_EMPTY_ELEMENT = 0x03
+TOKEN_END_ELEMENT = 0x04
+TOKEN_VALUE = 0x05
+TOKEN_ATTRIBUTE = 0x06
+TOKEN_CDATA = 0x07
+TOKEN_CHAR_REF = 0x08
+TOKEN_ENTITY_REF = 0x09
+TOKEN_PI_TARGET = 0x0A
+TOKEN_PI_DATA = 0x0B
+TOKEN_TEMPLATE_INSTANCE = 0x0C
+TOKEN_NORMAL_SUBSTITUTION = 0x0D
+TOKEN_OPTIONAL_SUBSTITUTION = 0x0E
+TOKEN_FRAGMENT_HEADER = 0x0F
+
+TYPE_NULL = 0x00
+TYPE_STRING = 0x01
+TYPE_BINXML = 0x21
+TYPE_ARRAY = 0x80
+
+# Fixed-size value types: struct format and how to show the number
+_NUMBERS = {
+    0x03: ('<b', str), 0x04: ('<B', str), 0x05: ('<h', str), 0x06: ('<H', str),
+    0x07: ('<i', str), 0x08: ('<I', str), 0x09: ('<q', str), 0x0A: ('<Q', str),
+    0x0B: ('<f', str), 0x0C: ('<d', str),
+    0x0D: ('<I', lambda v: 'true' if v else 'false'),
+    0x14: ('<I', lambda v: f"0x{v:08x}"), 0x15: ('<Q', lambda v: f"0x{v:016x}"),
+}
+
+_ENTITIES = {'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'apos': "'"}
+
+
+class Substitution:
+    """Placeholder in a template for the value with the given index."""
+
+    __slots__ = ('index', 'optional')
+
+    def __init__(self, index: int, optional: bool):
+        self.index = index
+        self.optional = optional
+
+
+class Element:
+    """A decoded XML element: name, attributes and children (elements or text)."""
+
+    __slots__ = ('name', 'attributes', 'children')
+
+    def __init__(self, name: str, attributes: Dict[str, Any], children: List[Any]):
+        self.name = name
+        self.attributes = attributes
+        self.children = children
+
+    def find(self, name: str) -> Optional['Element']:
+        """Get the first child element with a name."""
+        for child in self.children:
+            if isinstance(child, Element) and child.name == name:
+                return child
+        return None
+
+    def elements(self) -> Iterator['Element']:
+        """Yield the child elements."""
+        for child in self.children:
+            if isinstance(child, Element):
+                yield child
+
+    @property
+    def text(self) -> str:
+        """Get the text directly inside the element."""
+        return ''.join(child for child in self.children if isinstance(child, str))
+
+
+class _ChunkParser:
+    """Decodes the BinXML of the records of one 64 KiB chunk.
+
+    Element and attribute names are stored once per chunk and referenced
+    by offset. Templates are decoded into trees with Substitution
+    placeholders and kept in a cache shared by every chunk of the file,
+    keyed by template GUID, so each distinct event layout is decoded once
+    no matter how many records use it.
+    """
+
+    # Real events nest a handful of levels; anything deeper is damaged
+    # or a template that refers to itself
+    MAX_DEPTH = 64
+
+    def __init__(self, data: bytes, templates: Dict[bytes, Element]):
+        self.data = data
+        self.templates = templates
+        self.names: Dict[int, str] = {}
+        self.depth = 0
+
+    def _descend(self):
+        """Count one more level of nesting, refusing to go past MAX_DEPTH."""
+        self.depth += 1
+        if self.depth > self.MAX_DEPTH:
+            raise ValueError("BinXML nested too deeply")
+
+    def _name(self, offset: int) -> str:
+        """Read a name string: next offset, hash, length, UTF-16 text."""
+        name = self.names.get(offset)
+        if name is None:
+            length, = struct.unpack_from('<H', self.data, offset + 6)
+            name = self.data[offset + 8:offset + 8 + length * 2].decode('utf-16-le', 'replace')
+            self.names[offset] = name
+        return name
+
+    def _name_at(self, offset: int, position: int) -> Tuple[str, int]:
+        """Resolve a name reference; a name defined in place is skipped over."""
+        name = self._name(offset)
+        if offset == position:
+            position += 8 + len(name) * 2 + 2
+        return name, position
+
+    def _utf16(self, position: int) -> Tuple[str, int]:
+        """Read a length-prefixed UTF-16 string."""
+        length, = struct.unpack_from('<H', self.data, position)
+        end = position + 2 + length * 2
+        return self.data[position + 2:end].decode('utf-16-le', 'replace'), end
+
+    def _content(self, position: int) -> Tuple[Any, int]:
+        """Read one text-like node: value, substitution, CDATA or reference."""
+        token = self.data[position] & 0x0F
+        if token == TOKEN_VALUE:
+            if self.data[position + 1] != TYPE_STRING:
+                raise ValueError(f"Unsupported value type {self.data[position + 1]:#x}")
+            return self._utf16(position + 2)
+        if token in (TOKEN_NORMAL_SUBSTITUTION, TOKEN_OPTIONAL_SUBSTITUTION):
+            index, = struct.unpack_from('<H', self.data, position + 1)
+            return Substitution(index, token == TOKEN_OPTIONAL_SUBSTITUTION), position + 4
+        if token == TOKEN_CDATA:
+            return self._utf16(position + 1)
+        if token == TOKEN_CHAR_REF:
+            value, = struct.unpack_from('<H', self.data, position + 1)
+            return chr(value), position + 3
+        if token == TOKEN_ENTITY_REF:
+            offset, = struct.unpack_from('<I', self.data, position + 1)
+            name, position = self._name_at(offset, position + 5)
+            return _ENTITIES.get(name, f"&{name};"), position
+        raise ValueError(f"Unexpected BinXML token {token:#x}")
+
+    def _element(self, position: int) -> Tuple[Element, int]:
+        """Read an element and everything inside it."""
+        self._descend()
+        try:
+            return self._read_element(position)
+        finally:
+            self.depth -= 1
+
+    def _read_element(self, position: int) -> Tuple[Element, int]:
+        has_attributes = self.data[position] & 0x40
+        # Token, dependency id, data size
+        position += 7
+        offset, = struct.unpack_from('<I', self.data, position)
+        position += 4
+        if has_attributes:
+            position += 4
+        name, position = self._name_at(offset, position)
+
+        attributes: Dict[str, Any] = {}
+        while self.data[position] & 0x0F == TOKEN_ATTRIBUTE:
+            offset, = struct.unpack_from('<I', self.data, position + 1)
+            attribute, position = self._name_at(offset, position + 5)
+            value, position = self._content(position)
+            attributes[attribute] = value
+
+        children: List[Any] = []
+        token = self.data[position] & 0x0F
+        position += 1
+        if token == TOKEN_CLOSE_EMPTY_ELEMENT:
+            return Element(name, attributes, children), position
+        if token != TOKEN_CLOSE_START_ELEMENT:
+            raise ValueError(f"Unexpected BinXML token {token:#x} in element {name}")
+
+        while True:
+            token = self.data[position] & 0x0F
+            if token == TOKEN_END_ELEMENT:
+                return Element(name, attributes, children), position + 1
+            if token == TOKEN_OPEN_START_ELEMENT:
+                child, position = self._element(position)
+                children.append(child)
+            elif token == TOKEN_PI_TARGET:
+                _, position = self._name_at(struct.unpack_from('<I', self.data, position + 1)[0], position + 5)
+            elif token == TOKEN_PI_DATA:
+                _, position = self._utf16(position + 1)
+            else:
+                child, position = self._content(position)
+                children.append(child)
+
+    def fragment(self, position: int, end: int) -> Tuple[List[Element], int]:
+        """Read a fragment: elements and template instances up to EOF."""
+        self._descend()
+        try:
+            return self._read_fragment(position, end)
+        finally:
+            self.depth -= 1
+
+    def _read_fragment(self, position: int, end: int) -> Tuple[List[Element], int]:
+        nodes: List[Element] = []
+        while position < end:
+            token = self.data[position] & 0x0F
+            if token == TOKEN_EOF:
+                return nodes, position + 1
+            if token == TOKEN_FRAGMENT_HEADER:
+                position += 4
+            elif token == TOKEN_TEMPLATE_INSTANCE:
+                node, position = self._template_instance(position)
+                nodes.extend(node)
+            elif token == TOKEN_OPEN_START_ELEMENT:
+                node, position = self._element(position)
+                nodes.append(node)
+            else:
+                raise ValueError(f"Unexpected BinXML token {token:#x} in fragment")
+        return nodes, position
+
+    def _template(self, offset: int) -> Tuple[Element, int]:
+        """Get a template's decoded tree and the size of its definition."""
+        guid = self.data[offset + 4:offset + 20]
+        size, = struct.unpack_from('<I', self.data, offset + 20)
+        template = self.templates.get(guid)
+        if template is None:
+            nodes, _ = self.fragment(offset + 24, offset + 24 + size)
+            if not nodes:
+                raise ValueError("Empty template")
+            template = nodes[0]
+            self.templates[guid] = template
+        return template, size
+
+    def _template_instance(self, position: int) -> Tuple[List[Element], int]:
+        """Read a template instance and fill its template with the values that follow."""
+        offset, = struct.unpack_from('<I', self.data, position + 6)
+        position += 10
+        template, size = self._template(offset)
+        if offset == position:
+            # Definition stored in place, ahead of the values
+            position += 24 + size
+
+        count, = struct.unpack_from('<I', self.data, position)
+        position += 4
+        descriptors = [struct.unpack_from('<HB', self.data, position + i * 4) for i in range(count)]
+        position += count * 4
+        values = []
+        for value_size, value_type in descriptors:
+            values.append(self._value(position, value_size, value_type))
+            position += value_size
+        return self._fill(template, values), position
+
+    def _value(self, position: int, size: int, value_type: int) -> Any:
+        """Decode one substitution value."""
+        raw = self.data[position:position + size]
+        if value_type == TYPE_NULL or (not size and value_type != TYPE_STRING):
+            return None
+        if value_type == TYPE_STRING:
+            return raw.decode('utf-16-le', 'replace').rstrip('\x00')
+        if value_type == 0x02:
+            return raw.decode('latin-1').rstrip('\x00')
+        if value_type in _NUMBERS:
+            fmt, show = _NUMBERS[value_type]
+            return show(struct.unpack_from(fmt, raw)[0])
+        if value_type == 0x0E:
+            return raw.hex().upper()
+        if value_type == 0x0F:
+            return '{' + str(uuid.UUID(bytes_le=bytes(raw[:16]))).upper() + '}'
+        if value_type == 0x10:
+            return f"0x{int.from_bytes(raw, 'little'):0{size * 2}x}"
+        if value_type == 0x11:
+            when = filetime_to_datetime(struct.unpack_from('<Q', raw)[0])
+            return when.isoformat() if when else ''
+        if value_type == 0x12:
+            year, month, _, day, hour, minute, second, millis = struct.unpack_from('<8H', raw)
+            return f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}.{millis:03d}"
+        if value_type == 0x13:
+            revision, count = raw[0], raw[1]
+            authority = int.from_bytes(raw[2:8], 'big')
+            parts = struct.unpack_from(f'<{count}I', raw, 8)
+            return f"S-{revision}-{authority}" + ''.join(f"-{p}" for p in parts)
+        if value_type == TYPE_BINXML:
+            nodes, _ = self.fragment(position, position + size)
+            return nodes
+        if value_type == TYPE_ARRAY | TYPE_STRING:
+            return [s for s in raw.decode('utf-16-le', 'replace').split('\x00') if s]
+        if value_type & TYPE_ARRAY and value_type & ~TYPE_ARRAY in _NUMBERS:
+            fmt, show = _NUMBERS[value_type & ~TYPE_ARRAY]
+            item = struct.calcsize(fmt)
+            return [show(struct.unpack_from(fmt, raw, i)[0]) for i in range(0, size - item + 1, item)]
+        return raw.hex().upper()
+
+    def _fill(self, template: Element, values: List[Any]) -> List[Element]:
+        """Copy a template tree with its substitutions replaced by values."""
+        def substitute(part: Any) -> List[Any]:
+            if not isinstance(part, Substitution):
+                return [part]
+            value = values[part.index] if part.index < len(values) else None
+            if value is None:
+                return []
+            if isinstance(value, list):
+                if value and isinstance(value[0], Element):
+                    return value
+                return [', '.join(value)]
+            return [value]
+
+        def copy(element: Element) -> Optional[Element]:
+            attributes = {}
+            for name, part in element.attributes.items():
+                value = substitute(part)
+                if value:
+                    attributes[name] = ''.join(v for v in value if isinstance(v, str))
+                elif not (isinstance(part, Substitution) and part.optional):
+                    attributes[name] = ''
+            children = []
+            for child in element.children:
+                if isinstance(child, Element):
+                    filled = copy(child)
+                    if filled is not None:
+                        children.append(filled)
+                else:
+                    children.extend(substitute(child))
+            return Element(element.name, attributes, children)
+
+        return [copy(template)]
+
+
+class EvtxFile:
+    """A memory-mapped event log file read chunk by chunk.
+
+    Records are yielded as they are decoded, so a large exported log is
+    never held in memory as a whole. Chunks are self-contained (records,
+    names and templates only refer to their own chunk), so they are
+    decoded on a thread pool a few at a time ahead of the consumer.
+    """
+
+    FILE_SIGNATURE = b'ElfFile\x00'
+    CHUNK_SIGNATURE = b'ElfChnk\x00'
+    RECORD_SIGNATURE = b'**\x00\x00'
+    HEADER_SIZE = 4096
+    CHUNK_SIZE = 65536
+    CHUNK_HEADER_SIZE = 512
+
+    def __init__(self, path: str, max_workers: int = 4):
+        self.path = path
+        self.max_workers = max_workers
+        self._templates: Dict[bytes, Element] = {}
+        self._file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self._file.close()
+            raise
+        if self.data[:8] != self.FILE_SIGNATURE:
+            self.close()
+            raise ValueError(f"{path} is not an event log file")
+
+    def close(self):
+        """Unmap and close the log file."""
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def chunk_count(self) -> int:
+        """Get the number of chunks, from the file size since the header count may be stale."""
+        return max(0, (len(self.data) - self.HEADER_SIZE) // self.CHUNK_SIZE)
+
+    def _read_chunk(self, index: int, event_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Decode the records of one chunk, skipping damaged ones."""
+        start = self.HEADER_SIZE + index * self.CHUNK_SIZE
+        chunk = self.data[start:start + self.CHUNK_SIZE]
+        if chunk[:8] != self.CHUNK_SIGNATURE:
+            return []
+        free_offset, = struct.unpack_from('<I', chunk, 48)
+        end = min(free_offset, self.CHUNK_SIZE)
+        parser = _ChunkParser(chunk, self._templates)
+        wanted = set(event_ids) if event_ids is not None else None
+
+        records = []
+        position = self.CHUNK_HEADER_SIZE
+        while position + 24 <= end and chunk[position:position + 4] == self.RECORD_SIGNATURE:
+            size, record_id, timestamp = struct.unpack_from('<IQQ', chunk, position + 4)
+            if size < 28 or position + size > self.CHUNK_SIZE:
+                break
+            try:
+                nodes, _ = parser.fragment(position + 24, position + size - 4)
+                record = self._to_record(nodes, record_id, timestamp)
+            except (ValueError, struct.error, IndexError, RecursionError):
+                parser.depth = 0
+                record = None
+            if record is not None and (wanted is None or record['event_id'] in wanted):
+                records.append(record)
+            position += size
+        return records
+
+    @staticmethod
+    def _to_record(nodes: List[Element], record_id: int, timestamp: int) -> Optional[Dict[str, Any]]:
+        """Pull the system fields and event data out of a decoded Event element."""
+        event = next((n for n in nodes if n.name == 'Event'), None)
+        if event is None:
+            return None
+        system = event.find('System')
+        if system is None:
+            return None
+
+        def system_text(name: str) -> str:
+            element = system.find(name)
+            return element.text if element is not None else ''
+
+        provider = system.find('Provider')
+        try:
+            event_id = int(system_text('EventID'))
+        except ValueError:
+            return None
+
+        data: Dict[str, str] = {}
+        event_data = event.find('EventData')
+        if event_data is not None:
+            for i, element in enumerate(event_data.elements()):
+                data[element.attributes.get('Name') or f"Data{i}"] = element.text
+        user_data = event.find('UserData')
+        if user_data is not None:
+            for container in user_data.elements():
+                for element in container.elements():
+                    data[element.name] = element.text
+
+        return {
+            'record_id': record_id,
+            'timestamp': filetime_to_datetime(timestamp),
+            'event_id': event_id,
+            'provider': provider.attributes.get('Name', '') if provider is not None else '',
+            'level': system_text('Level'),
+            'data': data
+        }
+
+    def records(self, event_ids: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield records in file order, optionally only those with the given event IDs."""
+        event_ids = set(event_ids) if event_ids is not None else None
+        count = self.chunk_count
+        if count <= 1 or self.max_workers <= 1:
+            for index in range(count):
+                yield from self._read_chunk(index, event_ids)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = deque()
+            next_index = 0
+            while next_index < count or pending:
+                # Keep a bounded number of chunks in flight
+                while next_index < count and len(pending) < self.max_workers * 2:
+                    pending.append(pool.submit(self._read_chunk, next_index, event_ids))
+                    next_index += 1
+                yield from pending.popleft().result()
+
+
+class BootPerformanceCollector:
+    """Measured boot and shutdown delays from the Diagnostics-Performance log.
+
+    Windows records how long each boot and shutdown took, and which
+    applications, services and drivers made them slower than usual and
+    by how much. The log is exported with wevtutil (it cannot be read in
+    place while the event log service holds it) and parsed with
+    EvtxFile; the results are kept until clear() so every analyzer of a
+    scan shares one export.
+    """
+
+    LOG_NAME = 'Microsoft-Windows-Diagnostics-Performance/Operational'
+    EXPORT_FILE = 'diagnostics_performance.evtx'
+
+    BOOT_EVENT = 100
+    SHUTDOWN_EVENT = 200
+    # Event ID -> (kind of component, phase it slowed)
+    DEGRADATION_EVENTS = {
+        101: ('application', 'boot'),
+        102: ('driver', 'boot'),
+        103: ('service', 'boot'),
+        109: ('device', 'boot'),
+        201: ('application', 'shutdown'),
+        202: ('device', 'shutdown'),
+        203: ('service', 'shutdown'),
+    }
+
+    def __init__(self, log_file: Optional[str] = None, days: int = 30):
+        # An already exported log to read instead of exporting the live one
+        self.log_file = log_file
+        self.days = days
+        self._results: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Forget the parsed log so the next request reads it again."""
+        with self._lock:
+            self._results = None
+
+    def _export(self) -> Optional[str]:
+        """Export the live log to a temporary file, or None if that is not possible."""
+        path = os.path.join(tempfile.gettempdir(), self.EXPORT_FILE)
+        try:
+            result = subprocess.run(
+                ['wevtutil', 'epl', self.LOG_NAME, path, '/ow:true'],
+                capture_output=True,
+                timeout=60,
+                creationflags=CREATE_NO_WINDOW
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return path if result.returncode == 0 and os.path.isfile(path) else None
+
+    @staticmethod
+    def _milliseconds(value: Any) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
+
+    def collect(self, path: str) -> Dict[str, Any]:
+        """Read boot totals and per-component delays from an exported log."""
+        cutoff = datetime.now() - timedelta(days=self.days) if self.days else None
+        boots = []
+        shutdowns = []
+        delays: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        event_ids = {self.BOOT_EVENT, self.SHUTDOWN_EVENT} | set(self.DEGRADATION_EVENTS)
+
+        try:
+            log = EvtxFile(path)
+        except (OSError, ValueError):
+            return {'boots': boots, 'shutdowns': shutdowns, 'components': delays}
+
+        with log:
+            for record in log.records(event_ids):
+                if cutoff and record['timestamp'] and record['timestamp'] < cutoff:
+                    continue
+                data = record['data']
+                event_id = record['event_id']
+                if event_id == self.BOOT_EVENT:
+                    boots.append({'time': record['timestamp'],
+                                  'boot_ms': self._milliseconds(data.get('BootTime')),
+                                  'main_path_ms': self._milliseconds(data.get('MainPathBootTime')),
+                                  'post_boot_ms': self._milliseconds(data.get('BootPostBootTime'))})
+                    continue
+                if event_id == self.SHUTDOWN_EVENT:
+                    shutdowns.append({'time': record['timestamp'],
+                                      'shutdown_ms': self._milliseconds(data.get('ShutdownTime'))})
+                    continue
+
+                kind, phase = self.DEGRADATION_EVENTS[event_id]
+                name = data.get('Name') or data.get('FileName') or ''
+                if not name:
+                    continue
+                entry = delays.setdefault((kind, name.lower()), {
+                    'kind': kind,
+                    'name': name,
+                    'friendly_name': data.get('FriendlyName', ''),
+                    'boot_ms': [],
+                    'shutdown_ms': []
+                })
+                entry[f"{phase}_ms"].append(self._milliseconds(data.get('DegradationTime')))
+
+        for entry in delays.values():
+            for phase in ('boot', 'shutdown'):
+                times = entry.pop(f"{phase}_ms")
+                entry[f"{phase}_events"] = len(times)
+                entry[f"{phase}_delay_ms"] = sum(times) // len(times) if times else 0
+        return {'boots': boots, 'shutdowns': shutdowns, 'components': delays}
+
+    def get_results(self) -> Dict[str, Any]:
+        """Get the parsed log, exporting and reading it on first use."""
+        with self._lock:
+            if self._results is None:
+                path = self.log_file or self._export()
+                self._results = self.collect(path) if path else {'boots': [], 'shutdowns': [], 'components': {}}
+            return self._results
+
+    def get_delay(self, kind: str, *names: str) -> Optional[Dict[str, Any]]:
+        """Get the measured delays of a component by any of its names, ignoring case."""
+        components = self.get_results()['components']
+        for name in names:
+            if name:
+                entry = components.get((kind, name.lower()))
+                if entry is not None:
+                    return entry
+        return None
+
+    def get_average_boot_ms(self) -> int:
+        """Get the average total boot time over the recorded boots."""
+        boots = [b['boot_ms'] for b in self.get_results()['boots'] if b['boot_ms']]
+        return sum(boots) // len(boots) if boots else 0
@@ -0,0 +1,156 @@
+"""Persistent filesystem metadata index for incremental rescans."""
+
+import json
+import time
+import sqlite3
+import threading
+from contextlib import closing
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.paths import get_data_file
+
+
+# (attributes, size, stream count) recorded for a reported item
+ItemState = Tuple[int, int, int]
+
+
+class FileSystemIndex:
+    """SQLite-backed cache of directory listings and reported items.
+
+    Each directory listing is stored with the directory's mtime, its direct
+    file size and count, and its subdirectory names. A later walk reuses a
+    listing as long as the mtime is unchanged, so only directories where
+    entries were added, removed or renamed are listed again. The items an
+    analyzer reported are stored too, so the next scan can be compared
+    against them. Rows are kept per scope, one scope per analyzer.
+    """
+
+    DB_FILE = 'fs_index.db'
+
+    def __init__(self, scope: str, db_path: Optional[str] = None):
+        self.scope = scope
+        self.db_path = db_path or get_data_file(self.DB_FILE)
+        self._listings: Dict[str, Tuple[float, int, int, str]] = {}
+        self._updated: Dict[str, Tuple[float, int, int, str]] = {}
+        self._seen = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the tables if needed."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS directories ('
+            'scope TEXT, path TEXT, mtime REAL, size INTEGER, file_count INTEGER, '
+            'subdirs TEXT, PRIMARY KEY (scope, path))'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS items ('
+            'scope TEXT, path TEXT, attributes INTEGER, size INTEGER, stream_count INTEGER, '
+            'PRIMARY KEY (scope, path))'
+        )
+        conn.execute('CREATE TABLE IF NOT EXISTS scans (scope TEXT PRIMARY KEY, last_scan REAL)')
+        return conn
+
+    def load(self):
+        """Read the stored listings for this scope into memory."""
+        self._listings = {}
+        self._updated = {}
+        self.reset_stats()
+        try:
+            with closing(self._connect()) as conn, conn:
+                rows = conn.execute(
+                    'SELECT path, mtime, size, file_count, subdirs FROM directories WHERE scope = ?',
+                    (self.scope,)
+                )
+                for path, mtime, size, file_count, subdirs in rows:
+                    self._listings[path] = (mtime, size, file_count, subdirs)
+        except sqlite3.Error:
+            pass
+        self._loaded = True
+
+    def reset_stats(self):
+        """Start counting hits and seen directories for a new walk."""
+        self._seen = set()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, path: str, mtime: float) -> Optional[Tuple[int, int, List[Tuple[str, int]]]]:
+        """Get the stored (size, file count, subdirectories) if the mtime still matches."""
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            self._seen.add(path)
+            cached = self._listings.get(path)
+            if cached is None or cached[0] != mtime:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return cached[1], cached[2], [tuple(s) for s in json.loads(cached[3])]
+
+    def store(self, path: str, mtime: float, size: int, file_count: int,
+              subdirs: List[Tuple[str, int]]):
+        """Record a fresh listing of a directory."""
+        row = (mtime, size, file_count, json.dumps(subdirs))
+        with self._lock:
+            self._seen.add(path)
+            self._listings[path] = row
+            self._updated[path] = row
+
+    def save(self, prune: bool = True):
+        """Write new listings, dropping directories not seen in this walk."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                if prune:
+                    stale = [(self.scope, p) for p in self._listings if p not in self._seen]
+                    conn.executemany('DELETE FROM directories WHERE scope = ? AND path = ?', stale)
+                conn.executemany(
+                    'INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?, ?)',
+                    [(self.scope, path) + row for path, row in self._updated.items()]
+                )
+        except sqlite3.Error:
+            pass
+        self._updated = {}
+
+    def compare_items(self, items: Dict[str, ItemState], complete: bool = True) -> Optional[Dict[str, Any]]:
+        """Compare reported items with the previous scan and store the new set.
+
+        Returns None when there is no previous scan to compare against,
+        otherwise lists of new and removed paths and a dict of changed
+        paths mapped to their previous state. After an incomplete walk,
+        items not reached may still exist, so the stored set is only
+        updated with the items seen and nothing is reported removed.
+        """
+        try:
+            with closing(self._connect()) as conn, conn:
+                previous = {
+                    path: (attrs, size, streams) for path, attrs, size, streams in conn.execute(
+                        'SELECT path, attributes, size, stream_count FROM items WHERE scope = ?',
+                        (self.scope,)
+                    )
+                }
+                has_baseline = conn.execute(
+                    'SELECT 1 FROM scans WHERE scope = ?', (self.scope,)
+                ).fetchone() is not None
+
+                if complete:
+                    conn.execute('INSERT OR REPLACE INTO scans VALUES (?, ?)', (self.scope, time.time()))
+                    conn.execute('DELETE FROM items WHERE scope = ?', (self.scope,))
+                conn.executemany(
+                    'INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)',
+                    [(self.scope, path) + tuple(state) for path, state in items.items()]
+                )
+        except sqlite3.Error:
+            return None
+
+        if not has_baseline:
+            return None
+
+        return {
+            'new': [p for p in items if p not in previous],
+            'removed': [p for p in previous if p not in items] if complete else [],
+            'changed': {p: previous[p] for p, state in items.items()
+                        if p in previous and previous[p] != tuple(state)}
+        }
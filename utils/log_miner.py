@@ -0,0 +1,240 @@
+"""Incremental mining of large Windows setup and servicing text logs."""
+
+import os
+import re
+import json
+import mmap
+from typing import List, Dict, Any, Optional
+
+from utils.paths import get_data_file
+
+
+class IncrementalLog:
+    """A text log read from the byte offset the previous scan reached.
+
+    The file is memory-mapped and searched with one compiled pattern in
+    chunks that end on line boundaries, so only matching lines are turned
+    into Python objects and logs of hundreds of MB are never read into
+    memory. The offset, a fingerprint of the first bytes (to notice the
+    log being replaced or rotated) and the timeline built so far are kept
+    in a state dict that the caller persists, so a later scan reads only
+    what was appended.
+    """
+
+    CHUNK_SIZE = 8 * 1024 * 1024
+    FINGERPRINT_SIZE = 256
+
+    # Most recent events kept per timeline key
+    MAX_EVENTS = 20
+
+    PATTERN: re.Pattern = re.compile(b'(?!)')
+
+    def __init__(self, path: str, state: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.state = state if state is not None else {}
+        self.state.setdefault('offset', 0)
+        self.state.setdefault('fingerprint', '')
+        self.state.setdefault('timeline', {})
+        self.bytes_read = 0
+
+    @property
+    def timeline(self) -> Dict[str, List[Dict[str, Any]]]:
+        return self.state['timeline']
+
+    def _add(self, key: str, event: Dict[str, Any]):
+        """Append an event to a key's timeline, keeping the most recent ones."""
+        events = self.timeline.setdefault(key, [])
+        events.append(event)
+        if len(events) > self.MAX_EVENTS:
+            del events[:len(events) - self.MAX_EVENTS]
+
+    def _handle(self, match: 're.Match'):
+        """Process one pattern match."""
+        raise NotImplementedError
+
+    def _resume_offset(self, end: int) -> int:
+        """Get the offset to resume from next time, given where this scan ended."""
+        return end
+
+    def scan(self) -> int:
+        """Read what was appended since the last scan and return the bytes read."""
+        self.bytes_read = 0
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return 0
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                known = bytes.fromhex(self.state['fingerprint'])
+                if data[:len(known)] != known or size < self.state['offset']:
+                    # A new or rotated log: start over
+                    self.state.update(offset=0, timeline={})
+                self.state['fingerprint'] = data[:self.FINGERPRINT_SIZE].hex()
+
+                # Stop before a line that is still being written
+                end = data.rfind(b'\n') + 1
+                position = self.state['offset']
+                while position < end:
+                    chunk_end = min(position + self.CHUNK_SIZE, end)
+                    if chunk_end < end:
+                        chunk_end = data.rfind(b'\n', position, chunk_end) + 1 or data.find(b'\n', chunk_end) + 1
+                    for match in self.PATTERN.finditer(data, position, chunk_end):
+                        self._handle(match)
+                    self.bytes_read += chunk_end - position
+                    position = chunk_end
+                self.state['offset'] = self._resume_offset(position)
+        return self.bytes_read
+
+    @staticmethod
+    def _text(value: Optional[bytes]) -> str:
+        return value.decode('utf-8', 'replace').strip() if value else ''
+
+
+class SetupApiLog(IncrementalLog):
+    """Device and driver package installs from setupapi.dev.log.
+
+    Each section (device install, driver package import, device removal)
+    becomes an event in the timeline of its device instance ID or INF,
+    with its start time, exit status and first error. A section still
+    open at the end of the file is read again on the next scan, once
+    its exit status has been written.
+    """
+
+    PATTERN = re.compile(
+        rb'^>>>  \[(?P<title>[^\r\n]*)\]'
+        rb'|^>>>  Section start (?P<start>\d{4}/\d\d/\d\d \d\d:\d\d:\d\d)'
+        rb'|^<<<  \[Exit status: (?P<status>[^\r\n\]]*)\]'
+        rb'|^!!!  (?P<error>[^\r\n]*)',
+        re.MULTILINE
+    )
+
+    def __init__(self, path: str, state: Optional[Dict[str, Any]] = None):
+        super().__init__(path, state)
+        self._section: Optional[Dict[str, Any]] = None
+        self._section_offset = 0
+
+    def _close_section(self, status: str = ''):
+        section = self._section
+        self._section = None
+        if section is None or not section['key']:
+            return
+        self._add(section['key'], {
+            'time': section['time'],
+            'action': section['action'],
+            'status': status,
+            'failed': not status.upper().startswith('SUCCESS'),
+            'error': section['error']
+        })
+
+    def _handle(self, match: 're.Match'):
+        kind = match.lastgroup
+        value = self._text(match.group(kind))
+        if kind == 'title':
+            self._close_section()
+            action, _, subject = value.partition(' - ')
+            self._section = {'key': subject.strip().upper(), 'action': action.strip(), 'time': '', 'error': ''}
+            self._section_offset = match.start()
+        elif self._section is None:
+            return
+        elif kind == 'start':
+            self._section['time'] = value.replace('/', '-')
+        elif kind == 'error':
+            if not self._section['error']:
+                self._section['error'] = value[:200]
+        elif kind == 'status':
+            self._close_section(value)
+
+    def _resume_offset(self, end: int) -> int:
+        return self._section_offset if self._section is not None else end
+
+    def get_failures(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the timelines whose most recent install failed."""
+        return {key: events for key, events in self.timeline.items()
+                if events and events[-1]['failed'] and events[-1]['status']}
+
+
+class CbsLog(IncrementalLog):
+    """Servicing (update and component) errors from CBS.log.
+
+    Error lines are grouped by the KB number they mention, or by the
+    component reporting them, with their time and HRESULT.
+    """
+
+    PATTERN = re.compile(
+        rb'^(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d), Error\s+(?P<component>\S+)\s+(?P<message>[^\r\n]*)',
+        re.MULTILINE
+    )
+
+    _KB = re.compile(r'KB\d{6,8}', re.IGNORECASE)
+    _HRESULT = re.compile(r'0x8[0-9a-f]{7}', re.IGNORECASE)
+
+    def _handle(self, match: 're.Match'):
+        message = self._text(match.group('message'))
+        kb = self._KB.search(message)
+        hresult = self._HRESULT.search(message)
+        self._add(kb.group(0).upper() if kb else self._text(match.group('component')), {
+            'time': self._text(match.group('time')),
+            'message': message[:200],
+            'hresult': hresult.group(0).lower() if hresult else ''
+        })
+
+
+class DriverHistory:
+    """Driver install and update servicing history mined from Windows logs.
+
+    Scans setupapi.dev.log and CBS.log incrementally and keeps their
+    timelines and offsets in a state file between runs.
+    """
+
+    STATE_FILE = 'log_history.json'
+
+    def __init__(self, windir: Optional[str] = None, state_file: Optional[str] = None):
+        windir = windir or os.environ.get('SystemRoot') or os.environ.get('WINDIR') or 'C:\\Windows'
+        self.setupapi_path = os.path.join(windir, 'INF', 'setupapi.dev.log')
+        self.cbs_path = os.path.join(windir, 'Logs', 'CBS', 'CBS.log')
+        self.state_file = state_file or get_data_file(self.STATE_FILE)
+        self.setupapi: Optional[SetupApiLog] = None
+        self.cbs: Optional[CbsLog] = None
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if isinstance(state, dict):
+                return state
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save(self, state: Dict[str, Any]):
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def scan(self) -> int:
+        """Read new log entries and return the bytes read."""
+        state = self._load()
+        self.setupapi = SetupApiLog(self.setupapi_path, state.setdefault('setupapi', {}))
+        self.cbs = CbsLog(self.cbs_path, state.setdefault('cbs', {}))
+        read = self.setupapi.scan() + self.cbs.scan()
+        self._save(state)
+        return read
+
+    def get_device_history(self, device_id: str) -> List[Dict[str, Any]]:
+        """Get the install timeline of a device instance ID."""
+        if self.setupapi is None:
+            return []
+        return self.setupapi.timeline.get(device_id.upper(), [])
+
+    def get_failed_installs(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get devices and driver packages whose last install failed."""
+        return self.setupapi.get_failures() if self.setupapi is not None else {}
+
+    def get_update_errors(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get servicing errors by KB number or component."""
+        return dict(self.cbs.timeline) if self.cbs is not None else {}
@@ -0,0 +1,367 @@
+"""Raw NTFS $MFT parser for whole-volume attribute and stream enumeration."""
+
+import os
+import mmap
+import struct
+from array import array
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+
+class MftParser:
+    """Decodes fixed-size FILE records from an $MFT image or a live volume.
+
+    Each in-use record yields its file attributes, long file name, parent
+    directory reference, size and named $DATA streams. Images are read
+    sequentially through a memory map; live volumes are read by following
+    the $MFT data runs from the boot sector.
+    """
+
+    # FILE record header fields
+    _HEADER = struct.Struct('<4sHHQHHHHIIQH')
+    _ATTR_HEADER = struct.Struct('<IIBBHHH')
+    _RESIDENT = struct.Struct('<IH')
+    _NON_RESIDENT_SIZE = struct.Struct('<Q')
+
+    FLAG_IN_USE = 0x01
+    FLAG_DIRECTORY = 0x02
+
+    ATTR_STANDARD_INFORMATION = 0x10
+    ATTR_ATTRIBUTE_LIST = 0x20
+    ATTR_FILE_NAME = 0x30
+    ATTR_DATA = 0x80
+    ATTR_END = 0xFFFFFFFF
+
+    # $FILE_NAME namespaces, most preferred first
+    NAMESPACE_PRIORITY = {1: 0, 3: 0, 0: 1, 2: 2}
+
+    ROOT_RECORD = 5
+    EXTEND_RECORD = 11
+    FIRST_USER_RECORD = 24
+    SECTOR_SIZE = 512
+    DEFAULT_RECORD_SIZE = 1024
+    READ_CHUNK = 4 * 1024 * 1024
+
+    def __init__(self, record_size: Optional[int] = None):
+        self.record_size = record_size
+        self.records_read = 0
+        self.bytes_read = 0
+        # Records in the table being parsed, known before the first is yielded
+        self.record_count = 0
+
+    def _apply_fixup(self, record: bytearray) -> bool:
+        """Restore the sector-end bytes replaced by the update sequence array."""
+        usa_offset, usa_count = struct.unpack_from('<HH', record, 4)
+        if usa_count == 0 or usa_offset + usa_count * 2 > len(record):
+            return False
+        usn = record[usa_offset:usa_offset + 2]
+        for i in range(1, usa_count):
+            end = i * self.SECTOR_SIZE
+            if end > len(record):
+                break
+            if record[end - 2:end] != usn:
+                return False
+            record[end - 2:end] = record[usa_offset + i * 2:usa_offset + i * 2 + 2]
+        return True
+
+    def decode_record(self, data, offset: int, number: int) -> Optional[Dict[str, Any]]:
+        """Decode one FILE record, or return None if unused or corrupt."""
+        if data[offset:offset + 4] != b'FILE':
+            return None
+        try:
+            return self._decode_record(data, offset, number)
+        except (struct.error, IndexError, ValueError):
+            return None
+
+    def _decode_record(self, data, offset: int, number: int) -> Optional[Dict[str, Any]]:
+        flags = struct.unpack_from('<H', data, offset + 22)[0]
+        if not flags & self.FLAG_IN_USE:
+            return None
+
+        record = bytearray(data[offset:offset + self.record_size])
+        if not self._apply_fixup(record):
+            return None
+
+        (_, _, _, _, sequence, _, attrs_offset, flags,
+         bytes_in_use, _, base_reference, _) = self._HEADER.unpack_from(record, 0)
+
+        entry = {
+            'record': number,
+            'sequence': sequence,
+            'base': base_reference & 0xFFFFFFFFFFFF,
+            'is_dir': bool(flags & self.FLAG_DIRECTORY),
+            'attributes': 0,
+            'name': None,
+            'parent': None,
+            'size': 0,
+            'streams': [],
+            'extended': False
+        }
+        name_rank = 99
+
+        pos = attrs_offset
+        limit = min(bytes_in_use, len(record))
+        while pos + 16 <= limit:
+            attr_type, attr_length, non_resident, name_length, name_offset, _, _ = \
+                self._ATTR_HEADER.unpack_from(record, pos)
+            if attr_type == self.ATTR_END or attr_length == 0 or pos + attr_length > limit:
+                break
+
+            if non_resident:
+                value_offset, value_length = None, None
+                size = self._NON_RESIDENT_SIZE.unpack_from(record, pos + 48)[0] if attr_length >= 56 else 0
+            else:
+                if attr_length < 24:
+                    break
+                value_length, value_offset = self._RESIDENT.unpack_from(record, pos + 16)
+                value_offset += pos
+                if value_offset + value_length > pos + attr_length:
+                    # Value runs past its attribute: the record is corrupt
+                    return None
+                size = value_length
+
+            if attr_type == self.ATTR_STANDARD_INFORMATION and value_offset is not None:
+                if value_length >= 36:
+                    entry['attributes'] = struct.unpack_from('<I', record, value_offset + 32)[0]
+
+            elif attr_type == self.ATTR_FILE_NAME and value_offset is not None and value_length >= 66:
+                parent_reference = struct.unpack_from('<Q', record, value_offset)[0]
+                length, namespace = record[value_offset + 64], record[value_offset + 65]
+                rank = self.NAMESPACE_PRIORITY.get(namespace, 3)
+                if rank < name_rank and 66 + length * 2 <= value_length:
+                    name_rank = rank
+                    start = value_offset + 66
+                    entry['name'] = record[start:start + length * 2].decode('utf-16-le', 'replace')
+                    entry['parent'] = parent_reference & 0xFFFFFFFFFFFF
+
+            elif attr_type == self.ATTR_ATTRIBUTE_LIST:
+                entry['extended'] = True
+
+            elif attr_type == self.ATTR_DATA:
+                if name_length:
+                    start = pos + name_offset
+                    stream = record[start:start + name_length * 2].decode('utf-16-le', 'replace')
+                    entry['streams'].append((stream, size))
+                else:
+                    entry['size'] = size
+
+            pos += attr_length
+
+        return entry
+
+    def _detect_record_size(self, data) -> int:
+        """Read the record size from the first record, defaulting to 1 KB."""
+        if self.record_size:
+            return self.record_size
+        if len(data) >= 32 and data[0:4] == b'FILE':
+            allocated = struct.unpack_from('<I', data, 28)[0]
+            if allocated in (1024, 2048, 4096):
+                return allocated
+        return self.DEFAULT_RECORD_SIZE
+
+    def parse_image(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Stream every in-use record from an exported $MFT file."""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self.record_size = self._detect_record_size(mm)
+                count = len(mm) // self.record_size
+                self.record_count = count
+                for number in range(count):
+                    entry = self.decode_record(mm, number * self.record_size, number)
+                    if entry is not None:
+                        yield entry
+                self.records_read += count
+                self.bytes_read += count * self.record_size
+
+    def _parse_runs(self, record: bytes, pos: int) -> List[Tuple[int, int]]:
+        """Decode a non-resident attribute's data runs into (cluster, count) pairs."""
+        runs = []
+        run_pos = pos + struct.unpack_from('<H', record, pos + 32)[0]
+        cluster = 0
+        while run_pos < len(record) and record[run_pos] != 0:
+            header = record[run_pos]
+            length_size, offset_size = header & 0x0F, header >> 4
+            run_pos += 1
+            count = int.from_bytes(record[run_pos:run_pos + length_size], 'little')
+            run_pos += length_size
+            if offset_size:
+                cluster += int.from_bytes(record[run_pos:run_pos + offset_size], 'little', signed=True)
+                runs.append((cluster, count))
+            run_pos += offset_size
+        return runs
+
+    def parse_volume(self, volume_path: str) -> Iterator[Dict[str, Any]]:
+        """Stream every in-use record of a live volume such as \\\\.\\C:.
+
+        Requires administrator rights on Windows. Reads are kept aligned to
+        the cluster size, as raw volume handles require.
+        """
+        with open(volume_path, 'rb', buffering=0) as volume:
+            boot = volume.read(self.SECTOR_SIZE)
+            if boot[3:11] != b'NTFS    ':
+                return
+            bytes_per_sector = struct.unpack_from('<H', boot, 11)[0]
+            cluster_size = bytes_per_sector * boot[13]
+            mft_cluster = struct.unpack_from('<Q', boot, 48)[0]
+            clusters_per_record = struct.unpack_from('<b', boot, 64)[0]
+            self.record_size = (cluster_size * clusters_per_record if clusters_per_record > 0
+                                else 1 << -clusters_per_record)
+
+            # Record 0 is $MFT itself; its unnamed $DATA runs locate the table
+            volume.seek(mft_cluster * cluster_size)
+            first = bytearray(volume.read(max(self.record_size, cluster_size))[:self.record_size])
+            if not self._apply_fixup(first):
+                return
+
+            runs = []
+            pos = struct.unpack_from('<H', first, 20)[0]
+            while pos + 16 <= len(first):
+                attr_type, attr_length, non_resident, name_length = struct.unpack_from('<IIBB', first, pos)
+                if attr_type == self.ATTR_END or attr_length == 0:
+                    break
+                if attr_type == self.ATTR_DATA and non_resident and not name_length:
+                    runs = self._parse_runs(first, pos)
+                    break
+                pos += attr_length
+
+            self.record_count = sum(count for _, count in runs) * cluster_size // self.record_size
+            number = 0
+            chunk_clusters = max(1, self.READ_CHUNK // cluster_size)
+            for start_cluster, count in runs:
+                done = 0
+                while done < count:
+                    take = min(chunk_clusters, count - done)
+                    volume.seek((start_cluster + done) * cluster_size)
+                    data = volume.read(take * cluster_size)
+                    done += take
+                    self.bytes_read += len(data)
+                    for offset in range(0, len(data) - self.record_size + 1, self.record_size):
+                        entry = self.decode_record(data, offset, number)
+                        number += 1
+                        if entry is not None:
+                            yield entry
+            self.records_read += number
+
+    def parse(self, source: str) -> Iterator[Dict[str, Any]]:
+        """Parse an $MFT image file or a raw volume path."""
+        if source.startswith('\\\\.\\'):
+            return self.parse_volume(source)
+        return self.parse_image(source)
+
+
+class MftIndex:
+    """Resolves full paths for records of interest from a single $MFT pass.
+
+    Directory names and parent references are kept in typed arrays indexed
+    by record number, with names interned, so a whole volume's tree fits in
+    a few bytes per record. Paths are only built for the entries kept.
+    """
+
+    NOT_A_DIRECTORY = -1
+
+    def __init__(self, parser: Optional[MftParser] = None):
+        self.parser = parser or MftParser()
+        self.entries: List[Dict[str, Any]] = []
+        self._reset()
+
+    def _reset(self):
+        """Clear the directory tables."""
+        self.dir_parent = array('q')
+        self.dir_name = array('l')
+        self.file_sizes = array('q')
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._paths: Dict[int, str] = {}
+
+    def _grow(self, record: int):
+        """Extend the tables to cover a record number."""
+        missing = record + 1 - len(self.dir_parent)
+        if missing > 0:
+            self.dir_parent.extend([self.NOT_A_DIRECTORY] * missing)
+            self.dir_name.extend([0] * missing)
+            self.file_sizes.extend([0] * missing)
+
+    def _is_directory(self, record: int) -> bool:
+        """Check whether a record number is a known directory."""
+        return 0 <= record < len(self.dir_parent) and self.dir_parent[record] != self.NOT_A_DIRECTORY
+
+    def load(self, source: str, keep=None) -> List[Dict[str, Any]]:
+        """Read every record, keeping directories and entries accepted by keep."""
+        self._reset()
+        self.entries = []
+        extensions = {}
+        for entry in self.parser.parse(source):
+            if entry['base']:
+                # Extension records carry overflow attributes of their base record
+                extensions.setdefault(entry['base'], []).extend(entry['streams'])
+                continue
+            if entry['is_dir'] and entry['name'] is not None:
+                self._grow(entry['record'])
+                name_id = self._name_ids.get(entry['name'])
+                if name_id is None:
+                    name_id = self._name_ids[entry['name']] = len(self._names)
+                    self._names.append(entry['name'])
+                self.dir_parent[entry['record']] = entry['parent']
+                self.dir_name[entry['record']] = name_id
+            elif entry['parent'] is not None and entry['parent'] < self.parser.record_count:
+                # Directory sizes cover the files directly inside, as DirectoryWalker does;
+                # parents past the end of the table are corrupt and never sized from
+                self._grow(entry['parent'])
+                self.file_sizes[entry['parent']] += entry['size']
+            # Records with an attribute list may gain streams from later records
+            if keep is None or entry['extended'] or keep(entry):
+                self.entries.append(entry)
+
+        for entry in self.entries:
+            if entry['record'] in extensions:
+                entry['streams'].extend(extensions[entry['record']])
+        if keep is not None:
+            self.entries = [e for e in self.entries if keep(e)]
+
+        return self.entries
+
+    def get_size(self, record: int) -> int:
+        """Get the total size of the files directly inside a directory."""
+        return self.file_sizes[record] if 0 <= record < len(self.file_sizes) else 0
+
+    def get_path(self, record: int, drive: str = 'C:') -> str:
+        """Build the full path of a directory record."""
+        if record in self._paths:
+            return self._paths[record]
+
+        parts = []
+        current = record
+        seen = set()
+        while current != MftParser.ROOT_RECORD and self._is_directory(current) and current not in seen:
+            seen.add(current)
+            if current in self._paths:
+                parts.append(self._paths[current])
+                break
+            parts.append(self._names[self.dir_name[current]])
+            current = self.dir_parent[current]
+        else:
+            parts.append(drive)
+
+        path = '\\'.join(reversed(parts))
+        self._paths[record] = path
+        return path
+
+    def is_metafile(self, entry: Dict[str, Any]) -> bool:
+        """Check whether an entry is an NTFS metafile or lives under $Extend."""
+        if entry['record'] < MftParser.FIRST_USER_RECORD:
+            return True
+        current = entry['parent']
+        seen = set()
+        while self._is_directory(current) and current != MftParser.ROOT_RECORD and current not in seen:
+            if current == MftParser.EXTEND_RECORD:
+                return True
+            seen.add(current)
+            current = self.dir_parent[current]
+        return False
+
+    def get_entry_path(self, entry: Dict[str, Any], drive: str = 'C:') -> str:
+        """Build the full path of any loaded entry."""
+        if entry['record'] == MftParser.ROOT_RECORD:
+            return drive + '\\'
+        return self.get_path(entry['parent'], drive) + '\\' + (entry['name'] or f"<record {entry['record']}>")
@@ -0,0 +1,322 @@
+"""Edit-distance and confusable-character index for process name mimicry."""
+
+import os
+import unicodedata
+from typing import List, Dict, Set, Tuple, Optional, Iterable
+
+
+class EditDistanceIndex:
+    """Filtered index for edit-distance lookups over a fixed word set.
+
+    Each word is stored with the edit distance it tolerates. Words that
+    tolerate one edit are stored under themselves and every single
+    deletion of themselves; a word one edit from a query always shares
+    such a variant with it, so a query only looks up its own n + 1
+    variants. Words that tolerate more are bucketed by length with a bit
+    mask of the character pairs (bigrams) they contain: each edit
+    changes the length by at most one and destroys at most three
+    bigrams, so only the neighbouring length buckets are read and only
+    words missing few enough bigrams from the query's mask reach the
+    banded distance check.
+    """
+
+    MASK_BITS = 256
+
+    def __init__(self, words: Iterable[str] = (), max_distance: int = 2):
+        self.max_distance = max_distance
+        self.widest = 0
+        self.deletions: Dict[str, Set[str]] = {}
+        self.deletion_lengths: Set[int] = set()
+        self.buckets: Dict[int, List[Tuple[str, int, int]]] = {}
+        for word in words:
+            self.add(word)
+
+    @classmethod
+    def _mask(cls, word: str) -> int:
+        return sum({1 << ((ord(first) * 31 + ord(second)) % cls.MASK_BITS)
+                    for first, second in zip(word, word[1:])})
+
+    @staticmethod
+    def _deletions(word: str) -> Set[str]:
+        """The word and every string one deletion away from it."""
+        return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+    @staticmethod
+    def distance(a: str, b: str, limit: Optional[int] = None) -> int:
+        """Optimal string alignment distance (Levenshtein plus transpositions).
+
+        With a limit, only cells within limit of the diagonal are filled
+        and limit + 1 is returned as soon as the distance must exceed it.
+        """
+        if limit is None:
+            limit = max(len(a), len(b))
+        if abs(len(a) - len(b)) > limit:
+            return limit + 1
+        over = limit + 1
+        previous, rows = None, [list(range(len(b) + 1))]
+        for i in range(1, len(a) + 1):
+            row = [over] * (len(b) + 1)
+            row[0] = i
+            above = rows[-1]
+            for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+                cost = a[i - 1] != b[j - 1]
+                value = min(above[j] + 1, row[j - 1] + 1, above[j - 1] + cost)
+                if previous is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                    value = min(value, previous[j - 2] + 1)
+                row[j] = value
+            if min(row) > limit:
+                return over
+            previous = above
+            rows = [row]
+        return min(rows[-1][-1], over)
+
+    def add(self, word: str, max_distance: Optional[int] = None):
+        """Insert a word, matched within max_distance (the index default if None)."""
+        limit = self.max_distance if max_distance is None else max_distance
+        if limit == 1:
+            for variant in self._deletions(word):
+                self.deletions.setdefault(variant, set()).add(word)
+            self.deletion_lengths.update((len(word) - 1, len(word), len(word) + 1))
+            return
+        self.widest = max(self.widest, limit)
+        self.buckets.setdefault(len(word), []).append((word, self._mask(word), limit))
+
+    def query(self, word: str) -> List[Tuple[int, str]]:
+        """Find all indexed words within their distance of word, nearest first."""
+        results = []
+        if len(word) in self.deletion_lengths:
+            candidates = set()
+            for variant in self._deletions(word):
+                candidates.update(self.deletions.get(variant, ()))
+            for candidate in candidates:
+                d = self.distance(word, candidate, 1)
+                if d <= 1:
+                    results.append((d, candidate))
+
+        query_mask = None
+        for length in range(len(word) - self.widest, len(word) + self.widest + 1):
+            bucket = self.buckets.get(length)
+            if not bucket:
+                continue
+            if query_mask is None:
+                query_mask = self._mask(word)
+            difference = abs(length - len(word))
+            for candidate, mask, limit in bucket:
+                if difference > limit or bin(mask & ~query_mask).count('1') > 3 * limit:
+                    continue
+                d = self.distance(word, candidate, limit)
+                if d <= limit:
+                    results.append((d, candidate))
+
+        results.sort()
+        return results
+
+
+class MimicryDetector:
+    """Detects process names that imitate protected Windows system binaries.
+
+    Names are reduced to a confusable "skeleton" (bitness and digit
+    suffixes dropped, digit and Unicode look-alikes folded to Latin
+    letters, executable extensions unified) and looked up among the
+    protected skeletons: exactly for very short names, and in an
+    edit-distance index otherwise, so typos, transpositions and
+    homoglyphs are caught without enumerating them. Genuine images that
+    happen to resemble a protected name are known and never reported.
+    """
+
+    PROTECTED_NAMES = [
+        # Core session and security
+        'system', 'smss.exe', 'csrss.exe', 'wininit.exe', 'winlogon.exe',
+        'services.exe', 'lsass.exe', 'lsaiso.exe', 'lsm.exe', 'svchost.exe',
+        'fontdrvhost.exe', 'dwm.exe', 'logonui.exe', 'userinit.exe',
+        'sihost.exe', 'ctfmon.exe', 'conhost.exe', 'dllhost.exe',
+        'taskhost.exe', 'taskhostw.exe', 'taskhostex.exe', 'taskeng.exe', 'taskmgr.exe',
+        'explorer.exe', 'runtimebroker.exe', 'searchhost.exe',
+        'searchindexer.exe', 'searchprotocolhost.exe', 'searchfilterhost.exe',
+        'searchapp.exe', 'searchui.exe', 'startmenuexperiencehost.exe',
+        'shellexperiencehost.exe', 'textinputhost.exe', 'applicationframehost.exe',
+        'systemsettings.exe', 'systemsettingsbroker.exe', 'lockapp.exe',
+        'smartscreen.exe', 'securityhealthservice.exe', 'securityhealthsystray.exe',
+        'msmpeng.exe', 'nissrv.exe', 'mpcmdrun.exe', 'msmpengcp.exe',
+        'sgrmbroker.exe', 'secure system', 'registry', 'memory compression',
+        'wudfhost.exe', 'spoolsv.exe', 'audiodg.exe', 'wlanext.exe',
+        'dashost.exe', 'wmiprvse.exe', 'wmiadap.exe', 'wmiapsrv.exe',
+        'unsecapp.exe', 'sppsvc.exe', 'sppextcomobj.exe', 'slui.exe',
+        'msdtc.exe', 'vssvc.exe', 'trustedinstaller.exe', 'tiworker.exe',
+        'wuauclt.exe', 'usoclient.exe', 'musnotification.exe',
+        'musnotifyicon.exe', 'mousocoreworker.exe', 'wermgr.exe',
+        'werfault.exe', 'werfaultsecure.exe', 'compattelrunner.exe',
+        'devicecensus.exe', 'backgroundtaskhost.exe', 'backgroundtransferhost.exe',
+        'browser_broker.exe', 'gamebarpresencewriter.exe', 'gamebar.exe',
+        'yourphone.exe', 'phoneexperiencehost.exe', 'useroobebroker.exe',
+        'credentialuibroker.exe', 'consent.exe', 'wsmprovhost.exe',
+        'winrshost.exe', 'sdclt.exe', 'sdiagnhost.exe', 'msiexec.exe',
+        'wsl.exe', 'wslhost.exe', 'wslservice.exe', 'mmc.exe', 'regedit.exe', 'regedt32.exe', 'reg.exe',
+        # Command interpreters and script hosts
+        'cmd.exe', 'powershell.exe', 'powershell_ise.exe', 'pwsh.exe',
+        'wscript.exe', 'cscript.exe', 'mshta.exe', 'rundll32.exe',
+        'regsvr32.exe', 'regasm.exe', 'regsvcs.exe', 'installutil.exe',
+        'msbuild.exe', 'cmstp.exe', 'certutil.exe', 'bitsadmin.exe',
+        'schtasks.exe', 'at.exe', 'wmic.exe', 'sc.exe', 'net.exe',
+        'net1.exe', 'netsh.exe', 'ipconfig.exe', 'nslookup.exe',
+        'ping.exe', 'tracert.exe', 'arp.exe', 'route.exe', 'netstat.exe',
+        'whoami.exe', 'hostname.exe', 'systeminfo.exe', 'tasklist.exe',
+        'taskkill.exe', 'attrib.exe', 'icacls.exe', 'takeown.exe',
+        'cacls.exe', 'xcopy.exe', 'robocopy.exe', 'forfiles.exe',
+        'findstr.exe', 'find.exe', 'more.com', 'tree.com', 'chcp.com',
+        'mode.com', 'format.com', 'diskpart.exe', 'chkdsk.exe',
+        'defrag.exe', 'cleanmgr.exe', 'dism.exe', 'sfc.exe', 'bcdedit.exe',
+        'bcdboot.exe', 'vssadmin.exe', 'wbadmin.exe', 'wevtutil.exe',
+        'auditpol.exe', 'gpupdate.exe', 'gpresult.exe', 'secedit.exe',
+        'runas.exe', 'shutdown.exe', 'logoff.exe', 'msconfig.exe',
+        'control.exe', 'notepad.exe', 'write.exe', 'wordpad.exe',
+        'calc.exe', 'mspaint.exe', 'snippingtool.exe', 'charmap.exe',
+        'eventvwr.exe', 'perfmon.exe', 'resmon.exe', 'compmgmt.exe',
+        'devmgmt.msc', 'services.msc', 'taskschd.msc', 'mstsc.exe',
+        'msra.exe', 'quickassist.exe', 'rdpclip.exe', 'tstheme.exe',
+        'winver.exe', 'odbcad32.exe', 'fodhelper.exe',
+        'computerdefaults.exe', 'eudcedit.exe', 'osk.exe', 'magnify.exe',
+        'narrator.exe', 'utilman.exe', 'sethc.exe', 'displayswitch.exe',
+        'atbroker.exe', 'presentationhost.exe', 'hh.exe', 'ieexec.exe',
+        'iexplore.exe', 'msedge.exe', 'msedgewebview2.exe', 'onedrive.exe',
+        'filecoauth.exe', 'dfsvc.exe', 'csc.exe', 'vbc.exe', 'jsc.exe',
+        'ngen.exe', 'ngentask.exe', 'aspnet_compiler.exe', 'addinprocess.exe',
+        'dnscmd.exe', 'esentutl.exe', 'expand.exe', 'extrac32.exe',
+        'makecab.exe', 'replace.exe', 'print.exe', 'pcalua.exe',
+        'pcwrun.exe', 'msdt.exe', 'verclsid.exe', 'wsreset.exe',
+        'ie4uinit.exe', 'infdefaultinstall.exe', 'mavinject.exe',
+        'odbcconf.exe', 'scriptrunner.exe', 'syncappvpublishingserver.exe',
+        'wab.exe', 'winword.exe', 'excel.exe', 'powerpnt.exe', 'outlook.exe',
+        'msaccess.exe', 'mspub.exe', 'onenote.exe', 'visio.exe',
+        'ntoskrnl.exe', 'winload.exe', 'winresume.exe',
+    ]
+
+    # Real system and Office images close to a protected name
+    KNOWN_NAMES = [
+        # Windows
+        'cmdl32.exe', 'nbtstat.exe', 'tracerpt.exe', 'pathping.exe', 'netcfg.exe',
+        'netiougc.exe', 'netbtugc.exe', 'nltest.exe', 'setx.exe', 'sort.exe',
+        'where.exe', 'whoami.exe', 'clip.exe', 'cipher.exe', 'cmdkey.exe',
+        'comp.exe', 'fc.exe', 'fsutil.exe', 'label.exe', 'msg.exe', 'query.exe',
+        'quser.exe', 'qwinsta.exe', 'rwinsta.exe', 'recover.exe', 'regini.exe',
+        'reset.exe', 'tar.exe', 'curl.exe', 'timeout.exe', 'typeperf.exe',
+        'tzutil.exe', 'waitfor.exe', 'wecutil.exe', 'wusa.exe', 'dxdiag.exe',
+        'dwwin.exe', 'csrstub.exe', 'lsaiso.exe', 'sdbinst.exe', 'sigverif.exe',
+        'sndvol.exe', 'systray.exe', 'dialer.exe', 'finger.exe', 'ftp.exe',
+        'hdwwiz.exe', 'iexpress.exe', 'mobsync.exe', 'msinfo32.exe', 'ntprint.exe',
+        'pcaui.exe', 'psr.exe', 'rstrui.exe', 'sysedit.exe', 'xpsrchvw.exe',
+        'wextract.exe', 'verifier.exe', 'cttune.exe', 'certreq.exe', 'dccw.exe',
+        'dpiscaling.exe', 'driverquery.exe', 'eventcreate.exe', 'getmac.exe',
+        'mrt.exe', 'msiexec.exe', 'mspaint.exe', 'paint.exe', 'pnputil.exe',
+        'powercfg.exe', 'printui.exe', 'prevhost.exe', 'rekeywiz.exe', 'sethc.exe',
+        'srtasks.exe', 'svchost.exe', 'tasklist.exe', 'tcpsvcs.exe', 'wiaacmgr.exe',
+        'winsat.exe', 'wscript.exe', 'wsqmcons.exe', 'wuapihost.exe', 'usocoreworker.exe',
+        # Office
+        'onenotem.exe', 'onenoteim.exe', 'lync.exe', 'lync99.exe', 'ms-teams.exe',
+        'teams.exe', 'groove.exe', 'infopath.exe', 'excelcnv.exe', 'wordconv.exe',
+        'graph.exe', 'selfcert.exe', 'setlang.exe', 'msoia.exe', 'msosync.exe',
+        'msouc.exe', 'msoev.exe', 'msotd.exe', 'msoasb.exe', 'msqry32.exe',
+        'officeclicktorun.exe', 'officec2rclient.exe', 'ocpubmgr.exe',
+        'sdxhelper.exe', 'protocolhandler.exe', 'clview.exe', 'cnfnot32.exe',
+        'ucmapi.exe', 'olicenseheartbeat.exe', 'msoadfsb.exe', 'msoxmled.exe',
+        # Common third-party programs
+        'notepad2.exe', 'notepad3.exe', 'services64.exe',
+    ]
+
+    # Single-character look-alikes folded to a canonical Latin letter
+    CONFUSABLES = {
+        '0': 'o', '1': 'l', 'i': 'l', '!': 'l', '|': 'l', '3': 'e',
+        '4': 'a', '@': 'a', '5': 's', '$': 's', '7': 't', '8': 'b',
+        '9': 'g', '6': 'b',
+        # Cyrillic
+        'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e',
+        'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o',
+        'р': 'p', 'с': 'c', 'т': 't', 'у': 'y',
+        'х': 'x', 'ѕ': 's', 'і': 'l', 'ї': 'l',
+        'ј': 'j', 'ԁ': 'd', 'ԛ': 'q', 'ԝ': 'w',
+        # Greek
+        'α': 'a', 'β': 'b', 'ε': 'e', 'ι': 'l',
+        'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p',
+        'τ': 't', 'υ': 'u', 'χ': 'x',
+    }
+
+    # Multi-character look-alikes, applied after single-character folding
+    CONFUSABLE_SEQUENCES = [('rn', 'm'), ('vv', 'w'), ('cl', 'd')]
+
+    # Extensions Windows will execute directly, used for extension swaps
+    EXECUTABLE_EXTENSIONS = {'.exe', '.com', '.scr', '.pif', '.bat', '.cmd'}
+
+    _FOLD = str.maketrans(CONFUSABLES)
+
+    def __init__(self, protected_names: Optional[Iterable[str]] = None,
+                 known_names: Optional[Iterable[str]] = None):
+        names = protected_names if protected_names is not None else self.PROTECTED_NAMES
+        known = known_names if known_names is not None else self.KNOWN_NAMES
+        self.protected = {name.lower() for name in names}
+        self.known = self.protected | {name.lower() for name in known}
+        self.by_skeleton: Dict[str, str] = {}
+        for name in sorted(self.protected):
+            self.by_skeleton.setdefault(self.skeleton(name), name)
+
+        # Only skeletons that tolerate edits are indexed; the rest must match exactly
+        self.index = EditDistanceIndex()
+        for skeleton, name in self.by_skeleton.items():
+            distance = self._allowed_distance(skeleton)
+            if distance:
+                self.index.add(skeleton, distance)
+        self._cache: Dict[str, Optional[str]] = {}
+
+    def skeleton(self, name: str) -> str:
+        """Reduce a name to its confusable skeleton."""
+        stem, ext = os.path.splitext(name.lower())
+        # Bitness and digit suffixes (rundll.exe, svchost64.exe) and extension swaps (csrss.com)
+        stem = stem.rstrip('0123456789') or stem
+        if ext in self.EXECUTABLE_EXTENSIONS:
+            ext = '.exe'
+
+        text = stem + ext
+        if not text.isascii():
+            text = ''.join(
+                ch for ch in unicodedata.normalize('NFKD', text)
+                if not unicodedata.combining(ch) and not unicodedata.category(ch).startswith('C')
+            )
+        folded = text.translate(self._FOLD)
+        for sequence, replacement in self.CONFUSABLE_SEQUENCES:
+            folded = folded.replace(sequence, replacement)
+        return folded
+
+    @staticmethod
+    def _allowed_distance(skeleton: str) -> int:
+        """Edit distance tolerated from a protected skeleton.
+
+        A single edit on names of four characters or fewer (cmd, net,
+        calc, ping) reaches countless unrelated programs, so those only
+        match through look-alike characters; real images one edit from a
+        longer name (nbtstat/netstat, paint/print) are in KNOWN_NAMES.
+        """
+        stem = len(os.path.splitext(skeleton)[0])
+        if stem >= 9:
+            return 2
+        if stem >= 5:
+            return 1
+        return 0
+
+    def _find(self, name_lower: str) -> Optional[str]:
+        """Find the protected name imitated by name_lower, if any."""
+        if name_lower in self.known:
+            return None
+
+        skeleton = self.skeleton(name_lower)
+        target = self.by_skeleton.get(skeleton)
+        if target is not None:
+            return target
+
+        matches = self.index.query(skeleton)
+        return self.by_skeleton[matches[0][1]] if matches else None
+
+    def check(self, name: str) -> Optional[str]:
+        """Return the protected name that name imitates, or None."""
+        name_lower = name.lower()
+        if name_lower not in self._cache:
+            self._cache[name_lower] = self._find(name_lower)
+        return self._cache[name_lower]
@@ -0,0 +1,83 @@
+"""Compact parent-pointer path storage for large filesystem scans."""
+
+import os
+from array import array
+from typing import List, Dict, Optional, Iterator
+
+
+class PathStore:
+    """Stores filesystem entries as nodes of a parent-pointer tree.
+
+    Each node holds an interned name ID and its parent's node ID, with
+    attributes, size, file count and depth kept in parallel typed arrays
+    rather than one dict per entry. Full path strings are only built on
+    request, for display or export. Root nodes store their whole path as
+    their name.
+    """
+
+    NO_PARENT = -1
+    UNKNOWN = -1
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self.parent = array('q')
+        self.name = array('l')
+        self.attributes = array('L')
+        self.size = array('q')
+        self.file_count = array('q')
+        self.depth = array('H')
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def intern(self, name: str) -> int:
+        """Get the ID of a name component, adding it if new."""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_ids[name] = name_id
+        return name_id
+
+    def component(self, name_id: int) -> str:
+        """Get a name component by ID."""
+        return self._names[name_id]
+
+    def add(self, parent: int, name: str, attributes: int = 0, depth: int = 0) -> int:
+        """Add an entry under a parent node (NO_PARENT for a root) and get its ID."""
+        node = len(self.parent)
+        self.parent.append(parent)
+        self.name.append(self.intern(name))
+        self.attributes.append(attributes)
+        self.size.append(self.UNKNOWN)
+        self.file_count.append(self.UNKNOWN)
+        self.depth.append(depth)
+        return node
+
+    def get_name(self, node: int) -> str:
+        """Get the last path component of a node."""
+        return self._names[self.name[node]]
+
+    def get_size(self, node: int) -> Optional[int]:
+        """Get a node's size, or None if it was never measured."""
+        size = self.size[node]
+        return None if size == self.UNKNOWN else size
+
+    def get_path(self, node: int) -> str:
+        """Build the full path string of a node."""
+        parts = []
+        while self.parent[node] != self.NO_PARENT:
+            parts.append(self._names[self.name[node]])
+            node = self.parent[node]
+        root = self._names[self.name[node]]
+        if not parts:
+            return root
+        parts.reverse()
+        return root.rstrip('\\/') + os.sep + os.sep.join(parts)
+
+    def iter_nodes(self, min_depth: int = 0) -> Iterator[int]:
+        """Iterate node IDs at or below a depth."""
+        for node, depth in enumerate(self.depth):
+            if depth >= min_depth:
+                yield node
@@ -0,0 +1,22 @@
+"""Local data directory helpers for rule files and caches."""
+
+import os
+
+
+APP_DIR_NAME = 'SystemDiagnostic'
+
+
+def get_data_dir() -> str:
+    """Get the per-user data directory, creating it if needed."""
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    path = os.path.join(base, APP_DIR_NAME)
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        pass
+    return path
+
+
+def get_data_file(name: str) -> str:
+    """Get the full path of a file in the data directory."""
+    return os.path.join(get_data_dir(), name)
@@ -0,0 +1,295 @@
+"""Reader for Windows Prefetch (.pf) files."""
+
+import os
+import struct
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+from utils.regf import filetime_to_datetime
+
+
+class XpressHuffman:
+    """Pure Python decompressor for the XPRESS Huffman format ([MS-XCA] 2.2).
+
+    Windows 8.1 and later store prefetch files compressed with it. Output
+    is produced in 64 KiB blocks, each preceded by a 256-byte table of
+    4-bit code lengths for its 512 symbols: 256 literals and 256 match
+    symbols packing a length and the bit length of the match offset.
+    """
+
+    BLOCK_SIZE = 65536
+    TABLE_SIZE = 256
+    MAX_CODE_LENGTH = 15
+
+    @classmethod
+    def _build_table(cls, lengths: List[int]) -> List[int]:
+        """Build a lookup from the next 15 bits to the symbol they start with."""
+        table = [-1] * (1 << cls.MAX_CODE_LENGTH)
+        code = 0
+        for length in range(1, cls.MAX_CODE_LENGTH + 1):
+            for symbol, symbol_length in enumerate(lengths):
+                if symbol_length != length:
+                    continue
+                start = code << (cls.MAX_CODE_LENGTH - length)
+                end = start + (1 << (cls.MAX_CODE_LENGTH - length))
+                if end > len(table):
+                    raise ValueError("Invalid Huffman table")
+                table[start:end] = [symbol] * (end - start)
+                code += 1
+            code <<= 1
+        return table
+
+    @classmethod
+    def decompress(cls, data: bytes, size: int) -> bytes:
+        """Decompress data to the given uncompressed size."""
+        output = bytearray()
+        position = 0
+        end = len(data)
+
+        def read16(at: int) -> int:
+            return data[at] | data[at + 1] << 8 if at + 1 < end else 0
+
+        while len(output) < size:
+            if position + cls.TABLE_SIZE > end:
+                raise ValueError("Truncated compressed data")
+            lengths = []
+            for byte in data[position:position + cls.TABLE_SIZE]:
+                lengths.append(byte & 0x0F)
+                lengths.append(byte >> 4)
+            table = cls._build_table(lengths)
+            position += cls.TABLE_SIZE
+
+            bits = (read16(position) << 16 | read16(position + 2)) & 0xFFFFFFFF
+            position += 4
+            extra = 16
+            block_end = min(len(output) + cls.BLOCK_SIZE, size)
+
+            while len(output) < block_end:
+                symbol = table[bits >> 17]
+                if symbol < 0:
+                    raise ValueError("Invalid Huffman code")
+                length = lengths[symbol]
+                bits = (bits << length) & 0xFFFFFFFF
+                extra -= length
+                if extra < 0:
+                    bits |= read16(position) << -extra
+                    extra += 16
+                    position += 2
+
+                if symbol < 256:
+                    output.append(symbol)
+                    continue
+
+                symbol -= 256
+                match_length = symbol & 0x0F
+                offset_bits = symbol >> 4
+                if match_length == 15:
+                    if position >= end:
+                        raise ValueError("Truncated compressed data")
+                    match_length = data[position]
+                    position += 1
+                    if match_length == 255:
+                        match_length = read16(position)
+                        position += 2
+                        if match_length == 0:
+                            match_length, = struct.unpack_from('<I', data, position)
+                            position += 4
+                        if match_length < 15:
+                            raise ValueError("Invalid match length")
+                        match_length -= 15
+                    match_length += 15
+                match_length += 3
+
+                offset = (bits >> (32 - offset_bits) if offset_bits else 0) + (1 << offset_bits)
+                bits = (bits << offset_bits) & 0xFFFFFFFF
+                extra -= offset_bits
+                if extra < 0:
+                    bits |= read16(position) << -extra
+                    extra += 16
+                    position += 2
+
+                start = len(output) - offset
+                if start < 0:
+                    raise ValueError("Match offset before start of data")
+                # Never copy past the declared size, whatever length the data claims
+                match_length = min(match_length, size - len(output))
+                if offset >= match_length:
+                    output += output[start:start + match_length]
+                else:
+                    # Overlapping match repeats the last offset bytes
+                    for i in range(match_length):
+                        output.append(output[start + i])
+
+        return bytes(output[:size])
+
+
+class PrefetchReader:
+    """Reads prefetch files, caching each one by modification time.
+
+    Supports format versions 17 (XP), 23 (Vista/7), 26 (8.1) and 30/31
+    (10/11), compressed or not. Each record gives the executable name,
+    run count, last run times, the files loaded in the first seconds of
+    a launch and the number of blocks read for them.
+    """
+
+    SIGNATURE = b'SCCA'
+    COMPRESSED_SIGNATURE = b'MAM'
+    COMPRESSION_XPRESS_HUFFMAN = 4
+
+    # Prefetch traces record reads in pages
+    BLOCK_SIZE = 4096
+
+    # Refuse to inflate anything claiming more than this
+    MAX_SIZE = 64 * 1024 * 1024
+
+    # Executable names are cut to this many characters, in the header and the file name
+    MAX_NAME_LENGTH = 29
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[int, int, Optional[Dict[str, Any]]]] = {}
+
+    def clear(self):
+        """Forget cached records."""
+        self._cache.clear()
+
+    def read(self, path: str) -> Optional[Dict[str, Any]]:
+        """Read a prefetch file, or None if it cannot be read or parsed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = os.path.normcase(path)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            record = self.parse(data)
+        except OSError:
+            record = None
+        if record is not None:
+            record['path'] = path
+        self._cache[key] = (st.st_mtime_ns, st.st_size, record)
+        return record
+
+    def read_directory(self, folder: str,
+                       executables: Optional[Iterable[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Read the prefetch files in a folder, grouped by upper-case executable name.
+
+        When executables are given, only files named after one of them
+        (NAME.EXE-HASH.pf) are opened, so the rest are never decompressed.
+        """
+        records: Dict[str, List[Dict[str, Any]]] = {}
+        wanted = None
+        if executables is not None:
+            wanted = {self.get_key(executable) for executable in executables}
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return records
+        for name in names:
+            if not name.lower().endswith('.pf'):
+                continue
+            if wanted is not None and name[:-3].rpartition('-')[0].upper() not in wanted:
+                continue
+            record = self.read(os.path.join(folder, name))
+            if record is not None:
+                records.setdefault(self.get_key(record['executable']), []).append(record)
+        return records
+
+    @classmethod
+    def get_key(cls, executable: str) -> str:
+        """Get the name prefetch files use for an executable file name."""
+        return executable.upper()[:cls.MAX_NAME_LENGTH]
+
+    def decompress(self, data: bytes) -> Optional[bytes]:
+        """Unwrap a MAM compressed file; uncompressed data is returned as is."""
+        if data[:3] != self.COMPRESSED_SIGNATURE:
+            return data
+        if len(data) < 8 or data[3] & 0x0F != self.COMPRESSION_XPRESS_HUFFMAN:
+            return None
+        size, = struct.unpack_from('<I', data, 4)
+        if size > self.MAX_SIZE:
+            return None
+        # The high bit of the format byte means a CRC32 follows the size
+        start = 12 if data[3] & 0x80 else 8
+        try:
+            return XpressHuffman.decompress(data[start:], size)
+        except (ValueError, IndexError, struct.error):
+            return None
+
+    def parse(self, data: bytes) -> Optional[Dict[str, Any]]:
+        """Parse prefetch file contents."""
+        data = self.decompress(data)
+        if not data or len(data) < 0x54 or data[4:8] != self.SIGNATURE:
+            return None
+        try:
+            return self._parse(data)
+        except (struct.error, IndexError, ValueError):
+            return None
+
+    def _parse(self, data: bytes) -> Optional[Dict[str, Any]]:
+        version, = struct.unpack_from('<I', data, 0)
+        if version not in (17, 23, 26, 30, 31):
+            return None
+        executable = data[16:76].decode('utf-16-le', 'replace').split('\x00', 1)[0]
+        prefetch_hash, = struct.unpack_from('<I', data, 0x4C)
+        (metrics_offset, metrics_count, chains_offset, chains_count,
+         names_offset, names_size) = struct.unpack_from('<6I', data, 0x54)
+
+        if version == 17:
+            run_times_offset, run_times_count, run_count_offset = 0x78, 1, 0x90
+        elif version == 23:
+            run_times_offset, run_times_count, run_count_offset = 0x80, 1, 0x98
+        else:
+            # Later Windows 10 builds dropped 8 bytes from the header
+            run_times_offset, run_times_count = 0x80, 8
+            run_count_offset = 0xC8 if metrics_offset <= 0x128 else 0xD0
+
+        run_count, = struct.unpack_from('<I', data, run_count_offset)
+        last_runs = []
+        for ticks in struct.unpack_from(f'<{run_times_count}Q', data, run_times_offset):
+            when = filetime_to_datetime(ticks)
+            if when is not None:
+                last_runs.append(when)
+        last_runs.sort(reverse=True)
+
+        entry_size = 20 if version == 17 else 32
+        names = data[names_offset:names_offset + names_size]
+        files = []
+        for i in range(metrics_count):
+            name_offset, name_length = struct.unpack_from('<2I', data, metrics_offset + i * entry_size
+                                                          + (8 if version == 17 else 12))
+            files.append(names[name_offset:name_offset + name_length * 2].decode('utf-16-le', 'replace'))
+
+        # Trace chain entries hold the number of blocks read
+        chain_size, count_at = (8, 0) if version >= 30 else (12, 4)
+        blocks = 0
+        for i in range(chains_count):
+            blocks += struct.unpack_from('<I', data, chains_offset + i * chain_size + count_at)[0]
+
+        return {
+            'executable': executable,
+            'hash': f"{prefetch_hash:08X}",
+            'version': version,
+            'run_count': run_count,
+            'last_runs': last_runs,
+            'files': files,
+            'blocks_loaded': blocks,
+            'bytes_loaded': blocks * self.BLOCK_SIZE
+        }
+
+    @staticmethod
+    def get_runs_per_day(record: Dict[str, Any], now: Optional[datetime] = None) -> float:
+        """Estimate launches per day from the recorded last run times."""
+        runs = record['last_runs']
+        if not runs:
+            return 0.0
+        now = now or datetime.now()
+        if len(runs) == 1:
+            span = max((now - runs[0]).total_seconds(), 86400)
+            return round(1 / (span / 86400), 2)
+        span = max((runs[0] - runs[-1]).total_seconds(), 3600)
+        return round((len(runs) - 1) / (span / 86400), 2)
@@ -0,0 +1,131 @@
+"""PID-reuse-safe process identity index shared by process analyzers."""
+
+import threading
+import psutil
+from typing import List, Dict, Any, Optional, Tuple
+
+
+# A process identity: (pid, create_time). Unlike a bare PID this never
+# refers to two different processes.
+ProcessKey = Tuple[int, float]
+
+
+class ProcessIndex:
+    """Incrementally maintained index of running processes.
+
+    Each refresh only fetches details for processes that appeared since
+    the previous snapshot. Parent links are resolved once, when a process
+    is inserted, and only to a parent that was created before the child,
+    so a reused parent PID is never mistaken for the real parent.
+    """
+
+    # PIDs that are never real parents (Idle and System)
+    ROOT_PIDS = {0, 4}
+
+    def __init__(self):
+        self.records: Dict[ProcessKey, Dict[str, Any]] = {}
+        self.by_pid: Dict[int, ProcessKey] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Dict[str, List[ProcessKey]]:
+        """Take a new snapshot and return the identities added and removed."""
+        with self._lock:
+            seen = set()
+            new_procs = []
+
+            for proc in psutil.process_iter(['pid', 'create_time']):
+                try:
+                    key = (proc.info['pid'], proc.info['create_time'] or 0.0)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+                seen.add(key)
+                if key not in self.records:
+                    new_procs.append((key, proc))
+
+            removed = [key for key in self.records if key not in seen]
+            for key in removed:
+                del self.records[key]
+                if self.by_pid.get(key[0]) == key:
+                    del self.by_pid[key[0]]
+
+            # Insert oldest first so parents are indexed before their children
+            new_procs.sort(key=lambda item: item[0][1])
+            added = []
+            for key, proc in new_procs:
+                record = self._build_record(key, proc)
+                if record is not None:
+                    self._insert(key, record)
+                    added.append(key)
+
+            return {'added': added, 'removed': removed}
+
+    def _build_record(self, key: ProcessKey, proc: psutil.Process) -> Optional[Dict[str, Any]]:
+        """Fetch the details stored for a newly seen process."""
+        try:
+            with proc.oneshot():
+                name = proc.name()
+                ppid = proc.ppid()
+                try:
+                    path = proc.exe()
+                except (psutil.AccessDenied, OSError):
+                    path = ''
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return None
+        except psutil.AccessDenied:
+            ppid, path = 0, ''
+            try:
+                name = proc.name()
+            except psutil.Error:
+                name = 'Unknown'
+
+        return {
+            'pid': key[0],
+            'create_time': key[1],
+            'name': name or 'Unknown',
+            'ppid': ppid or 0,
+            'path': path or '',
+            'parent': None,
+            'process': proc
+        }
+
+    def _insert(self, key: ProcessKey, record: Dict[str, Any]):
+        """Add a record and resolve its parent link."""
+        parent_key = self.by_pid.get(record['ppid'])
+        if parent_key is not None and parent_key[1] <= key[1] and record['ppid'] not in self.ROOT_PIDS:
+            record['parent'] = parent_key
+        self.records[key] = record
+        self.by_pid[key[0]] = key
+
+    def get(self, key: ProcessKey) -> Optional[Dict[str, Any]]:
+        """Get the record for an identity, if it is still running."""
+        return self.records.get(key)
+
+    def get_by_pid(self, pid: int) -> Optional[Dict[str, Any]]:
+        """Get the record currently holding a PID."""
+        key = self.by_pid.get(pid)
+        return self.records.get(key) if key else None
+
+    def is_alive(self, key: ProcessKey) -> bool:
+        """Check whether an identity was present in the latest snapshot."""
+        return key in self.records
+
+    def has_live_parent(self, key: ProcessKey) -> bool:
+        """Check whether a process's original parent is still running."""
+        record = self.records.get(key)
+        return bool(record and record['parent'] in self.records)
+
+    def get_ancestors(self, key: ProcessKey) -> List[Dict[str, Any]]:
+        """Get the chain of live ancestors, nearest first, in O(depth)."""
+        chain = []
+        record = self.records.get(key)
+        while record is not None and record['parent'] is not None:
+            record = self.records.get(record['parent'])
+            if record is None or len(chain) >= len(self.records):
+                break
+            chain.append(record)
+        return chain
+
+    def snapshot(self) -> Dict[ProcessKey, Dict[str, Any]]:
+        """Get a copy of the current records."""
+        with self._lock:
+            return dict(self.records)
@@ -0,0 +1,129 @@
+"""Parent-chain anomaly rules evaluated over the process tree."""
+
+from typing import List, Dict, Set, Optional, Iterable, Tuple
+
+from utils.process_index import ProcessIndex, ProcessKey
+
+
+class ProcessTreeRules:
+    """Flags processes whose parent or ancestry does not fit known patterns.
+
+    Expected-parent and forbidden-ancestor rules are compiled into lookup
+    tables keyed by lower-case process name, and the whole tree is checked
+    in a single depth-first pass that carries the relevant ancestors of
+    the current path.
+    """
+
+    # Child name -> parents it is normally started by
+    EXPECTED_PARENTS = {
+        'smss.exe': ['system', 'smss.exe'],
+        'csrss.exe': ['smss.exe'],
+        'wininit.exe': ['smss.exe'],
+        'winlogon.exe': ['smss.exe'],
+        'services.exe': ['wininit.exe'],
+        'lsass.exe': ['wininit.exe'],
+        'lsaiso.exe': ['wininit.exe'],
+        'lsm.exe': ['wininit.exe'],
+        'svchost.exe': ['services.exe'],
+        'spoolsv.exe': ['services.exe'],
+        'searchindexer.exe': ['services.exe'],
+        'msmpeng.exe': ['services.exe'],
+        'userinit.exe': ['winlogon.exe'],
+        'dwm.exe': ['winlogon.exe'],
+        'logonui.exe': ['winlogon.exe', 'wininit.exe'],
+        'fontdrvhost.exe': ['wininit.exe', 'winlogon.exe'],
+        'explorer.exe': ['userinit.exe', 'winlogon.exe', 'explorer.exe'],
+        'taskhostw.exe': ['svchost.exe'],
+        'sihost.exe': ['svchost.exe'],
+        'runtimebroker.exe': ['svchost.exe'],
+        'wmiprvse.exe': ['svchost.exe'],
+        'audiodg.exe': ['svchost.exe'],
+        'ctfmon.exe': ['svchost.exe', 'taskhostw.exe'],
+    }
+
+    # Children that users, Task Manager and installers routinely restart,
+    # so another parent is only unusual rather than a sign of tampering
+    RESTARTABLE = {'explorer.exe'}
+
+    # Shells and LOLBins that document and server hosts should not start
+    _SHELL_CHILDREN = [
+        'cmd.exe', 'powershell.exe', 'pwsh.exe', 'wscript.exe', 'cscript.exe',
+        'mshta.exe', 'rundll32.exe', 'regsvr32.exe', 'certutil.exe',
+        'bitsadmin.exe', 'msbuild.exe', 'installutil.exe', 'schtasks.exe'
+    ]
+
+    # (ancestor names, child names, description); '*' matches any child
+    FORBIDDEN_ANCESTORS = [
+        (['winword.exe', 'excel.exe', 'powerpnt.exe', 'outlook.exe', 'msaccess.exe',
+          'mspub.exe', 'onenote.exe', 'visio.exe'],
+         _SHELL_CHILDREN, 'Office application'),
+        (['acrord32.exe', 'acrobat.exe', 'foxitpdfreader.exe', 'sumatrapdf.exe'],
+         _SHELL_CHILDREN, 'PDF reader'),
+        (['w3wp.exe', 'httpd.exe', 'nginx.exe', 'tomcat.exe', 'tomcat9.exe',
+          'php-cgi.exe', 'sqlservr.exe'],
+         _SHELL_CHILDREN, 'server process'),
+        (['lsass.exe'], ['*'], 'credential store process'),
+    ]
+
+    def __init__(self, expected_parents: Optional[Dict[str, Iterable[str]]] = None,
+                 forbidden_ancestors: Optional[List[Tuple[Iterable[str], Iterable[str], str]]] = None):
+        expected = expected_parents if expected_parents is not None else self.EXPECTED_PARENTS
+        forbidden = forbidden_ancestors if forbidden_ancestors is not None else self.FORBIDDEN_ANCESTORS
+
+        self._expected: Dict[str, Set[str]] = {
+            child.lower(): {p.lower() for p in parents} for child, parents in expected.items()
+        }
+
+        # child -> ancestor -> description, plus a table for wildcard children
+        self._forbidden: Dict[str, Dict[str, str]] = {}
+        self._forbidden_any: Dict[str, str] = {}
+        for ancestors, children, description in forbidden:
+            for child in children:
+                table = self._forbidden_any if child == '*' else self._forbidden.setdefault(child.lower(), {})
+                for ancestor in ancestors:
+                    table[ancestor.lower()] = description
+
+        # Only these names need to be tracked along the current path
+        self._watched = set(self._forbidden_any)
+        for table in self._forbidden.values():
+            self._watched.update(table)
+
+    def evaluate(self, process_index: ProcessIndex) -> Dict[ProcessKey, List[str]]:
+        """Check every indexed process and return flags keyed by identity."""
+        records = process_index.snapshot()
+        children: Dict[Optional[ProcessKey], List[ProcessKey]] = {}
+        for key, record in records.items():
+            parent = record['parent'] if record['parent'] in records else None
+            children.setdefault(parent, []).append(key)
+
+        results: Dict[ProcessKey, List[str]] = {}
+
+        # Stack entries: (key, parent name, watched ancestors on the path)
+        stack = [(key, None, ()) for key in children.get(None, [])]
+        while stack:
+            key, parent_name, watched = stack.pop()
+            name = records[key]['name'].lower()
+            flags = []
+
+            expected = self._expected.get(name)
+            if expected and parent_name is not None and parent_name not in expected:
+                kind = 'Unusual' if name in self.RESTARTABLE else 'Unexpected'
+                flags.append(f"{kind} parent: {name} started by {parent_name} "
+                             f"(expected {' or '.join(sorted(expected))})")
+
+            if watched:
+                rules = self._forbidden.get(name, {})
+                for ancestor in watched:
+                    description = rules.get(ancestor) or self._forbidden_any.get(ancestor)
+                    if description:
+                        flags.append(f"Suspicious ancestry: {name} spawned under {ancestor} ({description})")
+                        break
+
+            if flags:
+                results[key] = flags
+
+            child_watched = watched + (name,) if name in self._watched and name not in watched else watched
+            for child in children.get(key, []):
+                stack.append((child, name, child_watched))
+
+        return results
@@ -0,0 +1,398 @@
+"""Offline reader for Windows registry hive (regf) files."""
+
+import os
+import mmap
+import struct
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_DWORD_BIG_ENDIAN = 5
+REG_MULTI_SZ = 7
+REG_QWORD = 11
+
+
+def filetime_to_datetime(value: int) -> Optional[datetime]:
+    """Convert a FILETIME (100 ns ticks since 1601) to a local datetime."""
+    if not value:
+        return None
+    try:
+        utc = datetime(1601, 1, 1) + timedelta(microseconds=value // 10)
+        return datetime.fromtimestamp((utc - datetime(1970, 1, 1)).total_seconds())
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+class RegistryKey:
+    """A key node (nk cell) of a hive, decoded on demand."""
+
+    __slots__ = ('hive', 'position', 'name', 'last_written')
+
+    # nk flag: name stored as ASCII rather than UTF-16
+    KEY_COMP_NAME = 0x20
+
+    def __init__(self, hive: 'RegistryHive', offset: int):
+        self.hive = hive
+        self.position = hive.cell(offset)
+        data = hive.data
+        if data[self.position:self.position + 2] != b'nk':
+            raise ValueError(f"No key node at cell {offset:#x}")
+        flags, = struct.unpack_from('<H', data, self.position + 2)
+        self.last_written, = struct.unpack_from('<Q', data, self.position + 4)
+        name_length, = struct.unpack_from('<H', data, self.position + 72)
+        self.name = hive.decode_name(self.position + 76, name_length, flags & self.KEY_COMP_NAME)
+
+    def _field(self, offset: int) -> int:
+        """Read a 32-bit field of the key node."""
+        return struct.unpack_from('<I', self.hive.data, self.position + offset)[0]
+
+    @property
+    def subkey_count(self) -> int:
+        return self._field(20)
+
+    @property
+    def value_count(self) -> int:
+        return self._field(36)
+
+    def get_last_written(self) -> Optional[datetime]:
+        """Get the key's last write time."""
+        return filetime_to_datetime(self.last_written)
+
+    def subkeys(self) -> Iterator['RegistryKey']:
+        """Yield the key's subkeys, skipping damaged cells."""
+        if not self.subkey_count:
+            return
+        for offset in self.hive.list_offsets(self._field(28)):
+            try:
+                yield RegistryKey(self.hive, offset)
+            except (ValueError, struct.error):
+                continue
+
+    def subkey(self, name: str) -> Optional['RegistryKey']:
+        """Find a subkey by name, ignoring case."""
+        name = name.lower()
+        for key in self.subkeys():
+            if key.name.lower() == name:
+                return key
+        return None
+
+    def open(self, path: str) -> Optional['RegistryKey']:
+        """Open a descendant key by backslash-separated path."""
+        key = self
+        for part in filter(None, path.split('\\')):
+            key = key.subkey(part)
+            if key is None:
+                return None
+        return key
+
+    def values(self) -> Iterator[Tuple[str, int, Any]]:
+        """Yield (name, type, data) for each value; the default value's name is ''."""
+        count = self.value_count
+        if not count:
+            return
+        try:
+            position = self.hive.cell(self._field(40))
+            offsets = struct.unpack_from(f'<{count}I', self.hive.data, position)
+        except (ValueError, struct.error):
+            return
+        for offset in offsets:
+            try:
+                yield self.hive.read_value(offset)
+            except (ValueError, struct.error):
+                continue
+
+    def value(self, name: str, default: Any = None) -> Any:
+        """Get one value's data by name, ignoring case."""
+        name = name.lower()
+        for value_name, _, data in self.values():
+            if value_name.lower() == name:
+                return data
+        return default
+
+
+class RegistryHive:
+    """A memory-mapped hive file whose cells are read in place.
+
+    The base block gives the root key cell; every other structure is a
+    cell addressed by its offset from the first hive bin. Keys and values
+    are decoded only when visited, so walking a few autostart keys of a
+    large SOFTWARE hive touches a small part of the file. Transaction
+    logs are not replayed, so a hive saved dirty reads as last flushed.
+    """
+
+    BASE_BLOCK_SIZE = 4096
+
+    # Values larger than this are split into 'db' segments (hive 1.4+)
+    BIG_DATA_SEGMENT = 16344
+
+    # Bound on nested 'ri' index lists, which never go deeper than 2
+    MAX_INDEX_DEPTH = 8
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self._file.close()
+            raise
+        if self.data[:4] != b'regf' or len(self.data) < self.BASE_BLOCK_SIZE:
+            self.close()
+            raise ValueError(f"{path} is not a registry hive")
+        self.minor_version, = struct.unpack_from('<I', self.data, 0x18)
+        try:
+            self.root = RegistryKey(self, struct.unpack_from('<I', self.data, 0x24)[0])
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def close(self):
+        """Unmap and close the hive file."""
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cell(self, offset: int) -> int:
+        """Get the file position of a cell's data from its offset."""
+        position = self.BASE_BLOCK_SIZE + offset
+        if offset == 0xFFFFFFFF or position + 4 > len(self.data):
+            raise ValueError(f"Cell offset {offset:#x} out of range")
+        return position + 4
+
+    def decode_name(self, position: int, length: int, compressed: int) -> str:
+        """Decode a key or value name stored as ASCII or UTF-16."""
+        raw = self.data[position:position + length]
+        return raw.decode('latin-1') if compressed else raw.decode('utf-16-le', 'replace')
+
+    def list_offsets(self, offset: int, depth: int = 0) -> Iterator[int]:
+        """Yield key cell offsets from an lf, lh, li or ri subkey list."""
+        try:
+            position = self.cell(offset)
+            kind = self.data[position:position + 2]
+            count, = struct.unpack_from('<H', self.data, position + 2)
+            if kind in (b'lf', b'lh'):
+                # Each entry is an offset and a name hint or hash
+                yield from struct.unpack_from(f'<{count * 2}I', self.data, position + 4)[::2]
+            elif kind == b'li':
+                yield from struct.unpack_from(f'<{count}I', self.data, position + 4)
+            elif kind == b'ri' and depth < self.MAX_INDEX_DEPTH:
+                for sublist in struct.unpack_from(f'<{count}I', self.data, position + 4):
+                    yield from self.list_offsets(sublist, depth + 1)
+        except (ValueError, struct.error):
+            return
+
+    def _read_data(self, size: int, offset: int) -> bytes:
+        """Read value data from its cell, joining big data segments."""
+        position = self.cell(offset)
+        if size > self.BIG_DATA_SEGMENT and self.minor_version >= 4 \
+                and self.data[position:position + 2] == b'db':
+            count, = struct.unpack_from('<H', self.data, position + 2)
+            segments_position = self.cell(struct.unpack_from('<I', self.data, position + 4)[0])
+            parts = []
+            remaining = size
+            for segment in struct.unpack_from(f'<{count}I', self.data, segments_position):
+                start = self.cell(segment)
+                part = self.data[start:start + min(remaining, self.BIG_DATA_SEGMENT)]
+                parts.append(part)
+                remaining -= len(part)
+                if remaining <= 0:
+                    break
+            return b''.join(parts)
+        return self.data[position:position + size]
+
+    def read_value(self, offset: int) -> Tuple[str, int, Any]:
+        """Decode a value (vk cell) into its name, type and converted data."""
+        position = self.cell(offset)
+        if self.data[position:position + 2] != b'vk':
+            raise ValueError(f"No value at cell {offset:#x}")
+        name_length, raw_size, data_offset, value_type, flags = struct.unpack_from(
+            '<HIIIH', self.data, position + 2
+        )
+        name = self.decode_name(position + 20, name_length, flags & 0x1)
+
+        size = raw_size & 0x7FFFFFFF
+        if raw_size & 0x80000000:
+            # Up to four bytes live in the offset field itself
+            raw = self.data[position + 8:position + 8 + min(size, 4)]
+        elif size:
+            raw = self._read_data(size, data_offset)
+        else:
+            raw = b''
+        return name, value_type, self.convert(value_type, raw)
+
+    @staticmethod
+    def convert(value_type: int, raw: bytes) -> Any:
+        """Convert raw value data the way winreg.QueryValueEx does."""
+        if value_type in (REG_SZ, REG_EXPAND_SZ):
+            return raw.decode('utf-16-le', 'replace').split('\x00', 1)[0]
+        if value_type == REG_MULTI_SZ:
+            return [s for s in raw.decode('utf-16-le', 'replace').split('\x00') if s]
+        if value_type == REG_DWORD and len(raw) >= 4:
+            return struct.unpack_from('<I', raw)[0]
+        if value_type == REG_DWORD_BIG_ENDIAN and len(raw) >= 4:
+            return struct.unpack_from('>I', raw)[0]
+        if value_type == REG_QWORD and len(raw) >= 8:
+            return struct.unpack_from('<Q', raw)[0]
+        return bytes(raw)
+
+
+class AutostartCollector:
+    """Collects autostart entries from user, SOFTWARE and SYSTEM hives.
+
+    Each entry is a dict with the location (Run, RunOnce, Winlogon, IFEO,
+    AppInit or Services), the key path inside the hive, the value name,
+    the command it launches and the key's last write time.
+    """
+
+    RUN_KEYS = [
+        ('Run', r'Microsoft\Windows\CurrentVersion\Run'),
+        ('RunOnce', r'Microsoft\Windows\CurrentVersion\RunOnce'),
+        ('Run (x86)', r'WOW6432Node\Microsoft\Windows\CurrentVersion\Run'),
+        ('RunOnce (x86)', r'WOW6432Node\Microsoft\Windows\CurrentVersion\RunOnce'),
+        ('Run', r'Microsoft\Windows\CurrentVersion\Policies\Explorer\Run'),
+    ]
+
+    WINLOGON_KEY = r'Microsoft\Windows NT\CurrentVersion\Winlogon'
+    WINDOWS_KEY = r'Microsoft\Windows NT\CurrentVersion\Windows'
+    IFEO_KEYS = [
+        r'Microsoft\Windows NT\CurrentVersion\Image File Execution Options',
+        r'WOW6432Node\Microsoft\Windows NT\CurrentVersion\Image File Execution Options',
+    ]
+    APPINIT_KEYS = [
+        r'Microsoft\Windows NT\CurrentVersion\Windows',
+        r'WOW6432Node\Microsoft\Windows NT\CurrentVersion\Windows',
+    ]
+
+    # Winlogon values that launch programs, with their stock contents
+    WINLOGON_VALUES = {
+        'shell': {'explorer.exe'},
+        'userinit': {'c:\\windows\\system32\\userinit.exe,', 'c:\\windows\\system32\\userinit.exe'},
+        'taskman': set(),
+        'appsetup': set(),
+    }
+
+    # Service Start values for boot, system and automatic start
+    AUTO_START = (0, 1, 2)
+
+    def detect_kind(self, hive: RegistryHive) -> str:
+        """Tell a user, SOFTWARE or SYSTEM hive apart by file name or layout."""
+        name = os.path.basename(hive.path).lower()
+        if name in ('ntuser.dat', 'usrclass.dat'):
+            return 'user'
+        if name in ('software', 'system'):
+            return name
+        if hive.root.subkey('Select') is not None:
+            return 'system'
+        if hive.root.subkey('Software') is not None:
+            return 'user'
+        return 'software'
+
+    def _entry(self, location: str, key: RegistryKey, key_path: str, name: str, command: Any) -> Dict[str, Any]:
+        return {
+            'location': location,
+            'key': key_path,
+            'name': name,
+            'command': ' '.join(command) if isinstance(command, list) else str(command),
+            'last_written': key.get_last_written()
+        }
+
+    def collect_software(self, root: RegistryKey, prefix: str = '') -> List[Dict[str, Any]]:
+        """Collect from a SOFTWARE hive, or a user hive's Software key.
+
+        root may also be a registry_cache.LiveRegistryKey, which reads the
+        same locations from the live registry.
+        """
+        entries = []
+        for location, path in self.RUN_KEYS:
+            key = root.open(path)
+            if key is None:
+                continue
+            for name, _, data in key.values():
+                if data:
+                    entries.append(self._entry(location, key, prefix + path, name, data))
+
+        key = root.open(self.WINLOGON_KEY)
+        if key is not None:
+            for name, _, data in key.values():
+                defaults = self.WINLOGON_VALUES.get(name.lower())
+                if defaults is None or not data or str(data).strip().lower() in defaults:
+                    continue
+                entries.append(self._entry('Winlogon', key, prefix + self.WINLOGON_KEY, name, data))
+
+        # Legacy load/run values of the Windows key, per user
+        key = root.open(self.WINDOWS_KEY)
+        if key is not None:
+            for name in ('Load', 'Run'):
+                data = key.value(name)
+                if data:
+                    entries.append(self._entry('Run', key, prefix + self.WINDOWS_KEY, name, data))
+
+        for path in self.IFEO_KEYS:
+            key = root.open(path)
+            if key is None:
+                continue
+            for image in key.subkeys():
+                debugger = image.value('Debugger')
+                if debugger:
+                    entries.append(self._entry('IFEO', image, f"{prefix}{path}\\{image.name}",
+                                               image.name, debugger))
+
+        for path in self.APPINIT_KEYS:
+            key = root.open(path)
+            if key is None:
+                continue
+            dlls = key.value('AppInit_DLLs')
+            if dlls and key.value('LoadAppInit_DLLs', 0):
+                entries.append(self._entry('AppInit', key, prefix + path, 'AppInit_DLLs', dlls))
+        return entries
+
+    def _collect_services(self, root: RegistryKey) -> List[Dict[str, Any]]:
+        """Collect automatic, boot and system start services of the current control set."""
+        select = root.subkey('Select')
+        current = select.value('Current', 1) if select is not None else 1
+        control_set = f"ControlSet{current:03d}"
+        services = root.open(f"{control_set}\\Services")
+        if services is None:
+            return []
+
+        entries = []
+        for service in services.subkeys():
+            start = service.value('Start')
+            image_path = service.value('ImagePath')
+            if start not in self.AUTO_START or not image_path:
+                continue
+            entry = self._entry('Services', service, f"{control_set}\\Services\\{service.name}",
+                                service.name, image_path)
+            entry['start'] = start
+            entry['display_name'] = service.value('DisplayName', '')
+            entries.append(entry)
+        return entries
+
+    def collect(self, hive: RegistryHive, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Collect every autostart entry of a hive in one pass."""
+        kind = kind or self.detect_kind(hive)
+        if kind == 'system':
+            return self._collect_services(hive.root)
+        if kind == 'user':
+            software = hive.root.subkey('Software')
+            return self.collect_software(software, 'Software\\') if software is not None else []
+        return self.collect_software(hive.root)
+
+    def collect_file(self, path: str, kind: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Collect from a hive file, or None if it cannot be opened."""
+        try:
+            with RegistryHive(path) as hive:
+                return self.collect(hive, kind)
+        except (OSError, ValueError, struct.error):
+            return None
@@ -0,0 +1,173 @@
+"""Live registry reads cached by each key's last write time."""
+
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from utils.paths import get_data_file
+from utils.regf import filetime_to_datetime
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+
+class RegistryCache:
+    """Stores the values of registry keys along with their last write time.
+
+    A key's values are reused as long as QueryInfoKey reports the same
+    last write time, so an unchanged key costs one open and one query
+    instead of a full value enumeration. Only keys read during a scan are
+    written back, so deleted keys drop out of the cache.
+    """
+
+    CACHE_FILE = 'registry_cache.json'
+
+    def __init__(self, cache_file: Optional[str] = None):
+        self.cache_file = cache_file or get_data_file(self.CACHE_FILE)
+        self._entries: Optional[Dict[str, Any]] = None
+        self._seen: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, Any]:
+        """Read the cache from disk."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                return entries
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def reset_stats(self):
+        """Start a new scan: clear hit counters and the keys seen."""
+        self._seen = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _encode(data: Any) -> Any:
+        """Make value data JSON-safe."""
+        return {'hex': data.hex()} if isinstance(data, bytes) else data
+
+    @staticmethod
+    def _decode(data: Any) -> Any:
+        """Reverse _encode."""
+        return bytes.fromhex(data['hex']) if isinstance(data, dict) else data
+
+    def get(self, path: str, last_written: int) -> Optional[List[Tuple[str, int, Any]]]:
+        """Get a key's cached values if its last write time is unchanged."""
+        if self._entries is None:
+            self._entries = self._load()
+        entry = self._entries.get(path.lower())
+        if entry is None or entry['last_written'] != last_written:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._seen[path.lower()] = entry
+        return [(name, value_type, self._decode(data)) for name, value_type, data in entry['values']]
+
+    def put(self, path: str, last_written: int, values: List[Tuple[str, int, Any]]):
+        """Record a key's values and last write time."""
+        entry = {
+            'last_written': last_written,
+            'values': [[name, value_type, self._encode(data)] for name, value_type, data in values]
+        }
+        self._seen[path.lower()] = entry
+        if self._entries is not None:
+            self._entries[path.lower()] = entry
+
+    def save(self):
+        """Write the keys read during this scan back to disk."""
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self._seen, f)
+            self._entries = dict(self._seen)
+        except (OSError, TypeError, ValueError):
+            pass
+
+
+class LiveRegistryKey:
+    """A live registry key with the read interface of regf.RegistryKey.
+
+    Opening a key queries its last write time; its values come from the
+    RegistryCache when that time is unchanged, and are enumerated (and
+    cached) otherwise. Subkeys are opened on demand.
+    """
+
+    __slots__ = ('hkey', 'path', 'label', 'cache', 'name', 'last_written', 'subkey_count', 'value_count')
+
+    def __init__(self, hkey: Any, path: str, label: str, cache: RegistryCache):
+        self.hkey = hkey
+        self.path = path
+        self.label = label
+        self.cache = cache
+        self.name = path.rsplit('\\', 1)[-1]
+        with winreg.OpenKey(hkey, path, 0, winreg.KEY_READ) as handle:
+            self.subkey_count, self.value_count, self.last_written = winreg.QueryInfoKey(handle)
+
+    @classmethod
+    def open_root(cls, hkey: Any, path: str, label: str, cache: RegistryCache) -> Optional['LiveRegistryKey']:
+        """Open a key, or None if it does not exist or is not readable."""
+        if winreg is None:
+            return None
+        try:
+            return cls(hkey, path, label, cache)
+        except OSError:
+            return None
+
+    def get_last_written(self) -> Optional[datetime]:
+        """Get the key's last write time."""
+        return filetime_to_datetime(self.last_written)
+
+    def subkeys(self) -> Iterator['LiveRegistryKey']:
+        """Yield the key's subkeys that can be opened."""
+        names = []
+        try:
+            with winreg.OpenKey(self.hkey, self.path, 0, winreg.KEY_READ) as handle:
+                for index in range(self.subkey_count):
+                    names.append(winreg.EnumKey(handle, index))
+        except OSError:
+            pass
+        for name in names:
+            key = self.open_root(self.hkey, f"{self.path}\\{name}", self.label, self.cache)
+            if key is not None:
+                yield key
+
+    def subkey(self, name: str) -> Optional['LiveRegistryKey']:
+        """Open a subkey by name."""
+        return self.open_root(self.hkey, f"{self.path}\\{name}", self.label, self.cache)
+
+    def open(self, path: str) -> Optional['LiveRegistryKey']:
+        """Open a descendant key by backslash-separated path."""
+        path = path.strip('\\')
+        return self.open_root(self.hkey, f"{self.path}\\{path}", self.label, self.cache)
+
+    def values(self) -> Iterator[Tuple[str, int, Any]]:
+        """Yield (name, type, data) for each value, from the cache when unchanged."""
+        if not self.value_count:
+            return
+        cache_path = f"{self.label}\\{self.path}"
+        values = self.cache.get(cache_path, self.last_written)
+        if values is None:
+            values = []
+            try:
+                with winreg.OpenKey(self.hkey, self.path, 0, winreg.KEY_READ) as handle:
+                    for index in range(self.value_count):
+                        name, data, value_type = winreg.EnumValue(handle, index)
+                        values.append((name, value_type, data))
+                self.cache.put(cache_path, self.last_written, values)
+            except OSError:
+                pass
+        yield from values
+
+    def value(self, name: str, default: Any = None) -> Any:
+        """Get one value's data by name, ignoring case."""
+        name = name.lower()
+        for value_name, _, data in self.values():
+            if value_name.lower() == name:
+                return data
+        return default
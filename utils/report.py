@@ -1,14 +1,257 @@
 """Report generation utilities for exporting diagnostic results."""
 
+import io
 import os
+import json
+import math
+import zlib
+import base64
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, TextIO
 import html
 
 
+# Extra styles for tables rendered by the virtualized report script
+_VIRTUAL_STYLE = '''        .toolbar {
+            display: flex;
+            gap: 10px;
+            align-items: center;
+            padding: 10px 15px;
+            border-bottom: 1px solid #e0e0e0;
+        }
+        .toolbar input {
+            flex: 1;
+            padding: 6px 10px;
+            border: 1px solid #ccc;
+            border-radius: 5px;
+            font-size: 14px;
+        }
+        .toolbar .row-count {
+            color: #666;
+            font-size: 12px;
+            white-space: nowrap;
+        }
+        .viewport {
+            max-height: 600px;
+            overflow-y: auto;
+        }
+        .viewport table {
+            table-layout: fixed;
+        }
+        .viewport th {
+            position: sticky;
+            top: 0;
+            cursor: pointer;
+            user-select: none;
+        }
+        .viewport td {
+            height: 36px;
+            padding: 0 15px;
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+        }
+        .viewport tr.spacer td {
+            height: auto;
+            padding: 0;
+            border: none;
+        }
+'''
+
+# Decompresses the embedded results and renders each category as a
+# sortable, filterable table that only builds the rows in view
+_VIRTUAL_SCRIPT = r'''(function () {
+    var config = JSON.parse(document.getElementById('report-config').textContent);
+    var root = document.getElementById('report-categories');
+    var collator = new Intl.Collator(undefined, {numeric: true, sensitivity: 'base'});
+    var ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'};
+
+    function escape(value) {
+        return String(value).replace(/[&<>"']/g, function (c) { return ESCAPES[c]; });
+    }
+
+    function element(tag, className, text) {
+        var node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined) node.textContent = text;
+        return node;
+    }
+
+    function compare(a, b) {
+        if (typeof a === 'number' && typeof b === 'number') return a - b;
+        return collator.compare(String(a), String(b));
+    }
+
+    function renderCategory(category) {
+        var rows = category.rows;
+        var section = element('div', 'category');
+        section.appendChild(element('div', 'category-header', category.title));
+        var content = element('div', 'category-content');
+        section.appendChild(content);
+        root.appendChild(section);
+        if (!rows.length) {
+            content.appendChild(element('div', 'no-data', 'No issues found'));
+            return;
+        }
+
+        var toolbar = element('div', 'toolbar');
+        var filter = element('input');
+        filter.type = 'search';
+        filter.placeholder = 'Filter rows...';
+        var count = element('span', 'row-count');
+        toolbar.appendChild(filter);
+        toolbar.appendChild(count);
+        content.appendChild(toolbar);
+
+        var viewport = element('div', 'viewport');
+        var table = element('table');
+        var headRow = element('tr');
+        var badges = category.headers.map(function (header) {
+            return config.badges.indexOf(header.toLowerCase()) >= 0;
+        });
+        var headings = category.headers.map(function (header, column) {
+            var th = element('th', null, header.replace(/_/g, ' ').toLowerCase().replace(/\b\w/g, function (c) { return c.toUpperCase(); }));
+            th.addEventListener('click', function () { sortBy(column); });
+            headRow.appendChild(th);
+            return th;
+        });
+        var thead = element('thead');
+        thead.appendChild(headRow);
+        table.appendChild(thead);
+        var tbody = element('tbody');
+        table.appendChild(tbody);
+        viewport.appendChild(table);
+        content.appendChild(viewport);
+
+        var order = rows.map(function (row, index) { return index; });
+        var view = order;
+        var searchKeys = null;
+        var sortColumn = -1, descending = false, pending = false, timer = null;
+
+        function renderRow(row) {
+            var cells = ['<tr>'];
+            for (var column = 0; column < row.length; column++) {
+                var text = escape(row[column]);
+                if (badges[column]) {
+                    var color = config.colors[String(row[column]).toLowerCase()] || config.default_color;
+                    cells.push('<td><span class="severity" style="background-color: ' + color + '">' + text + '</span></td>');
+                } else {
+                    cells.push('<td title="' + text + '">' + text + '</td>');
+                }
+            }
+            cells.push('</tr>');
+            return cells.join('');
+        }
+
+        function spacer(rowCount) {
+            return '<tr class="spacer" style="height: ' + rowCount * config.row_height + 'px"><td colspan="'
+                + category.headers.length + '"></td></tr>';
+        }
+
+        function draw() {
+            pending = false;
+            var first = Math.max(0, Math.floor(viewport.scrollTop / config.row_height) - config.overscan);
+            var last = Math.min(view.length, first + config.visible_rows + 2 * config.overscan);
+            var html = [spacer(first)];
+            for (var i = first; i < last; i++) html.push(renderRow(rows[view[i]]));
+            html.push(spacer(view.length - last));
+            tbody.innerHTML = html.join('');
+            count.textContent = view.length === rows.length ? rows.length + ' rows' : view.length + ' of ' + rows.length + ' rows';
+        }
+
+        function applyFilter() {
+            var query = filter.value.trim().toLowerCase();
+            if (!query) {
+                view = order;
+            } else {
+                if (!searchKeys) {
+                    searchKeys = rows.map(function (row) { return row.join('\u0001').toLowerCase(); });
+                }
+                view = order.filter(function (index) { return searchKeys[index].indexOf(query) >= 0; });
+            }
+            viewport.scrollTop = 0;
+            draw();
+        }
+
+        function sortBy(column) {
+            descending = column === sortColumn ? !descending : false;
+            sortColumn = column;
+            var sign = descending ? -1 : 1;
+            order = order.slice().sort(function (a, b) {
+                return sign * compare(rows[a][column], rows[b][column]) || a - b;
+            });
+            headings.forEach(function (th, index) {
+                th.setAttribute('aria-sort', index !== column ? 'none' : descending ? 'descending' : 'ascending');
+                th.textContent = th.textContent.replace(/ [▲▼]$/, '')
+                    + (index === column ? (descending ? ' ▼' : ' ▲') : '');
+            });
+            applyFilter();
+        }
+
+        viewport.addEventListener('scroll', function () {
+            if (!pending) {
+                pending = true;
+                window.requestAnimationFrame(draw);
+            }
+        });
+        filter.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(applyFilter, 150);
+        });
+        draw();
+    }
+
+    if (typeof DecompressionStream === 'undefined') {
+        root.appendChild(element('div', 'no-data',
+            'This browser cannot open compressed reports. Open the report in a current version of Edge, Chrome, Firefox or Safari.'));
+        return;
+    }
+    var encoded = atob(document.getElementById('report-data').textContent.replace(/\s+/g, ''));
+    var bytes = new Uint8Array(encoded.length);
+    for (var i = 0; i < encoded.length; i++) bytes[i] = encoded.charCodeAt(i);
+    var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+    new Response(stream).text().then(function (text) {
+        JSON.parse(text).forEach(renderCategory);
+    }).catch(function (error) {
+        root.appendChild(element('div', 'no-data', 'The report data could not be read: ' + error));
+    });
+})();
+'''
+
+
 class ReportGenerator:
     """Generates HTML reports from diagnostic results."""
 
+    CATEGORY_TITLES = {
+        'startup': 'Startup Programs',
+        'services': 'Windows Services',
+        'processes': 'Process Resource Usage',
+        'disk': 'Disk Health',
+        'drivers': 'Driver Status',
+        'scheduled': 'Scheduled Tasks'
+    }
+
+    SEVERITY_COLORS = {
+        'critical': '#dc3545',
+        'high': '#dc3545',
+        'warning': '#ffc107',
+        'medium': '#ffc107',
+        'ok': '#28a745',
+        'low': '#28a745',
+        'info': '#17a2b8'
+    }
+
+    # Table rows are joined and written in batches of this many
+    ROWS_PER_WRITE = 500
+    WRITE_BUFFER_SIZE = 1024 * 1024
+
+    # Reports with more rows than this are saved in virtualized mode
+    VIRTUALIZE_ROWS = 5000
+    BADGE_COLUMNS = ('severity', 'impact', 'status')
+    ROW_HEIGHT = 37
+    VISIBLE_ROWS = 16
+    OVERSCAN_ROWS = 10
+
     def __init__(self):
         self.results: Dict[str, List[Dict[str, Any]]] = {}
         self.system_info: Dict[str, str] = {}
@@ -23,26 +266,47 @@ class ReportGenerator:
 
     def _get_severity_color(self, severity: str) -> str:
         """Get CSS color for severity level."""
-        colors = {
-            'critical': '#dc3545',
-            'high': '#dc3545',
-            'warning': '#ffc107',
-            'medium': '#ffc107',
-            'ok': '#28a745',
-            'low': '#28a745',
-            'info': '#17a2b8'
-        }
-        return colors.get(severity.lower(), '#6c757d')
+        return self.SEVERITY_COLORS.get(severity.lower(), '#6c757d')
 
     def _escape(self, text: str) -> str:
         """HTML escape text."""
         return html.escape(str(text)) if text else ''
 
-    def generate_html(self) -> str:
+    def generate_html(self, virtualized: bool = False) -> str:
         """Generate complete HTML report."""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        buffer = io.StringIO()
+        self.write_html(buffer, virtualized)
+        return buffer.getvalue()
 
-        html_content = f'''<!DOCTYPE html>
+    def write_html(self, out: TextIO, virtualized: bool = False):
+        """Write the complete HTML report to a text stream.
+
+        Sections and table rows are written as they are produced, so the
+        document is never held in memory as a whole. In virtualized mode
+        the results are embedded as gzip-compressed JSON instead of table
+        rows, and a script in the page renders only the rows in view,
+        with sorting and filtering; the file stays small and opens
+        quickly however many rows there are, and needs nothing but a
+        browser with DecompressionStream.
+        """
+        self._write_head(out, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                         _VIRTUAL_STYLE if virtualized else '')
+        self._write_system_info(out)
+        if virtualized:
+            self._write_virtual_categories(out)
+        else:
+            for category, items in self.results.items():
+                self._write_category(out, category, items)
+        out.write('''
+    <div class="footer">
+        Generated by Windows System Diagnostic Tool
+    </div>
+</body>
+</html>
+''')
+
+    def _write_head(self, out: TextIO, timestamp: str, extra_style: str = ''):
+        out.write(f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -169,111 +433,185 @@ class ReportGenerator:
             color: #666;
             font-size: 14px;
         }}
-    </style>
+{extra_style}    </style>
 </head>
 <body>
     <div class="header">
         <h1>Windows System Diagnostic Report</h1>
         <div class="timestamp">Generated: {timestamp}</div>
     </div>
-'''
+''')
 
-        # System Info Section
-        if self.system_info:
-            html_content += '''
+    def _write_system_info(self, out: TextIO):
+        if not self.system_info:
+            return
+        out.write('''
     <div class="system-info">
         <h2>System Information</h2>
         <div class="system-info-grid">
-'''
-            for label, value in self.system_info.items():
-                html_content += f'''
+''')
+        for label, value in self.system_info.items():
+            out.write(f'''
             <div class="system-info-item">
                 <label>{self._escape(label)}</label>
                 <span>{self._escape(value)}</span>
             </div>
-'''
-            html_content += '''
+''')
+        out.write('''
         </div>
     </div>
-'''
+''')
 
-        # Category Sections
-        category_titles = {
-            'startup': 'Startup Programs',
-            'services': 'Windows Services',
-            'processes': 'Process Resource Usage',
-            'disk': 'Disk Health',
-            'drivers': 'Driver Status',
-            'scheduled': 'Scheduled Tasks'
-        }
-
-        for category, items in self.results.items():
-            title = category_titles.get(category, category.title())
-            html_content += f'''
+    def _write_category(self, out: TextIO, category: str, items: List[Dict[str, Any]]):
+        title = self.CATEGORY_TITLES.get(category, category.title())
+        out.write(f'''
     <div class="category">
         <div class="category-header">{self._escape(title)}</div>
         <div class="category-content">
-'''
+''')
 
-            if items:
-                # Build table headers from first item keys
-                headers = list(items[0].keys())
-                html_content += '''
+        if items:
+            # Build table headers from first item keys
+            headers = list(items[0].keys())
+            out.write('''
             <table>
                 <thead>
                     <tr>
-'''
-                for header in headers:
-                    display_header = header.replace('_', ' ').title()
-                    html_content += f'                        <th>{self._escape(display_header)}</th>\n'
-
-                html_content += '''
+''')
+            for header in headers:
+                display_header = header.replace('_', ' ').title()
+                out.write(f'                        <th>{self._escape(display_header)}</th>\n')
+            out.write('''
                     </tr>
                 </thead>
                 <tbody>
-'''
+''')
 
-                for item in items:
-                    html_content += '                    <tr>\n'
-                    for header in headers:
-                        value = item.get(header, '')
-                        if header.lower() in ['severity', 'impact', 'status']:
-                            color = self._get_severity_color(str(value))
-                            html_content += f'                        <td><span class="severity" style="background-color: {color}">{self._escape(value)}</span></td>\n'
-                        else:
-                            html_content += f'                        <td>{self._escape(value)}</td>\n'
-                    html_content += '                    </tr>\n'
-
-                html_content += '''
+            badges = [header.lower() in self.BADGE_COLUMNS for header in headers]
+            columns = list(zip(headers, badges))
+            rows = []
+            for item in items:
+                cells = ['                    <tr>\n']
+                for header, badge in columns:
+                    value = item.get(header, '')
+                    if badge:
+                        color = self._get_severity_color(str(value))
+                        cells.append(f'                        <td><span class="severity" style="background-color: {color}">{self._escape(value)}</span></td>\n')
+                    else:
+                        cells.append(f'                        <td>{self._escape(value)}</td>\n')
+                cells.append('                    </tr>\n')
+                rows.append(''.join(cells))
+                if len(rows) >= self.ROWS_PER_WRITE:
+                    out.write(''.join(rows))
+                    rows = []
+            out.write(''.join(rows))
+
+            out.write('''
                 </tbody>
             </table>
-'''
-            else:
-                html_content += '''
+''')
+        else:
+            out.write('''
             <div class="no-data">No issues found</div>
-'''
+''')
 
-            html_content += '''
+        out.write('''
         </div>
     </div>
-'''
+''')
 
-        html_content += '''
-    <div class="footer">
-        Generated by Windows System Diagnostic Tool
-    </div>
-</body>
-</html>
-'''
-        return html_content
+    def _write_virtual_categories(self, out: TextIO):
+        """Write the compressed results and the script that renders them."""
+        out.write('''
+    <div id="report-categories"></div>
+    <noscript><div class="no-data">Enable JavaScript to view the results in this report.</div></noscript>
+    <script type="application/octet-stream" id="report-data">
+''')
+        writer = _CompressedWriter(out)
+        writer.write('[')
+        for index, (category, items) in enumerate(self.results.items()):
+            headers = list(items[0].keys()) if items else []
+            title = self.CATEGORY_TITLES.get(category, category.title())
+            separator = ',' if index else ''
+            writer.write(f'{separator}{{"title":{self._json(title)},"headers":{self._json(headers)},"rows":[')
+            rows = []
+            for row_index, item in enumerate(items):
+                rows.append(('' if row_index == 0 else ',')
+                            + self._json([self._json_value(item.get(header, '')) for header in headers]))
+                if len(rows) >= self.ROWS_PER_WRITE:
+                    writer.write(''.join(rows))
+                    rows = []
+            writer.write(''.join(rows) + ']}')
+        writer.write(']')
+        writer.close()
+
+        config = {
+            'badges': list(self.BADGE_COLUMNS),
+            'colors': self.SEVERITY_COLORS,
+            'default_color': self._get_severity_color(''),
+            'row_height': self.ROW_HEIGHT,
+            'visible_rows': self.VISIBLE_ROWS,
+            'overscan': self.OVERSCAN_ROWS
+        }
+        config_json = self._json(config).replace('</', '<\\/')
+        out.write(f'''    </script>
+    <script type="application/json" id="report-config">{config_json}</script>
+    <script>
+{_VIRTUAL_SCRIPT}    </script>
+''')
+
+    @staticmethod
+    def _json(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
 
-    def save_report(self, filepath: str) -> bool:
-        """Save the report to a file."""
+    @staticmethod
+    def _json_value(value: Any) -> Any:
+        """Keep numbers sortable as numbers and turn everything else into text."""
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            return value
+        return '' if value is None else str(value)
+
+    def count_rows(self) -> int:
+        """Get the number of result rows across all categories."""
+        return sum(len(items) for items in self.results.values())
+
+    def save_report(self, filepath: str, virtualized: Optional[bool] = None) -> bool:
+        """Save the report to a file, streaming it through a write buffer.
+
+        Unless virtualized is given, reports with more than
+        VIRTUALIZE_ROWS rows are saved in virtualized mode.
+        """
+        if virtualized is None:
+            virtualized = self.count_rows() > self.VIRTUALIZE_ROWS
         try:
-            html_content = self.generate_html()
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            with open(filepath, 'w', encoding='utf-8', buffering=self.WRITE_BUFFER_SIZE) as f:
+                self.write_html(f, virtualized)
             return True
         except Exception as e:
             print(f"Error saving report: {e}")
             return False
+
+
+class _CompressedWriter:
+    """Gzip-compresses text and writes it to a stream as base64 lines."""
+
+    # Bytes per 76-character base64 line
+    LINE_BYTES = 57
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self.pending = b''
+
+    def _emit(self, data: bytes, final: bool = False):
+        data = self.pending + data
+        cut = len(data) if final else len(data) - len(data) % self.LINE_BYTES
+        if cut:
+            self.out.write(base64.encodebytes(data[:cut]).decode('ascii'))
+        self.pending = data[cut:]
+
+    def write(self, text: str):
+        self._emit(self.compressor.compress(text.encode('utf-8')))
+
+    def close(self):
+        self._emit(self.compressor.flush(), final=True)
@@ -0,0 +1,204 @@
+"""Reader for Windows Shell Link (.lnk) shortcut files."""
+
+import os
+import struct
+import ntpath
+from typing import Dict, Any, Optional, Tuple
+
+
+# LinkFlags
+HAS_LINK_TARGET_ID_LIST = 0x0001
+HAS_LINK_INFO = 0x0002
+HAS_NAME = 0x0004
+HAS_RELATIVE_PATH = 0x0008
+HAS_WORKING_DIR = 0x0010
+HAS_ARGUMENTS = 0x0020
+HAS_ICON_LOCATION = 0x0040
+IS_UNICODE = 0x0080
+HAS_EXP_STRING = 0x0200
+
+# LinkInfoFlags
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x1
+COMMON_NETWORK_RELATIVE_LINK = 0x2
+
+HEADER_SIZE = 0x4C
+LINK_CLSID = bytes.fromhex('0114020000000000c000000000000046')
+ENVIRONMENT_BLOCK = 0xA0000001
+
+
+def _c_string(data: bytes, position: int) -> str:
+    """Read a NUL-terminated ANSI string."""
+    end = data.find(b'\x00', position)
+    return data[position:end if end >= 0 else len(data)].decode('mbcs' if os.name == 'nt' else 'cp1252', 'replace')
+
+
+def _c_wstring(data: bytes, position: int) -> str:
+    """Read a NUL-terminated UTF-16 string."""
+    end = position
+    while end + 1 < len(data) and data[end:end + 2] != b'\x00\x00':
+        end += 2
+    return data[position:end].decode('utf-16-le', 'replace')
+
+
+class ShellLinkReader:
+    """Reads the target of shortcut files without going through COM.
+
+    The binary format ([MS-SHLLINK]) is parsed directly: the target comes
+    from the LinkInfo local or network path, the environment variable
+    block, the relative path or, failing those, the file names of the
+    ID list. Arguments and working directory are read from the string
+    data. Results are cached by path and modification time, so unchanged
+    shortcuts are parsed once per session.
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[int, int, Optional[Dict[str, Any]]]] = {}
+
+    def clear(self):
+        """Forget cached shortcuts."""
+        self._cache.clear()
+
+    def read(self, path: str) -> Optional[Dict[str, Any]]:
+        """Read a shortcut, or None if it is missing or not a shell link.
+
+        Returns target, arguments, working_dir, description and
+        icon_location; target is '' for links to shell folders or
+        virtual items with no file system path.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = os.path.normcase(path)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            link = self.parse(data, os.path.dirname(path))
+        except OSError:
+            link = None
+        self._cache[key] = (st.st_mtime_ns, st.st_size, link)
+        return link
+
+    def parse(self, data: bytes, base_dir: str = '') -> Optional[Dict[str, Any]]:
+        """Parse shortcut file contents; relative paths are resolved against base_dir."""
+        if len(data) < HEADER_SIZE or data[:4] != struct.pack('<I', HEADER_SIZE) \
+                or data[4:20] != LINK_CLSID:
+            return None
+        try:
+            return self._parse(data, base_dir)
+        except (struct.error, IndexError, ValueError):
+            return None
+
+    def _parse(self, data: bytes, base_dir: str) -> Dict[str, Any]:
+        flags, = struct.unpack_from('<I', data, 0x14)
+        position = HEADER_SIZE
+
+        id_list_path = ''
+        if flags & HAS_LINK_TARGET_ID_LIST:
+            size, = struct.unpack_from('<H', data, position)
+            id_list_path = self._read_id_list(data[position + 2:position + 2 + size])
+            position += 2 + size
+
+        link_info_path = ''
+        if flags & HAS_LINK_INFO:
+            size, = struct.unpack_from('<I', data, position)
+            link_info_path = self._read_link_info(data[position:position + size])
+            position += size
+
+        strings = {}
+        for flag, field in ((HAS_NAME, 'description'), (HAS_RELATIVE_PATH, 'relative_path'),
+                            (HAS_WORKING_DIR, 'working_dir'), (HAS_ARGUMENTS, 'arguments'),
+                            (HAS_ICON_LOCATION, 'icon_location')):
+            if not flags & flag:
+                continue
+            count, = struct.unpack_from('<H', data, position)
+            position += 2
+            if flags & IS_UNICODE:
+                strings[field] = data[position:position + count * 2].decode('utf-16-le', 'replace')
+                position += count * 2
+            else:
+                strings[field] = data[position:position + count].decode('cp1252', 'replace')
+                position += count
+
+        env_path = ''
+        if flags & HAS_EXP_STRING:
+            env_path = self._read_environment_block(data, position)
+
+        relative = strings.get('relative_path', '')
+        if relative and base_dir:
+            relative = ntpath.normpath(ntpath.join(base_dir, relative))
+
+        return {
+            'target': link_info_path or env_path or relative or id_list_path,
+            'arguments': strings.get('arguments', ''),
+            'working_dir': strings.get('working_dir', ''),
+            'description': strings.get('description', ''),
+            'icon_location': strings.get('icon_location', '')
+        }
+
+    @staticmethod
+    def _read_link_info(info: bytes) -> str:
+        """Get the target path from a LinkInfo structure."""
+        header_size, link_flags, _, base_offset, network_offset, suffix_offset = \
+            struct.unpack_from('<6I', info, 4)
+        unicode = header_size >= 0x24
+        if unicode:
+            base_offset_unicode, suffix_offset_unicode = struct.unpack_from('<2I', info, 28)
+        suffix = _c_wstring(info, suffix_offset_unicode) if unicode and suffix_offset_unicode \
+            else _c_string(info, suffix_offset)
+
+        if link_flags & VOLUME_ID_AND_LOCAL_BASE_PATH:
+            base = _c_wstring(info, base_offset_unicode) if unicode and base_offset_unicode \
+                else _c_string(info, base_offset)
+            return base + suffix
+
+        if link_flags & COMMON_NETWORK_RELATIVE_LINK:
+            net_name_offset, = struct.unpack_from('<I', info, network_offset + 8)
+            if net_name_offset > 0x14:
+                net_name_offset_unicode, = struct.unpack_from('<I', info, network_offset + 20)
+                share = _c_wstring(info, network_offset + net_name_offset_unicode)
+            else:
+                share = _c_string(info, network_offset + net_name_offset)
+            return ntpath.join(share, suffix) if suffix else share
+        return ''
+
+    @staticmethod
+    def _read_environment_block(data: bytes, position: int) -> str:
+        """Find the EnvironmentVariableDataBlock among the extra data blocks."""
+        while position + 8 <= len(data):
+            size, signature = struct.unpack_from('<2I', data, position)
+            if size < 8:
+                break
+            if signature == ENVIRONMENT_BLOCK and size >= 0x314:
+                target = _c_wstring(data, position + 268)
+                return target or _c_string(data, position + 8)
+            position += size
+        return ''
+
+    @staticmethod
+    def _read_id_list(id_list: bytes) -> str:
+        """Rebuild a path from the drive and file entry items of an ID list.
+
+        File entries carry the short (8.3) name, which still opens the file.
+        """
+        parts = []
+        position = 0
+        while position + 2 <= len(id_list):
+            size, = struct.unpack_from('<H', id_list, position)
+            if size < 3:
+                break
+            item = id_list[position + 2:position + size]
+            kind = item[0] & 0x70
+            if kind == 0x20 and len(item) > 3:
+                # Volume item, e.g. 'C:\'
+                parts = [_c_string(item, 1)]
+            elif kind == 0x30 and parts and len(item) > 12:
+                parts.append(_c_string(item, 12))
+            position += size
+        if not parts:
+            return ''
+        return ntpath.join(*parts)
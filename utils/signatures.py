@@ -0,0 +1,226 @@
+"""Multi-pattern signature scanning for executables and hidden files."""
+
+import os
+import re
+import json
+import mmap
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable
+
+from utils.paths import get_data_file
+
+
+class SignatureScanner:
+    """Scans file contents against a local rule set of byte and string patterns.
+
+    All patterns are compiled into a single alternation so each file is
+    matched in one pass over a read-only memory map, a chunk at a time.
+    """
+
+    # Built-in rules, used when no local rule file exists
+    DEFAULT_RULES = [
+        {
+            'name': 'Mimikatz credential dumper',
+            'strings': ['sekurlsa::logonpasswords', 'gentilkiwi', 'mimikatz'],
+            'nocase': True,
+            'wide': True,
+            'severity': 'Critical'
+        },
+        {
+            'name': 'Meterpreter payload',
+            'strings': ['metsrv.dll', 'meterpreter'],
+            'hex': ['FC E8 82 00 00 00 60 89 E5'],
+            'nocase': True,
+            'severity': 'Critical'
+        },
+        {
+            'name': 'Reflective DLL loader',
+            'strings': ['ReflectiveLoader'],
+            'severity': 'Warning'
+        },
+        {
+            'name': 'PowerShell download cradle',
+            'strings': ['Net.WebClient).DownloadString', 'IEX (New-Object', 'IEX(New-Object'],
+            'nocase': True,
+            'wide': True,
+            'severity': 'Warning'
+        },
+        {
+            'name': 'Cryptocurrency miner',
+            'strings': ['stratum+tcp://', 'xmrig'],
+            'nocase': True,
+            'severity': 'Warning'
+        },
+        {
+            'name': 'UPX packed executable',
+            'hex': ['55 50 58 30 00', '55 50 58 21'],
+            'severity': 'Warning'
+        }
+    ]
+
+    RULES_FILE = 'signatures.json'
+
+    # Bytes of the mapping folded and searched at a time
+    CHUNK_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None,
+                 max_file_size: int = 16 * 1024 * 1024, max_workers: int = 4):
+        self.rules = rules if rules is not None else self.load_rules()
+        self.max_file_size = max_file_size
+        self.max_workers = max_workers
+        self._pattern, self._verifiers = self._compile(self.rules)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def load_rules(self, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Load rules from a JSON file, falling back to the built-in set."""
+        path = path or get_data_file(self.RULES_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+            if isinstance(rules, list):
+                return rules
+        except (OSError, ValueError):
+            pass
+        return list(self.DEFAULT_RULES)
+
+    def _hex_to_regex(self, hex_pattern: str, fold: bool = False) -> bytes:
+        """Convert a hex pattern with ?? wildcards to a bytes regex."""
+        parts = []
+        for token in hex_pattern.split():
+            if token == '??':
+                parts.append(b'.')
+            else:
+                value = bytes([int(token, 16)])
+                parts.append(re.escape(value.lower() if fold else value))
+        return b''.join(parts)
+
+    def _compile(self, rules: List[Dict[str, Any]]):
+        """Compile all rule patterns into one case-folded search regex.
+
+        The combined regex runs over lower-cased data and has no capturing
+        groups, which keeps the regex engine on its literal-prefix fast path.
+        Each hit is then confirmed by per-pattern verifiers; case-sensitive
+        strings and hex patterns are verified against the raw bytes.
+        """
+        alternatives = []
+        verifiers = []
+        self._max_length = 1
+
+        for rule_index, rule in enumerate(rules):
+            nocase = rule.get('nocase', False)
+            fragments = []
+            for text in rule.get('strings', []):
+                variants = [text.encode('utf-8')]
+                if rule.get('wide'):
+                    variants.append(text.encode('utf-16-le'))
+                for variant in variants:
+                    fragments.append((re.escape(variant.lower()), re.escape(variant), len(variant), nocase))
+
+            for hex_pattern in rule.get('hex', []):
+                try:
+                    folded = self._hex_to_regex(hex_pattern, fold=True)
+                    raw = self._hex_to_regex(hex_pattern)
+                except ValueError:
+                    continue
+                fragments.append((folded, raw, len(hex_pattern.split()), False))
+
+            for folded, raw, length, fold in fragments:
+                alternatives.append(folded)
+                verifier = re.compile(folded if fold else raw, re.DOTALL)
+                verifiers.append((rule_index, verifier, fold))
+                self._max_length = max(self._max_length, length)
+
+        if not alternatives:
+            return None, []
+
+        return re.compile(b'|'.join(alternatives), re.DOTALL), verifiers
+
+    def reset_stats(self):
+        """Reset throughput counters."""
+        self.files_scanned = 0
+        self.bytes_scanned = 0
+        self.elapsed = 0.0
+
+    def _verify(self, mm, folded: bytes, chunk_start: int, offset: int,
+                matched: Dict[int, Dict[str, str]]):
+        """Confirm which patterns match at a candidate offset."""
+        for rule_index, verifier, fold in self._verifiers:
+            if rule_index in matched:
+                continue
+            if fold:
+                hit = verifier.match(folded, offset)
+            else:
+                hit = verifier.match(mm, chunk_start + offset)
+            if hit:
+                rule = self.rules[rule_index]
+                matched[rule_index] = {
+                    'name': rule.get('name', 'Unnamed rule'),
+                    'severity': rule.get('severity', 'Warning')
+                }
+
+    def scan_file(self, path: str) -> List[Dict[str, str]]:
+        """Scan a single file and return the rules it matched."""
+        if self._pattern is None:
+            return []
+
+        matched = {}
+        length = 0
+        overlap = self._max_length - 1
+        try:
+            with open(path, 'rb') as f:
+                length = min(os.fstat(f.fileno()).st_size, self.max_file_size)
+                if length > 0:
+                    with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as mm:
+                        chunk_start = 0
+                        while chunk_start < length and len(matched) < len(self.rules):
+                            chunk_end = min(chunk_start + self.CHUNK_SIZE + overlap, length)
+                            folded = mm[chunk_start:chunk_end].lower()
+                            for match in self._pattern.finditer(folded):
+                                self._verify(mm, folded, chunk_start, match.start(), matched)
+                                if len(matched) == len(self.rules):
+                                    break
+                            chunk_start += self.CHUNK_SIZE
+        except (OSError, ValueError):
+            return []
+
+        with self._lock:
+            self.files_scanned += 1
+            self.bytes_scanned += length
+
+        return list(matched.values())
+
+    def scan_files(self, paths: Iterable[str]) -> Dict[str, List[Dict[str, str]]]:
+        """Scan many files in parallel and return matches keyed by path."""
+        unique_paths = list(dict.fromkeys(p for p in paths if p))
+        results = {}
+        if not unique_paths:
+            return results
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for path, matches in zip(unique_paths, pool.map(self.scan_file, unique_paths)):
+                if matches:
+                    results[path] = matches
+        self.elapsed += time.perf_counter() - start
+
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get throughput statistics for scans since the last reset."""
+        mb = self.bytes_scanned / (1024 * 1024)
+        return {
+            'files': self.files_scanned,
+            'megabytes': round(mb, 1),
+            'seconds': round(self.elapsed, 2),
+            'mb_per_sec': round(mb / self.elapsed, 1) if self.elapsed > 0 else 0.0
+        }
+
+    @staticmethod
+    def format_flag(match: Dict[str, str]) -> str:
+        """Format a rule match as an analyzer flag."""
+        if match.get('severity') == 'Critical':
+            return f"Signature match: {match['name']}"
+        return f"Suspicious content: {match['name']}"
@@ -0,0 +1,216 @@
+"""Direct reader for the Task Scheduler's XML task definition store."""
+
+import os
+import json
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from utils.paths import get_data_file
+
+
+class TaskStore:
+    """Reads scheduled task definitions from the Tasks directory.
+
+    Each task is one XML file whose path below the Tasks directory is the
+    task's name. Files are parsed with iterparse on a thread pool, and the
+    parsed definitions are cached on disk keyed by file mtime and size, so
+    a later scan only parses tasks that were added or changed.
+    """
+
+    CACHE_FILE = 'task_cache.json'
+
+    # Bump when the parsed shape changes so stale cache entries are ignored
+    CACHE_VERSION = 2
+
+    def __init__(self, tasks_dir: Optional[str] = None, cache_file: Optional[str] = None,
+                 max_workers: int = 4):
+        self.tasks_dir = tasks_dir or os.path.join(
+            os.environ.get('SystemRoot', 'C:\\Windows'), 'System32', 'Tasks'
+        )
+        self.cache_file = cache_file or get_data_file(self.CACHE_FILE)
+        self.max_workers = max_workers
+        self._cache: Optional[Dict[str, Any]] = None
+        self.parsed = 0
+        self.reused = 0
+
+    def _load_cache(self) -> Dict[str, Any]:
+        """Read the parse cache from disk."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.CACHE_VERSION and data.get('tasks_dir') == self.tasks_dir:
+                return data.get('tasks', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def _save_cache(self, tasks: Dict[str, Any]):
+        """Write the parse cache to disk."""
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.CACHE_VERSION, 'tasks_dir': self.tasks_dir, 'tasks': tasks}, f)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _local(tag: str) -> str:
+        """Strip the XML namespace from a tag."""
+        return tag.rsplit('}', 1)[-1]
+
+    def _parse_trigger(self, element: ET.Element) -> Dict[str, Any]:
+        """Convert a trigger element into a plain dict."""
+        trigger = {'type': self._local(element.tag), 'enabled': True}
+        for child in element.iter():
+            if child is element:
+                continue
+            tag = self._local(child.tag)
+            text = (child.text or '').strip()
+            if tag == 'Enabled':
+                trigger['enabled'] = text.lower() != 'false'
+            elif tag in ('StartBoundary', 'EndBoundary', 'Delay', 'RandomDelay', 'ExecutionTimeLimit',
+                         'DaysInterval', 'WeeksInterval', 'UserId', 'Subscription', 'StateChange'):
+                trigger[tag] = text
+            elif tag == 'Interval':
+                trigger['repetition_interval'] = text
+            elif tag == 'Duration':
+                trigger['repetition_duration'] = text
+            elif tag == 'StopAtDurationEnd':
+                trigger['stop_at_duration_end'] = text.lower() == 'true'
+            elif tag in ('DaysOfWeek', 'DaysOfMonth', 'Months', 'Weeks'):
+                trigger[tag] = [self._local(c.tag) if not (c.text or '').strip() else c.text.strip()
+                                for c in child]
+            elif tag in ('ScheduleByDay', 'ScheduleByWeek', 'ScheduleByMonth', 'ScheduleByMonthDayOfWeek'):
+                trigger['schedule'] = tag
+        return trigger
+
+    def parse_file(self, path: str) -> Optional[Dict[str, Any]]:
+        """Parse one task XML file, streaming elements with iterparse."""
+        task = {
+            'author': '',
+            'description': '',
+            'uri': '',
+            'enabled': True,
+            'hidden': False,
+            'user_id': '',
+            'run_level': '',
+            'triggers': [],
+            'actions': []
+        }
+        # Open elements, outermost first; stack[1] is the top-level section
+        stack: List[str] = []
+
+        try:
+            for event, element in ET.iterparse(path, events=('start', 'end')):
+                tag = self._local(element.tag)
+                if event == 'start':
+                    stack.append(tag)
+                    continue
+
+                stack.pop()
+                section = stack[1] if len(stack) > 1 else None
+                parent = stack[-1] if stack else None
+                text = (element.text or '').strip()
+
+                if section == 'RegistrationInfo':
+                    if tag == 'Author':
+                        task['author'] = text
+                    elif tag == 'Description':
+                        task['description'] = text
+                    elif tag == 'URI':
+                        task['uri'] = text
+                elif section == 'Triggers' and parent == 'Triggers':
+                    task['triggers'].append(self._parse_trigger(element))
+                    element.clear()
+                elif section == 'Settings' and parent == 'Settings' and tag in ('Enabled', 'Hidden'):
+                    task[tag.lower()] = text.lower() == 'true'
+                elif section == 'Actions' and parent == 'Actions':
+                    if tag == 'Exec':
+                        command = element.find('{*}Command')
+                        arguments = element.find('{*}Arguments')
+                        working_directory = element.find('{*}WorkingDirectory')
+                        task['actions'].append({
+                            'type': 'Exec',
+                            'command': (command.text or '').strip() if command is not None else '',
+                            'arguments': (arguments.text or '').strip() if arguments is not None else '',
+                            'working_directory': (working_directory.text or '').strip().strip('"')
+                            if working_directory is not None else ''
+                        })
+                    elif tag == 'ComHandler':
+                        class_id = element.find('{*}ClassId')
+                        task['actions'].append({
+                            'type': 'ComHandler',
+                            'command': (class_id.text or '').strip() if class_id is not None else '',
+                            'arguments': '',
+                            'working_directory': ''
+                        })
+                    element.clear()
+                elif section == 'Principals':
+                    if tag == 'UserId' or (tag == 'GroupId' and not task['user_id']):
+                        task['user_id'] = text
+                    elif tag == 'RunLevel':
+                        task['run_level'] = text
+        except (ET.ParseError, OSError, UnicodeDecodeError):
+            return None
+
+        return task
+
+    def _list_files(self) -> Dict[str, os.stat_result]:
+        """Find every task file below the Tasks directory."""
+        files = {}
+        for root, _, names in os.walk(self.tasks_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    files[path] = os.stat(path)
+                except OSError:
+                    continue
+        return files
+
+    def load(self) -> Optional[List[Dict[str, Any]]]:
+        """Read all task definitions, or None if the store cannot be read."""
+        try:
+            # Reading the store needs administrator rights
+            os.listdir(self.tasks_dir)
+            files = self._list_files()
+        except OSError:
+            return None
+
+        if self._cache is None:
+            self._cache = self._load_cache()
+
+        self.parsed = 0
+        self.reused = 0
+        tasks = {}
+        to_parse = []
+        for path, st in files.items():
+            name = '\\' + os.path.relpath(path, self.tasks_dir).replace(os.sep, '\\')
+            cached = self._cache.get(name)
+            if cached and cached['mtime'] == st.st_mtime and cached['size'] == st.st_size:
+                tasks[name] = cached
+                self.reused += 1
+            else:
+                to_parse.append((name, path, st))
+
+        def parse(item):
+            name, path, st = item
+            return name, st, self.parse_file(path)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for name, st, task in pool.map(parse, to_parse):
+                self.parsed += 1
+                # Unparseable files are cached too, so they are not retried until they change
+                tasks[name] = {'mtime': st.st_mtime, 'size': st.st_size, 'task': task}
+
+        if to_parse or len(tasks) != len(self._cache):
+            self._save_cache(tasks)
+        self._cache = tasks
+
+        results = []
+        for name in sorted(tasks):
+            if tasks[name]['task'] is None:
+                continue
+            task = dict(tasks[name]['task'])
+            task['name'] = name
+            results.append(task)
+        return results
@@ -0,0 +1,230 @@
+"""Expansion of scheduled task triggers into a forecast firing timeline."""
+
+import re
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, date, timedelta, timezone
+from typing import List, Dict, Any, Optional, Set, Iterator
+
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+_BOUNDARY = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?(Z|[+-]\d{2}:\d{2})?')
+_DURATION = re.compile(r'P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+
+def parse_boundary(text: Optional[str]) -> Optional[datetime]:
+    """Parse a trigger StartBoundary/EndBoundary into naive local time.
+
+    Boundaries without an offset are already local; UTC or offset ones
+    (tasks synchronized across time zones) are converted.
+    """
+    match = _BOUNDARY.fullmatch((text or '').strip())
+    if not match:
+        return None
+    year, month, day, hour, minute, second, offset = match.groups()
+    try:
+        value = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0))
+    except ValueError:
+        return None
+    if offset:
+        if offset == 'Z':
+            tz = timezone.utc
+        else:
+            sign = -1 if offset[0] == '-' else 1
+            tz = timezone(sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6])))
+        try:
+            value = value.replace(tzinfo=tz).astimezone().replace(tzinfo=None)
+        except (OverflowError, OSError):
+            return None
+    return value
+
+
+def parse_duration(text: Optional[str]) -> Optional[timedelta]:
+    """Parse an ISO 8601 duration such as PT15M, or None if empty or invalid."""
+    match = _DURATION.fullmatch((text or '').strip())
+    if not match or not any(match.groups()):
+        return None
+    weeks, days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    return timedelta(weeks=weeks, days=days, hours=hours, minutes=minutes, seconds=seconds)
+
+
+def _interval(value: Any) -> int:
+    """Read a days/weeks interval, treating anything invalid as 1."""
+    try:
+        return max(1, int(value or 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+class TriggerTimeline:
+    """Forecasts when scheduled tasks will run over the next hours.
+
+    Each trigger is expanded into its firing times inside the horizon:
+    the base schedule (one time, daily, weekly, monthly or monthly by
+    weekday) gives occurrence starts, and a repetition pattern adds a
+    firing every interval until its duration ends. Boot and logon
+    triggers are anchored at the last boot. Firings are bucketed by
+    minute so that contention windows, where many tasks start together,
+    and executions per hour can be read off the index.
+    """
+
+    # Repetitions without a duration run indefinitely; look this far back
+    # for occurrences whose repetitions still reach the horizon
+    MAX_LOOKBACK_DAYS = 31
+
+    def __init__(self, horizon_hours: int = 24, contention_threshold: int = 3,
+                 bucket_minutes: int = 1, max_firings: int = 5000,
+                 start: Optional[datetime] = None, boot_time: Optional[datetime] = None):
+        self.horizon_hours = horizon_hours
+        self.contention_threshold = contention_threshold
+        self.bucket = timedelta(minutes=bucket_minutes)
+        self.max_firings = max_firings
+        self.start = (start or datetime.now()).replace(second=0, microsecond=0)
+        self.end = self.start + timedelta(hours=horizon_hours)
+        self.boot_time = boot_time
+        self._buckets: Dict[datetime, Set[str]] = defaultdict(set)
+        self._hours: Counter = Counter()
+        self._minutes: Counter = Counter()
+        self._firings: Dict[str, int] = {}
+        self._next: Dict[str, datetime] = {}
+        self.truncated: Set[str] = set()
+
+    def _runs_on(self, trigger: Dict[str, Any], first: date, day: date) -> bool:
+        """Check whether a calendar trigger's schedule includes a day."""
+        schedule = trigger.get('schedule')
+        months = trigger.get('Months') or MONTHS
+        days_of_week = trigger.get('DaysOfWeek') or [WEEKDAYS[first.weekday()]]
+
+        if schedule == 'ScheduleByDay':
+            interval = _interval(trigger.get('DaysInterval'))
+            return (day - first).days % interval == 0
+        if schedule == 'ScheduleByWeek':
+            interval = _interval(trigger.get('WeeksInterval'))
+            # Weeks are counted from the Sunday starting the first week
+            week_start = first - timedelta(days=(first.weekday() + 1) % 7)
+            return (WEEKDAYS[day.weekday()] in days_of_week
+                    and (day - week_start).days // 7 % interval == 0)
+        if MONTHS[day.month - 1] not in months:
+            return False
+        is_last_week = (day + timedelta(days=7)).month != day.month
+        if schedule == 'ScheduleByMonth':
+            days = trigger.get('DaysOfMonth') or [str(first.day)]
+            is_last_day = (day + timedelta(days=1)).month != day.month
+            return str(day.day) in days or ('Last' in days and is_last_day)
+        if schedule == 'ScheduleByMonthDayOfWeek':
+            weeks = trigger.get('Weeks') or ['1']
+            return (WEEKDAYS[day.weekday()] in days_of_week
+                    and (str((day.day - 1) // 7 + 1) in weeks or ('Last' in weeks and is_last_week)))
+        return False
+
+    def _occurrences(self, trigger: Dict[str, Any], lookback: timedelta) -> Iterator[datetime]:
+        """Yield the start of each base occurrence that can reach the horizon."""
+        kind = trigger.get('type')
+        start = parse_boundary(trigger.get('StartBoundary'))
+
+        if kind == 'TimeTrigger' and start:
+            yield start
+        elif kind == 'CalendarTrigger' and start:
+            day = max(start.date(), (self.start - lookback).date())
+            while day <= self.end.date():
+                if self._runs_on(trigger, start.date(), day):
+                    yield datetime.combine(day, start.time())
+                day += timedelta(days=1)
+        elif kind in ('BootTrigger', 'LogonTrigger') and self.boot_time:
+            yield self.boot_time + (parse_duration(trigger.get('Delay')) or timedelta())
+        # Idle, event and session triggers cannot be forecast
+
+    def expand(self, trigger: Dict[str, Any]) -> List[datetime]:
+        """Get a trigger's firing times within the horizon, in order."""
+        if not trigger.get('enabled', True):
+            return []
+
+        interval = parse_duration(trigger.get('repetition_interval'))
+        duration = parse_duration(trigger.get('repetition_duration'))
+        end_boundary = parse_boundary(trigger.get('EndBoundary'))
+        end = min(self.end, end_boundary) if end_boundary else self.end
+
+        if not interval:
+            lookback = timedelta()
+        elif duration:
+            lookback = min(duration, timedelta(days=self.MAX_LOOKBACK_DAYS))
+        else:
+            lookback = timedelta(days=self.MAX_LOOKBACK_DAYS)
+
+        firings = set()
+        for occurrence in self._occurrences(trigger, lookback):
+            if not interval:
+                if self.start <= occurrence < end:
+                    firings.add(occurrence)
+                continue
+
+            stop = min(occurrence + duration, end) if duration else end
+            # Skip straight to the first repetition inside the horizon
+            skip = max(0, math.ceil((self.start - occurrence) / interval))
+            when = occurrence + skip * interval
+            while when < stop:
+                firings.add(when)
+                if len(firings) >= self.max_firings:
+                    return sorted(firings)
+                when += interval
+
+        return sorted(firings)
+
+    def add_task(self, name: str, triggers: List[Dict[str, Any]]) -> int:
+        """Add a task's firings to the timeline and return how many there are."""
+        times = set()
+        for trigger in triggers:
+            times.update(self.expand(trigger))
+            if len(times) >= self.max_firings:
+                self.truncated.add(name)
+                break
+
+        for when in times:
+            self._buckets[self.start + (when - self.start) // self.bucket * self.bucket].add(name)
+            self._hours[when.replace(minute=0, second=0, microsecond=0)] += 1
+            self._minutes[when.minute] += 1
+        self._firings[name] = len(times)
+        if times:
+            self._next[name] = min(times)
+        return len(times)
+
+    def get_runs_per_hour(self, name: str) -> float:
+        """Get a task's forecast executions per hour."""
+        return self._firings.get(name, 0) / self.horizon_hours
+
+    def get_next_run(self, name: str) -> Optional[datetime]:
+        """Get a task's next forecast firing, if any."""
+        return self._next.get(name)
+
+    def get_contention_windows(self) -> List[Dict[str, Any]]:
+        """Get buckets where at least the threshold of tasks start, busiest first."""
+        windows = [
+            {'start': start, 'end': start + self.bucket, 'tasks': sorted(names), 'count': len(names)}
+            for start, names in self._buckets.items()
+            if len(names) >= self.contention_threshold
+        ]
+        windows.sort(key=lambda w: (-w['count'], w['start']))
+        return windows
+
+    def get_executions_per_hour(self) -> List[tuple]:
+        """Get (hour, forecast executions) for each hour of the horizon."""
+        first = self.start.replace(minute=0)
+        return [(first + timedelta(hours=i), self._hours.get(first + timedelta(hours=i), 0))
+                for i in range(self.horizon_hours + 1)]
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Get totals for the forecast."""
+        windows = self.get_contention_windows()
+        total = sum(self._firings.values())
+        return {
+            'executions': total,
+            'executions_per_hour': round(total / self.horizon_hours, 1),
+            'peak_executions_per_hour': max(self._hours.values(), default=0),
+            'contention_windows': len(windows),
+            'peak_concurrent_tasks': windows[0]['count'] if windows else max(
+                (len(n) for n in self._buckets.values()), default=0),
+            'busiest_minute': self._minutes.most_common(1)[0][0] if self._minutes else -1
+        }
@@ -0,0 +1,212 @@
+"""Compiled path, name, attribute and owner whitelist for directory walks."""
+
+import os
+import re
+import json
+import ctypes
+from typing import List, Dict, Any, Optional, Iterable
+
+from utils.paths import get_data_file
+
+
+def get_owner(path: str) -> str:
+    """Get the owner account of a file as DOMAIN\\name, or '' if unknown."""
+    if os.name == 'nt':
+        return _get_owner_win32(path)
+    try:
+        import pwd
+        return pwd.getpwuid(os.stat(path, follow_symlinks=False).st_uid).pw_name
+    except (ImportError, KeyError, OSError):
+        return ''
+
+
+def _get_owner_win32(path: str) -> str:
+    """Look up a file's owner SID and resolve it to an account name."""
+    SE_FILE_OBJECT = 1
+    OWNER_SECURITY_INFORMATION = 0x01
+
+    advapi32 = ctypes.WinDLL('advapi32', use_last_error=True)
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+
+    owner = ctypes.c_void_p()
+    descriptor = ctypes.c_void_p()
+    if advapi32.GetNamedSecurityInfoW(
+            ctypes.c_wchar_p(path), SE_FILE_OBJECT, OWNER_SECURITY_INFORMATION,
+            ctypes.byref(owner), None, None, None, ctypes.byref(descriptor)) != 0:
+        return ''
+
+    try:
+        name = ctypes.create_unicode_buffer(256)
+        domain = ctypes.create_unicode_buffer(256)
+        name_size = ctypes.c_ulong(256)
+        domain_size = ctypes.c_ulong(256)
+        sid_type = ctypes.c_int()
+        if not advapi32.LookupAccountSidW(None, owner, name, ctypes.byref(name_size),
+                                          domain, ctypes.byref(domain_size), ctypes.byref(sid_type)):
+            return ''
+        return f"{domain.value}\\{name.value}" if domain.value else name.value
+    finally:
+        kernel32.LocalFree(descriptor)
+
+
+class WhitelistMatcher:
+    """Matches directories against whitelist rules compiled into one matcher.
+
+    A rule may give a base name, a full-path glob or a full-path regex,
+    plus required attribute names and owner accounts; all conditions of a
+    rule must hold. Rules with only name or path conditions are merged
+    into a name set and a single combined regex, so most entries cost one
+    set lookup and one regex match. Attribute and owner conditions are
+    checked only after the path part of their rule matched, owner last.
+    """
+
+    RULES_FILE = 'whitelist.json'
+
+    # Built-in rules, used when no local rule file exists; the analyzer's
+    # base-name whitelist is added on top
+    DEFAULT_RULES = [
+        {'glob': 'C:\\ProgramData\\Package Cache\\**'},
+        {'glob': 'C:\\Users\\*\\AppData\\Local\\Packages\\**'},
+        {'name': '$WinREAgent', 'attributes': ['Hidden']},
+    ]
+
+    ATTRIBUTE_FLAGS = {
+        'readonly': 0x01,
+        'hidden': 0x02,
+        'system': 0x04,
+        'archive': 0x20,
+        'reparsepoint': 0x400,
+    }
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None, names: Iterable[str] = ()):
+        self.rules = rules if rules is not None else self.load_rules()
+        self._names = {n.lower() for n in names}
+        self._pattern: Optional[re.Pattern] = None
+        self._conditional: List[Dict[str, Any]] = []
+        self._compile(self.rules)
+        self._owner_cache: Dict[str, str] = {}
+
+    def load_rules(self, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Load rules from a JSON file, falling back to the built-in set."""
+        path = path or get_data_file(self.RULES_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+            if isinstance(rules, dict):
+                rules = rules.get('rules', [])
+            if isinstance(rules, list):
+                return rules
+        except (OSError, ValueError):
+            pass
+        return list(self.DEFAULT_RULES)
+
+    @staticmethod
+    def glob_to_regex(pattern: str) -> str:
+        """Convert a path glob to a regex; ** crosses separators, * and ? do not."""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith('**', i):
+                parts.append('.*')
+                i += 2
+                continue
+            if char == '*':
+                parts.append('[^\\\\/]*')
+            elif char == '?':
+                parts.append('[^\\\\/]')
+            elif char in '\\/':
+                parts.append('[\\\\/]')
+            else:
+                parts.append(re.escape(char))
+            i += 1
+        regex = ''.join(parts)
+        # 'dir\**' also covers 'dir' itself
+        if regex.endswith('[\\\\/].*'):
+            regex = regex[:-len('[\\\\/].*')] + '(?:[\\\\/].*)?'
+        return regex
+
+    def _compile(self, rules: List[Dict[str, Any]]):
+        """Split rules into the fast name/path matcher and conditional rules."""
+        alternatives = []
+        for rule in rules:
+            path_regex = None
+            combinable = True
+            if rule.get('glob'):
+                path_regex = self.glob_to_regex(rule['glob'])
+            elif rule.get('regex'):
+                path_regex = f"(?:{rule['regex']})"
+                try:
+                    # Group names and backreference numbers would clash once
+                    # joined with other rules, so those are matched on their own
+                    combinable = not re.compile(path_regex).groups
+                except re.error:
+                    continue
+
+            attributes = 0
+            for name in rule.get('attributes', []):
+                attributes |= self.ATTRIBUTE_FLAGS.get(name.lower().replace(' ', ''), 0)
+            owners = rule.get('owner', [])
+            owners = {o.lower() for o in ([owners] if isinstance(owners, str) else owners)}
+            name = rule.get('name', '').lower()
+
+            if not attributes and not owners:
+                if name and path_regex is None:
+                    self._names.add(name)
+                    continue
+                if path_regex is not None and not name and combinable:
+                    alternatives.append(path_regex)
+                    continue
+
+            if not (name or path_regex or attributes or owners):
+                continue
+            self._conditional.append({
+                'name': name,
+                'path': re.compile(path_regex, re.IGNORECASE) if path_regex else None,
+                'attributes': attributes,
+                'owners': owners
+            })
+
+        if alternatives:
+            try:
+                self._pattern = re.compile('|'.join(alternatives), re.IGNORECASE)
+            except re.error as e:
+                print(f"Error combining whitelist paths: {e}")
+                self._conditional.extend(
+                    {'name': '', 'path': re.compile(regex, re.IGNORECASE), 'attributes': 0, 'owners': set()}
+                    for regex in alternatives)
+
+    def _owner(self, path: str) -> str:
+        """Get a path's owner, cached for the matcher's lifetime."""
+        owner = self._owner_cache.get(path)
+        if owner is None:
+            owner = self._owner_cache[path] = get_owner(path).lower()
+        return owner
+
+    def match(self, path: str, name: str, attributes: Optional[int] = None) -> bool:
+        """Check whether an entry is whitelisted.
+
+        Rules that need attributes never match when attributes is None.
+        """
+        if name.lower() in self._names:
+            return True
+        if self._pattern is not None and self._pattern.fullmatch(path):
+            return True
+
+        for rule in self._conditional:
+            if rule['name'] and rule['name'] != name.lower():
+                continue
+            if rule['path'] is not None and not rule['path'].fullmatch(path):
+                continue
+            if rule['attributes']:
+                if attributes is None or attributes & rule['attributes'] != rule['attributes']:
+                    continue
+            if rule['owners'] and self._owner(path) not in rule['owners']:
+                continue
+            return True
+
+        return False
+
+    def match_record(self, record: Dict[str, Any]) -> bool:
+        """Check a DirectoryWalker subdirectory record."""
+        return self.match(record['path'], record['name'], record['attributes'])